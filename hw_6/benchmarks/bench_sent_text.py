@@ -0,0 +1,84 @@
+"""
+Бенчмарк формирования sent_text: f-string на каждого получателя против
+скомпилированного шаблона.
+
+Запуск из каталога hw_6:
+    python -m benchmarks.bench_sent_text [число_получателей]
+"""
+
+import sys
+import time
+
+from main import (
+    SENDER_TEXT_LAYOUT,
+    bind_template,
+    compile_template,
+    render_many,
+    render_template,
+    sender_email,
+)
+
+
+def main() -> None:
+    """Сравнивает время формирования текста для всех получателей."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    recipients = [f"user{i}@example.com" for i in range(count)]
+    email = {
+        "sender": "default@study.com",
+        "subject": "Quarterly Report",
+        "date": "2025-11-04",
+        "short_body": "Привет, ко...",
+    }
+
+    start = time.perf_counter()
+    before = [f"""Кому: {recipient}, от {email['sender']}
+                                Тема: {email['subject']}, дата {email['date']}
+                                {email['short_body']}""" for recipient in recipients]
+    f_string = time.perf_counter() - start
+
+    start = time.perf_counter()
+    template = bind_template(compile_template(SENDER_TEXT_LAYOUT), email)
+    after = [render_template(template, {"recipient": r}) for r in recipients]
+    compiled = time.perf_counter() - start
+    assert before == after
+
+    start = time.perf_counter()
+    template = bind_template(compile_template(SENDER_TEXT_LAYOUT), email)
+    after = render_many(template, {"recipient": recipients})
+    batched = time.perf_counter() - start
+    assert before == after
+
+    # Персональные поля: имя и дата у каждого получателя свои
+    names = [f"User {i}" for i in range(count)]
+    dates = ["2025-11-04"] * count
+    personal_layout = "Кому: {recipient} ({name}), от {sender}, дата {date}"
+    shared = {"sender": email["sender"]}
+
+    start = time.perf_counter()
+    before = [
+        f"Кому: {recipient} ({name}), от {email['sender']}, дата {send_date}"
+        for recipient, name, send_date in zip(recipients, names, dates)
+    ]
+    f_string_personal = time.perf_counter() - start
+
+    start = time.perf_counter()
+    template = bind_template(compile_template(personal_layout), shared)
+    columns = {"recipient": recipients, "name": names, "date": dates}
+    after = render_many(template, columns)
+    batched_personal = time.perf_counter() - start
+    assert before == after
+
+    print(f"{count} получателей")
+    print(f"f-string на получателя      {f_string * 1000:8.1f} ms")
+    print(f"render_template на каждого  {compiled * 1000:8.1f} ms")
+    print(f"render_many на всех         {batched * 1000:8.1f} ms")
+    print(f"f-string, 3 поля получателя {f_string_personal * 1000:8.1f} ms")
+    print(f"render_many, 3 поля         {batched_personal * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    sender_email(recipients, "Quarterly Report", "Привет, коллега!")
+    print(f"sender_email целиком        {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
+import re
 from datetime import date
+from itertools import repeat
+from string import Formatter
+from typing import Optional
 
 # Часть А. Функции
 """
@@ -41,6 +45,95 @@ def clean_body_text(body: str) -> str:
     return body.replace("\n", " ").replace("\t", " ")
 
 
+# Шаблоны текста письма: раскладка разбирается один раз на статичные куски
+# и имена полей, при отправке подставляются только значения полей
+Template = tuple[tuple[str, ...], tuple[str, ...]]
+
+
+def compile_template(layout: str) -> Template:
+    """
+    Разбирает раскладку вида "Кому: {to}, от {from}" на статичные куски и поля.
+    Возвращает (segments, fields), где кусков на один больше, чем полей.
+    """
+    segments = [""]
+    fields = []
+    for literal, field, format_spec, conversion in Formatter().parse(layout):
+        segments[-1] += literal
+        if field is None:
+            continue
+        if not field or format_spec or conversion:
+            raise ValueError(f"Unsupported template field: {{{field}}}")
+        fields.append(field)
+        segments.append("")
+
+    return tuple(segments), tuple(fields)
+
+
+def bind_template(template: Template, values: dict) -> Template:
+    """
+    Подставляет известные заранее значения (общие для всех получателей)
+    и возвращает шаблон, в котором остались только остальные поля.
+    """
+    segments, fields = template
+    bound_segments = [segments[0]]
+    bound_fields = []
+    for field, segment in zip(fields, segments[1:]):
+        if field in values:
+            bound_segments[-1] += str(values[field]) + segment
+        else:
+            bound_fields.append(field)
+            bound_segments.append(segment)
+
+    return tuple(bound_segments), tuple(bound_fields)
+
+
+def render_template(template: Template, values: dict) -> str:
+    """
+    Формирует текст по шаблону, вставляя значения полей между статичными кусками.
+    """
+    segments, fields = template
+    if len(fields) == 1:
+        return segments[0] + str(values[fields[0]]) + segments[1]
+
+    parts = [segments[0]]
+    for field, segment in zip(fields, segments[1:]):
+        parts.append(str(values[field]))
+        parts.append(segment)
+    return "".join(parts)
+
+
+def render_many(template: Template, columns: dict[str, list]) -> list[str]:
+    """
+    Формирует тексты сразу для всех получателей: columns[поле][i] - значение
+    поля для i-го текста. Статичные куски не копируются в промежуточные списки,
+    в каждый текст вставляются только значения полей; строка формата при этом
+    не разбирается заново для каждого текста.
+    """
+    count = len(next(iter(columns.values()))) if columns else 0
+    segments, fields = template
+    if not fields:
+        return [segments[0]] * count
+    if len(fields) == 1:
+        head, tail = segments
+        return [f"{head}{value}{tail}" for value in columns[fields[0]]]
+
+    # Статичные куски чередуются с колонками значений в одном zip,
+    # и каждый текст склеивается одним "".join
+    parts = []
+    for segment, field in zip(segments, fields):
+        if segment:
+            parts.append(repeat(segment))
+        parts.append(map(str, columns[field]))
+    if segments[-1]:
+        parts.append(repeat(segments[-1]))
+    return list(map("".join, zip(*parts)))
+
+
+SENDER_TEXT_LAYOUT = """Кому: {recipient}, от {sender}
+                                Тема: {subject}, дата {date}
+                                {short_body}"""
+
+
 # 4. Формирование итогового текста письма
 def build_sent_text(email: dict) -> str:
     """
@@ -102,47 +195,27 @@ test_emails = [
     "   ",
 ]
 
+# Шаблон корректного адреса компилируется один раз из списка доменных зон:
+# ровно один @, непустой логин, домен оканчивается на зону и перед ней есть символы
+valid_domains = (".com", ".ru", ".net")
+email_pattern = re.compile(
+    r"[^@]+@[^@]+(?:" + "|".join(re.escape(zone) for zone in valid_domains) + ")"
+)
+
 
 def get_correct_email(email_list: list[str]) -> list[str]:
     """
     Возвращает список корректных email.
     """
     correct_emails = []
-    valid_domains = (".com", ".ru", ".net")
 
     for email in email_list:
         # Очищаем от пробелов и приводим к нижнему регистру
         cleaned_email = email.strip().lower()
 
-        # Базовые проверки
-        if not cleaned_email or "@" not in cleaned_email:
-            continue
-
-        # Разделяем на логин и домен
-        parts = cleaned_email.split("@")
-
-        # Должен быть ровно один символ @
-        if len(parts) != 2:
-            continue
-
-        login, domain = parts
-
-        # Логин не должен быть пустым
-        if not login:
-            continue
-
-        # Домен должен заканчиваться на валидные зоны
-        if not domain.endswith(valid_domains):
-            continue
-
-        # Проверяем, что между @ и доменной зоной есть символы
-        # Убираем доменную зону и проверяем остаток
-        for zone in valid_domains:
-            if domain.endswith(zone):
-                domain_without_zone = domain[: -len(zone)]
-                if domain_without_zone:  # Должно быть что-то перед .com/.ru/.net
-                    correct_emails.append(cleaned_email)
-                break
+        # Проверка одним проходом скомпилированного шаблона
+        if email_pattern.fullmatch(cleaned_email):
+            correct_emails.append(cleaned_email)
 
     return correct_emails
 
@@ -157,11 +230,12 @@ def create_email(sender: str, recipient: str, subject: str, body: str) -> dict:
 
 
 # 9. Добавление даты отправки
-def add_send_date(email: dict) -> dict:
+def add_send_date(email: dict, send_date: Optional[str] = None) -> dict:
     """
-    Возвращает email с добавленным ключом email["date"] — текущая дата в формате YYYY-MM-DD.
+    Возвращает email с добавленным ключом email["date"] — send_date или
+    текущая дата в формате YYYY-MM-DD.
     """
-    email["date"] = date.today().isoformat()
+    email["date"] = send_date or date.today().isoformat()
     return email
 
 
@@ -220,8 +294,21 @@ subject — заголовок письма, message — текст письма
 
 
 def sender_email(
-    recipient_list: list[str], subject: str, message: str, *, sender="default@study.com"
+    recipient_list: list[str],
+    subject: str,
+    message: str,
+    *,
+    sender="default@study.com",
+    layout: str = SENDER_TEXT_LAYOUT,
+    variables: Optional[dict[str, dict]] = None,
 ) -> list[dict]:
+    """
+    Формирует письма для каждого получателя.
+    layout - раскладка sent_text; поля {recipient}, {sender}, {subject}, {date},
+    {short_body} и {masked_sender} берутся из письма, остальные - из
+    variables[recipient] (персональные переменные получателя; адреса-ключи
+    нормализуются так же, как получатели).
+    """
     # Проверить, что recipient_list не пустой
     if not recipient_list:
         return []
@@ -240,8 +327,11 @@ def sender_email(
     if is_subject_empty or is_body_empty:
         return []
 
-    # Исключить отправку самому себе
-    recipients_filtered = [r for r in valid_recipients if r != sender_normalized]
+    # Исключить повторы адресов и отправку самому себе за один проход:
+    # dict сохраняет порядок первого вхождения, поиск отправителя - O(1)
+    unique_recipients = dict.fromkeys(valid_recipients)
+    unique_recipients.pop(sender_normalized, None)
+    recipients_filtered = list(unique_recipients)
 
     if not recipients_filtered:
         return []
@@ -251,6 +341,9 @@ def sender_email(
     subject_clean = clean_body_text(subject)
     body_clean = clean_body_text(message)
 
+    # Дата отправки одна на все письма: общие поля шаблона берутся из первого
+    send_date = date.today().isoformat()
+
     # Создать письмо для каждого получателя
     emails = []
     for recipient in recipients_filtered:
@@ -263,7 +356,7 @@ def sender_email(
         )
 
         # Добавить дату отправки с помощью add_send_date()
-        email = add_send_date(email)
+        email = add_send_date(email, send_date)
 
         # Замаскировать email отправителя
         login, domain = extract_login_domain(sender_normalized)
@@ -272,15 +365,27 @@ def sender_email(
         # Сохранить короткую версию в email["short_body"]
         email = add_short_body(email)
 
-        # Сформировать итоговый текст письма
-        # Используем short_body согласно примеру результата
-        email[
-            "sent_text"
-        ] = f"""Кому: {email['recipient']}, от {email['sender']}
-                                Тема: {email['subject']}, дата {email['date']}
-                                {email['short_body']}"""
-
         emails.append(email)
 
+    # Сформировать итоговый текст писем (используем short_body согласно примеру):
+    # раскладка разбирается один раз, общие для всех писем поля подставляются
+    # один раз, в текст каждого письма вставляются только поля получателя
+    shared = {key: value for key, value in emails[0].items() if key != "recipient"}
+    template = bind_template(compile_template(layout), shared)
+    variables = {
+        normalize_addresses(address): values
+        for address, values in (variables or {}).items()
+    }
+    columns = {"recipient": recipients_filtered}
+    for field in template[1]:
+        if field == "recipient":
+            continue
+        missing = [r for r in recipients_filtered if field not in variables.get(r, {})]
+        if missing:
+            raise ValueError(f"No value for {{{field}}} for recipients: {missing}")
+        columns[field] = [variables[r][field] for r in recipients_filtered]
+    for email, sent_text in zip(emails, render_many(template, columns)):
+        email["sent_text"] = sent_text
+
     # Вернуть итоговый список писем
     return emails
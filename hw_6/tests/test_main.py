@@ -0,0 +1,122 @@
+from datetime import date
+
+import pytest
+
+import main
+from main import (
+    bind_template,
+    build_sent_text,
+    compile_template,
+    render_many,
+    render_template,
+    sender_email,
+)
+
+
+class TestTemplates:
+    """Tests for compiled sent_text templates."""
+
+    def test_compile_template(self):
+        """Test layout is split into static segments and field names."""
+        segments, fields = compile_template("Кому: {to}, от {from}!")
+
+        assert segments == ("Кому: ", ", от ", "!")
+        assert fields == ("to", "from")
+
+    @pytest.mark.parametrize("layout", ["{}", "{to:>10}", "{to!r}"])
+    def test_compile_template_rejects_unsupported_fields(self, layout):
+        """Test positional, formatted and converted fields are rejected."""
+        with pytest.raises(ValueError):
+            compile_template(layout)
+
+    def test_bind_template(self):
+        """Test shared values are merged into segments, other fields stay."""
+        template = compile_template("{a}-{b}-{c}")
+
+        bound = bind_template(template, {"a": 1, "c": 3})
+
+        assert bound == (("1-", "-3"), ("b",))
+        assert render_template(bound, {"b": 2}) == "1-2-3"
+
+    @pytest.mark.parametrize(
+        ("layout", "expected"),
+        [
+            ("static", ["static", "static"]),
+            ("<{x}>", ["<1>", "<2>"]),
+            ("{{{x}}} {y}", ["{1} a", "{2} b"]),
+            ("{x}{y}", ["1a", "2b"]),
+            ("{x}, {y}, {x}", ["1, a, 1", "2, b, 2"]),
+        ],
+    )
+    def test_render_many(self, layout, expected):
+        """Test batch rendering matches str.format for every field count."""
+        columns = {"x": [1, 2], "y": ["a", "b"]}
+        template = compile_template(layout)
+
+        assert render_many(template, columns) == expected
+        assert expected == [
+            layout.format(x=x, y=y) for x, y in zip(columns["x"], columns["y"])
+        ]
+
+    def test_build_sent_text(self):
+        """Test sent text uses the cleaned body."""
+        email = {
+            "to": "bob@gmail.com",
+            "from": "alice@company.ru",
+            "subject": "Report",
+            "date": "2026-01-01",
+            "body": "Hello,\n\tBob",
+        }
+
+        assert build_sent_text(email) == (
+            "Кому: bob@gmail.com, от alice@company.ru\n"
+            "            Тема: Report, дата 2026-01-01\n"
+            "            Hello,  Bob"
+        )
+
+
+class TestSenderEmail:
+    """Tests for sender_email with compiled templates."""
+
+    def test_variables_are_keyed_by_normalized_address(self):
+        """Test personal variables are found for any spelling of the address."""
+        emails = sender_email(
+            [" Bob@Gmail.com ", "eve@mail.ru"],
+            "Hello",
+            "Text",
+            layout="{recipient}: {name}",
+            variables={"BOB@gmail.com": {"name": "Bob"}, " eve@mail.ru": {"name": "Eve"}},
+        )
+
+        assert [email["sent_text"] for email in emails] == [
+            "bob@gmail.com: Bob",
+            "eve@mail.ru: Eve",
+        ]
+
+    def test_missing_variable_names_recipient(self):
+        """Test a missing personal variable raises ValueError naming the recipient."""
+        with pytest.raises(ValueError, match="eve@mail.ru"):
+            sender_email(
+                ["bob@gmail.com", "eve@mail.ru"],
+                "Hello",
+                "Text",
+                layout="{recipient}: {name}",
+                variables={"bob@gmail.com": {"name": "Bob"}},
+            )
+
+    def test_one_send_date_for_all_emails(self, monkeypatch):
+        """Test every email and its sent text get the same date across midnight."""
+        days = iter([date(2026, 1, 1), date(2026, 1, 2)])
+
+        class FakeDate:
+            @staticmethod
+            def today():
+                return next(days)
+
+        monkeypatch.setattr(main, "date", FakeDate)
+        emails = sender_email(
+            ["bob@gmail.com", "eve@mail.ru"], "Hello", "Text", layout="{date}"
+        )
+
+        assert [email["date"] for email in emails] == ["2026-01-01", "2026-01-01"]
+        assert [email["sent_text"] for email in emails] == ["2026-01-01", "2026-01-01"]
@@ -0,0 +1,72 @@
+"""
+Benchmark memory and set membership of 1M EmailAddress objects.
+
+Compares the slotted immutable EmailAddress with the previous dict-based
+class, which rehashed the address and rebuilt the masked form every time.
+
+Usage:
+    python -m benchmarks.bench_address_memory [addresses]
+"""
+
+import sys
+import tracemalloc
+
+from src.email_address import EmailAddress
+from src.validation import get_validator
+
+from .utils import timer
+
+
+class DictEmailAddress:
+    """Previous EmailAddress layout, kept as a baseline."""
+
+    def __init__(self, address: str):
+        self._address = address.strip().lower()
+        if not get_validator(EmailAddress.VALID_DOMAINS).is_valid(self._address):
+            raise ValueError(f"Invalid email address: {address}")
+
+    @property
+    def masked(self) -> str:
+        login, domain = self._address.split("@")
+        return f"{login[:2]}***@{domain}"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, DictEmailAddress):
+            return self._address == other._address
+        return False
+
+    def __hash__(self) -> int:
+        return hash(self._address)
+
+
+def main() -> None:
+    """Measure both layouts."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    raw = [f"user{i}@example.com" for i in range(count)]
+
+    for cls in (DictEmailAddress, EmailAddress):
+        name = cls.__name__
+        with timer(f"{name} construction, {count}"):
+            addresses = [cls(address) for address in raw]
+        del addresses
+
+        tracemalloc.start()
+        addresses = [cls(address) for address in raw]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name}: {current / count:6.1f} B/object incl. address string")
+
+        recipients = set(addresses)
+        with timer(f"{name} set membership, {count}"):
+            sum(address in recipients for address in addresses)
+        with timer(f"{name} masked, first access"):
+            for address in addresses:
+                address.masked
+        with timer(f"{name} masked, repeated access"):
+            for address in addresses:
+                address.masked
+        del addresses, recipients
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark AsyncEmailService throughput and latency against a fake transport.
+
+Usage:
+    python -m benchmarks.bench_async_service [recipients] [latency_ms] [concurrency ...]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from src.async_service import AsyncEmailService
+from src.email import Email
+from src.email_address import EmailAddress
+from src.status import Status
+from src.transport import FakeTransport
+
+
+class TimedTransport(FakeTransport):
+    """Fake transport that records the latency of every delivery."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: list[float] = []
+
+    async def deliver(self, email: Email) -> None:
+        start = time.perf_counter()
+        try:
+            await super().deliver(email)
+        finally:
+            self.latencies.append((time.perf_counter() - start) * 1000)
+
+
+def main() -> None:
+    """Send one email with several concurrency limits."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    limits = [int(arg) for arg in sys.argv[3:]] or [1, 10, 100, 1000]
+    email = Email(
+        subject="Quarterly Report",
+        body="Hello",
+        sender=EmailAddress("alice@example.com"),
+        recipients=[EmailAddress(f"user{i}@example.com") for i in range(count)],
+        status=Status.READY,
+    )
+
+    for concurrency in limits:
+        if concurrency == 1 and count * latency > 30:
+            print(f"concurrency 1 skipped: would take {count * latency:.0f} s")
+            continue
+        transport = TimedTransport(latency=latency, jitter=latency / 2, seed=1)
+        service = AsyncEmailService(transport, concurrency=concurrency)
+        start = time.perf_counter()
+        asyncio.run(service.send_email(email))
+        elapsed = time.perf_counter() - start
+        p99 = statistics.quantiles(transport.latencies, n=100)[98]
+        print(
+            f"concurrency {concurrency:>5}: {count / elapsed:10.0f} msg/s, "
+            f"p99 delivery {p99:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark EmailBatch.prepare against Email.prepare row by row.
+
+Usage:
+    python -m benchmarks.bench_batch [rows ...]
+"""
+
+import sys
+
+from src.batch import EmailBatch
+from src.email import Email
+from src.email_address import EmailAddress
+
+from .utils import timer
+
+BODY = "Hello,\n\tthis is the weekly newsletter.\n\nBest,\nAlice"
+
+
+def build_emails(count: int) -> list[Email]:
+    """Build `count` draft emails with dirty subjects and bodies."""
+    sender = EmailAddress("alice@example.com")
+    recipient = EmailAddress("bob@example.com")
+    return [
+        Email(
+            subject=f"  Newsletter\t#{i}  ",
+            body=BODY if i % 7 else "",
+            sender=sender,
+            recipients=[recipient],
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    """Run benchmark for each row count."""
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for count in counts:
+        emails = build_emails(count)
+        batch = EmailBatch.from_emails(emails)
+
+        with timer(f"Email.prepare per row, {count}"):
+            for email in emails:
+                email.prepare()
+        with timer(f"EmailBatch.prepare, {count}"):
+            batch.prepare()
+
+        assert batch.statuses == [email.status for email in emails]
+        assert batch.short_bodies == [email.short_body for email in emails]
+
+
+if __name__ == "__main__":
+    main()
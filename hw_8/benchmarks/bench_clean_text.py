@@ -0,0 +1,75 @@
+"""
+Benchmark clean_text against plain split/join and its streaming mode.
+
+Usage:
+    python -m benchmarks.bench_clean_text [large_kb] [stream_mb]
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from src.utils import clean_stream, clean_text
+
+PARAGRAPH = (
+    "Привет, команда!\n\tВо вложении квартальный отчёт (Q1 report),  "
+    "please review   and send feedback.\r\n"
+)
+
+
+def split_join(text: str) -> str:
+    """Previous clean_text implementation."""
+    return " ".join(text.split())
+
+
+def compare(label: str, text: str, number: int) -> None:
+    """Print per-call time of both implementations on one input."""
+    assert clean_text(text) == split_join(text)
+    before = timeit.timeit(lambda: split_join(text), number=number) / number
+    after = timeit.timeit(lambda: clean_text(text), number=number) / number
+    print(
+        f"{label:<28} split/join {before * 1e6:10.2f} us   "
+        f"clean_text {after * 1e6:10.2f} us   x{before / after:5.2f}"
+    )
+
+
+def main() -> None:
+    """Compare on small, large and already clean inputs, then stream a file."""
+    large_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    stream_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    large = PARAGRAPH * (large_kb * 1024 // len(PARAGRAPH.encode("utf-8")))
+
+    compare("small subject", "Quarterly Report", 100_000)
+    compare("small clean body", "Hello team, here is the quarterly report.", 100_000)
+    compare(f"large dirty ({large_kb} KB)", large, 50)
+    compare(f"large clean ({large_kb} KB)", split_join(large), 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "body.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(stream_mb * 1024 * 1024 // len(PARAGRAPH.encode("utf-8"))):
+                f.write(PARAGRAPH)
+
+        tracemalloc.start()
+        with (
+            open(path, encoding="utf-8") as source,
+            open(os.devnull, "w", encoding="utf-8") as target,
+        ):
+            written = clean_stream(source, target)
+        _, stream_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        with open(path, encoding="utf-8") as source:
+            assert len(split_join(source.read())) == written
+        _, whole_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(
+        f"{stream_mb} MB file: whole-text peak {whole_peak / 2**20:.1f} MB, "
+        f"clean_stream peak {stream_peak / 2**20:.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark recipient deduplication against the current fan-out.
+
+Usage:
+    python -m benchmarks.bench_dedup [recipients] [duplicate_share] [naive_recipients]
+"""
+
+import random
+import sys
+
+from src.dedup import dedupe_recipients
+from src.email import Email
+from src.email_address import EmailAddress
+from src.service import EmailService
+from src.status import Status
+
+from .utils import timer
+
+
+def naive_dedupe(recipients: list[EmailAddress], sender: EmailAddress) -> list:
+    """Quadratic list-membership dedup used for comparison."""
+    unique: list[EmailAddress] = []
+    for recipient in recipients:
+        if recipient != sender and recipient not in unique:
+            unique.append(recipient)
+    return unique
+
+
+def make_recipients(count: int, duplicate_share: float) -> list[EmailAddress]:
+    """Build recipients where duplicate_share of entries repeat earlier ones."""
+    rng = random.Random(0)
+    unique = int(count * (1 - duplicate_share))
+    addresses = [EmailAddress(f"user{i}@example.com") for i in range(unique)]
+    addresses += [rng.choice(addresses) for _ in range(count - unique)]
+    rng.shuffle(addresses)
+    return addresses
+
+
+def main() -> None:
+    """Compare fan-out with and without deduplication."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    duplicate_share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    naive_count = int(sys.argv[3]) if len(sys.argv) > 3 else 10_000
+    sender = EmailAddress("user0@example.com")
+
+    recipients = make_recipients(count, duplicate_share)
+    email = Email(
+        subject="Newsletter",
+        body="Hello",
+        sender=sender,
+        recipients=recipients,
+        status=Status.READY,
+    )
+
+    with timer(f"dedupe_recipients, {count} recipients"):
+        result = dedupe_recipients(recipients, sender)
+    print(
+        f"  {len(result.recipients)} unique, {result.duplicates} duplicates, "
+        f"{result.excluded} self-send removed"
+    )
+
+    with timer("fan-out as before (duplicates sent)"):
+        before = len(EmailService(share_payload=True).send_email(email))
+    with timer("fan-out with dedupe=True"):
+        after = len(EmailService(share_payload=True, dedupe=True).send_email(email))
+    print(f"  copies: {before} -> {after}")
+
+    small = make_recipients(naive_count, duplicate_share)
+    with timer(f"naive list dedup, {naive_count} recipients"):
+        naive = naive_dedupe(small, sender)
+    with timer(f"dedupe_recipients, {naive_count} recipients"):
+        fast = dedupe_recipients(small, sender).recipients
+    assert naive == fast
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark transport calls saved by grouping recipients by domain.
+
+Recipients are spread over the personal mail domains used in hw_4.
+
+Usage:
+    python -m benchmarks.bench_domain_grouping [recipients] [latency_ms] [group_size ...]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from src.async_service import AsyncEmailService
+from src.email import Email
+from src.email_address import EmailAddress
+from src.status import Status
+from src.transport import FakeTransport
+
+PERSONAL_DOMAINS = [
+    "gmail.com",
+    "list.ru",
+    "yahoo.com",
+    "outlook.com",
+    "hotmail.com",
+    "icloud.com",
+    "yandex.ru",
+    "mail.ru",
+    "bk.ru",
+    "inbox.ru",
+]
+
+
+def main() -> None:
+    """Send one email ungrouped and with several group sizes."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5) / 1000
+    group_sizes = [int(arg) for arg in sys.argv[3:]] or [10, 100, 1000]
+    rng = random.Random(0)
+    email = Email(
+        subject="Newsletter",
+        body="Hello",
+        sender=EmailAddress("news@example.com"),
+        recipients=[
+            EmailAddress(f"user{i}@{rng.choice(PERSONAL_DOMAINS)}") for i in range(count)
+        ],
+        status=Status.READY,
+    )
+
+    print(
+        f"{count} recipients on {len(PERSONAL_DOMAINS)} domains, "
+        f"{latency * 1000:g} ms/call"
+    )
+    baseline = None
+    for group_size in [None, *group_sizes]:
+        transport = FakeTransport(latency=latency)
+        service = AsyncEmailService(transport, concurrency=100, max_group_size=group_size)
+        start = time.perf_counter()
+        sent_emails = asyncio.run(service.send_email(email))
+        elapsed = time.perf_counter() - start
+        assert all(e.status == Status.SENT for e in sent_emails)
+
+        baseline = baseline or transport.calls
+        label = "per recipient" if group_size is None else f"groups of {group_size}"
+        print(
+            f"{label:<16} {transport.calls:8} calls "
+            f"({1 - transport.calls / baseline:6.1%} saved), {elapsed:6.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark tracemalloc memory of 1M single-recipient Email objects.
+
+Compares the slotted Email dataclass with the same dataclass without slots.
+Message content and addresses are shared, as after a shared-payload fan-out,
+so the numbers show per-message overhead.
+
+Usage:
+    python -m benchmarks.bench_email_memory [messages]
+"""
+
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Optional
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.status import Status
+
+from .utils import timer
+
+
+@dataclass
+class DictEmail:
+    """Email layout without slots, kept as a baseline."""
+
+    subject: str
+    body: str
+    sender: EmailAddress
+    recipients: list[EmailAddress] = field(default_factory=list)
+    date: Optional[str] = None
+    short_body: Optional[str] = None
+    status: Status = Status.DRAFT
+
+
+def main() -> None:
+    """Measure both layouts."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sender = EmailAddress("alice@example.com")
+    recipient = EmailAddress("bob@example.com")
+
+    for cls in (DictEmail, Email):
+        name = cls.__name__
+        tracemalloc.start()
+        with timer(f"{name} construction, {count}"):
+            emails = [
+                cls(
+                    subject="Quarterly Report",
+                    body="Hello",
+                    sender=sender,
+                    recipients=[recipient],
+                    date="2026-10-18",
+                    short_body="Hello",
+                    status=Status.SENT,
+                )
+                for _ in range(count)
+            ]
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{name}: {current / count:6.1f} B/message, "
+            f"current {current / 2**20:7.1f} MB, peak {peak / 2**20:7.1f} MB"
+        )
+        del emails
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark EmailService fan-out: deep copy vs shared payload.
+
+The deep copy path copies the whole recipient list for every recipient,
+so its cost grows quadratically; keep the recipient count modest.
+
+Usage:
+    python -m benchmarks.bench_fanout [recipients]
+"""
+
+import sys
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.service import EmailService
+from src.status import Status
+
+from .utils import peak_rss_mb, run_isolated, timer
+
+
+def build_email(count: int, body_size: int = 10_000) -> Email:
+    """Build a ready email with `count` recipients and a large body."""
+    return Email(
+        subject="Quarterly Report",
+        body="x" * body_size,
+        sender=EmailAddress("alice@example.com"),
+        recipients=[EmailAddress(f"user{i}@example.com") for i in range(count)],
+        status=Status.READY,
+    )
+
+
+def run(mode: str, count: int) -> None:
+    """Fan out one email in the given mode and report time and peak RSS."""
+    email = build_email(count)
+    service = EmailService(share_payload=mode == "shared")
+    with timer(f"{mode} fan-out, {count} recipients"):
+        sent_emails = service.send_email(email)
+    print(f"{'':<40} peak RSS {peak_rss_mb():8.1f} MB ({len(sent_emails)} copies)")
+
+
+def main() -> None:
+    """Run each mode in its own interpreter."""
+    if len(sys.argv) > 2:
+        run(sys.argv[1], int(sys.argv[2]))
+        return
+
+    count = sys.argv[1] if len(sys.argv) > 1 else "1000"
+    for mode in ("deepcopy", "shared"):
+        run_isolated("benchmarks.bench_fanout", mode, count)
+
+
+if __name__ == "__main__":
+    main()
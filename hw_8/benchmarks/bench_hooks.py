@@ -0,0 +1,79 @@
+"""
+Benchmark the cost of stage hooks.
+
+Usage:
+    python -m benchmarks.bench_hooks [recipients] [calls]
+"""
+
+import sys
+import tempfile
+import time
+from typing import Callable, Optional
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.hooks import Hooks, ProfileHook, StageEvent
+from src.service import EmailService
+from src.status import Status
+
+
+class NoopHook:
+    """Hook doing nothing, to measure the dispatch cost alone."""
+
+    def before(self, event: StageEvent) -> None:
+        """Do nothing."""
+
+    def after(self, event: StageEvent) -> None:
+        """Do nothing."""
+
+
+def make_email(count: int) -> Email:
+    """Build a READY email with count recipients."""
+    return Email(
+        subject="Newsletter",
+        body="Hello",
+        sender=EmailAddress("sender@example.com"),
+        recipients=[EmailAddress(f"user{i}@example.com") for i in range(count)],
+        status=Status.READY,
+    )
+
+
+def best_of(run: Callable[[], None], repeat: int = 3) -> float:
+    """Get the best wall time of several runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    """Compare services without hooks, with an empty registry and with hooks."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    big = make_email(count)
+    small = make_email(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        variants: list[tuple[str, Optional[Hooks]]] = [
+            ("hooks=None", None),
+            ("empty Hooks()", Hooks()),
+            ("one no-op hook", Hooks()),
+            ("ProfileHook, sample_rate=0", Hooks()),
+        ]
+        variants[2][1].register(NoopHook())
+        variants[3][1].register(ProfileHook(directory, sample_rate=0.0))
+
+        for label, hooks in variants:
+            service = EmailService(share_payload=True, hooks=hooks)
+            fan_out = best_of(lambda: service.send_email(big))
+            per_call = best_of(lambda: [service.send_email(small) for _ in range(calls)])
+            print(
+                f"{label:<28} fan-out {count}: {fan_out * 1000:8.1f} ms   "
+                f"send_email x{calls}: {per_call * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark re-parsing a distribution list vs interning with EmailAddress.of.
+
+Usage:
+    python -m benchmarks.bench_intern [distinct] [repeats]
+"""
+
+import sys
+import tracemalloc
+
+from src.email_address import EmailAddress
+
+from .utils import timer
+
+
+def parse(raw: list[str], repeats: int, factory) -> list[list[EmailAddress]]:
+    """Parse the same raw list `repeats` times, keeping every result alive."""
+    return [[factory(address) for address in raw] for _ in range(repeats)]
+
+
+def main() -> None:
+    """Run benchmark for fresh objects and interned objects."""
+    distinct = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    raw = [f" User{i}@Example.COM " for i in range(distinct)]
+
+    factories = (("EmailAddress()", EmailAddress), ("EmailAddress.of()", EmailAddress.of))
+    for label, factory in factories:
+        tracemalloc.start()
+        with timer(f"{label}, {distinct} x {repeats}"):
+            lists = parse(raw, repeats, factory)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{'':<40} traced peak {peak / 1024 / 1024:8.1f} MB")
+        del lists
+
+    print(EmailAddress.intern_pool.info())
+
+
+if __name__ == "__main__":
+    main()
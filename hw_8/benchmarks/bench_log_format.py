@@ -0,0 +1,70 @@
+"""
+Benchmark reading the send log back in text, JSONL and binary formats.
+
+Usage:
+    python -m benchmarks.bench_log_format [records]
+"""
+
+import os
+import sys
+import tempfile
+
+from src.log_format import LogFormat, LogRecord, encode_record, iter_log_records
+from src.status import Status
+
+from .utils import timer
+
+
+def write_log(path: str, log_format: LogFormat, count: int) -> None:
+    """Write `count` synthetic records in the given format."""
+    if log_format == LogFormat.BINARY:
+        log = open(path, "wb")
+    else:
+        log = open(path, "w", encoding="utf-8")
+
+    with log as f:
+        for i in range(count):
+            record = LogRecord(
+                date="2026-10-18",
+                sender="alice@example.com",
+                recipient=f"user{i}@example.com",
+                subject="Quarterly Report, Q3",
+                status=Status.SENT if i % 10 else Status.FAILED,
+            )
+            f.write(encode_record(record, log_format))
+
+
+def split_text_log(path: str) -> int:
+    """Count failed sends by naive line splitting of the text log.
+
+    Subjects containing ", " are split into bogus fields, which is one of
+    the problems of the text format.
+    """
+    failed = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split(", ")
+            fields = dict(part.split(": ", 1) for part in parts if ": " in part)
+            failed += fields.get("Status") == Status.FAILED
+    return failed
+
+
+def main() -> None:
+    """Write and read back a log in every format."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "send.text")
+        write_log(text_path, LogFormat.TEXT, count)
+        with timer(f"text, naive line split, {count}"):
+            split_text_log(text_path)
+
+        for log_format in LogFormat:
+            path = os.path.join(directory, f"send.{log_format}")
+            write_log(path, log_format, count)
+            with timer(f"{log_format}, mmap reader, {count}"):
+                sum(r.status == Status.FAILED for r in iter_log_records(path, log_format))
+            print(f"{'':<40} size {os.path.getsize(path) / 1024 / 1024:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark LogIndex query latency and reopen time against a linear scan
+of the send log.
+
+The target scenario is a 10M-line log; the default size is smaller so
+the benchmark finishes quickly.
+
+Usage:
+    python -m benchmarks.bench_log_index [lines]
+"""
+
+import os
+import sys
+import tempfile
+
+from src.log_format import LogFormat, LogRecord, encode_record, iter_log_records
+from src.log_index import LogIndex
+from src.status import Status
+
+from .utils import timer
+
+DOMAINS = ("gmail.com", "mail.ru", "yandex.ru", "outlook.com", "company.ru")
+SENDERS = tuple(f"sender{i}@example.com" for i in range(50))
+
+
+def write_log(path: str, count: int) -> None:
+    """Write a text log with `count` records spread over 30 days."""
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        for i in range(count):
+            record = LogRecord(
+                date=f"2026-09-{i * 30 // count + 1:02d}",
+                sender=SENDERS[i % len(SENDERS)],
+                recipient=f"user{i}@{DOMAINS[i % len(DOMAINS)]}",
+                subject="Newsletter",
+                status=Status.FAILED if i % 97 == 0 else Status.SENT,
+            )
+            f.write(encode_record(record, LogFormat.TEXT))
+
+
+def main() -> None:
+    """Build and reopen the index and compare query latency with a full scan."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "send.log")
+        write_log(path, count)
+
+        with timer(f"build index, {count} lines"):
+            index = LogIndex(path)
+            index.refresh()
+
+        with timer("reopen index from sidecar"):
+            index = LogIndex(path)
+        with timer("full mmap scan of the log"):
+            for _ in iter_log_records(path):
+                pass
+        log_size = os.path.getsize(path)
+        sidecar_size = os.path.getsize(index.index_file)
+        print(
+            f"sidecar {sidecar_size / 2**20:.1f} MB, log {log_size / 2**20:.1f} MB "
+            f"({sidecar_size / log_size:.0%})"
+        )
+
+        with timer("linear scan: FAILED to gmail.com, week"):
+            scanned = [
+                r
+                for r in iter_log_records(path)
+                if r.status == Status.FAILED
+                and r.recipient.endswith("@gmail.com")
+                and "2026-09-08" <= r.date <= "2026-09-14"
+            ]
+        with timer("index:       FAILED to gmail.com, week"):
+            found = list(
+                index.query(
+                    status=Status.FAILED,
+                    domain="gmail.com",
+                    date_from="2026-09-08",
+                    date_to="2026-09-14",
+                )
+            )
+        assert found == scanned
+
+        with timer("linear scan: count by sender, one day"):
+            expected = sum(
+                r.sender == SENDERS[7] and r.date == "2026-09-15"
+                for r in iter_log_records(path)
+            )
+        with timer("index:       count by sender, one day"):
+            counted = index.count(sender=SENDERS[7], date="2026-09-15")
+        assert counted == expected
+
+
+if __name__ == "__main__":
+    main()
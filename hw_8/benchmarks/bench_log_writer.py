@@ -0,0 +1,68 @@
+"""
+Benchmark LoggingEmailService: open-per-call vs long-lived buffered writer.
+
+Every recipient is sent with its own send_email call, which is the worst
+case for the open-per-call path.
+
+Usage:
+    python -m benchmarks.bench_log_writer [recipients ...]
+"""
+
+import os
+import sys
+import tempfile
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.log_writer import BufferedLogWriter
+from src.service import LoggingEmailService
+from src.status import Status
+
+from .utils import timer
+
+
+def build_emails(count: int) -> list[Email]:
+    """Build `count` ready single-recipient emails."""
+    sender = EmailAddress("alice@example.com")
+    return [
+        Email(
+            subject="Quarterly Report",
+            body="Hello",
+            sender=sender,
+            recipients=EmailAddress(f"user{i}@example.com"),
+            status=Status.READY,
+        )
+        for i in range(count)
+    ]
+
+
+def run(count: int, directory: str) -> None:
+    """Send `count` emails through both logging modes."""
+    emails = build_emails(count)
+
+    service = LoggingEmailService(
+        os.path.join(directory, f"plain_{count}.log"), share_payload=True
+    )
+    with timer(f"open-per-call, {count} sends"):
+        for email in emails:
+            service.send_email(email)
+
+    writer = BufferedLogWriter(
+        os.path.join(directory, f"buffered_{count}.log"), buffer_size=1 << 16
+    )
+    with timer(f"buffered writer, {count} sends"):
+        with LoggingEmailService(share_payload=True, log_writer=writer) as service:
+            for email in emails:
+                service.send_email(email)
+
+
+def main() -> None:
+    """Run benchmark for each recipient count."""
+    counts = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            run(count, directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark the overhead of pipeline metrics.
+
+Usage:
+    python -m benchmarks.bench_metrics [recipients] [calls]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Optional
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.log_writer import BufferedLogWriter
+from src.metrics import Metrics
+from src.service import EmailService, LoggingEmailService
+from src.status import Status
+
+DOMAINS = ["gmail.com", "mail.ru", "yandex.ru", "outlook.com", "bk.ru"]
+
+
+def make_email(count: int) -> Email:
+    """Build a READY email with count recipients on a few domains."""
+    return Email(
+        subject="Newsletter",
+        body="Hello",
+        sender=EmailAddress("sender@example.com"),
+        recipients=[
+            EmailAddress(f"user{i}@{DOMAINS[i % len(DOMAINS)]}") for i in range(count)
+        ],
+        status=Status.READY,
+    )
+
+
+def best_of(run: Callable[[], None], repeat: int = 3) -> float:
+    """Get the best wall time of several runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(label: str, disabled: float, enabled: float) -> None:
+    """Print timings with metrics off and on and the relative overhead."""
+    overhead = (enabled / disabled - 1) * 100
+    print(
+        f"{label:<36} off {disabled * 1000:8.1f} ms   on {enabled * 1000:8.1f} ms"
+        f"   {overhead:+6.1f}%"
+    )
+
+
+def main() -> None:
+    """Compare services with and without metrics."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    big = make_email(count)
+    small = make_email(1)
+
+    def fan_out(metrics: Optional[Metrics]) -> float:
+        service = EmailService(share_payload=True, metrics=metrics)
+        return best_of(lambda: service.send_email(big))
+
+    report(f"fan-out, {count} recipients", fan_out(None), fan_out(Metrics()))
+
+    def per_call(metrics: Optional[Metrics]) -> float:
+        service = EmailService(share_payload=True, metrics=metrics)
+        return best_of(lambda: [service.send_email(small) for _ in range(calls)])
+
+    report(f"send_email x{calls}, 1 recipient", per_call(None), per_call(Metrics()))
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_file = os.path.join(directory, "send.log")
+
+        def logged(metrics: Optional[Metrics]) -> float:
+            with BufferedLogWriter(log_file) as writer:
+                service = LoggingEmailService(
+                    log_writer=writer, share_payload=True, metrics=metrics
+                )
+                return best_of(lambda: list(service.iter_send(big)))
+
+        report(f"logged iter_send, {count} recipients", logged(None), logged(Metrics()))
+
+    metrics = Metrics()
+    EmailService(share_payload=True, metrics=metrics).send_email(big)
+    start = time.perf_counter()
+    text = metrics.to_prometheus()
+    elapsed = time.perf_counter() - start
+    print(f"to_prometheus, {len(text.splitlines())} lines: {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
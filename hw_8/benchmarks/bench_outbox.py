@@ -0,0 +1,58 @@
+"""
+Benchmark Outbox enqueue and ack throughput for several group commit sizes.
+
+Usage:
+    python -m benchmarks.bench_outbox [units] [sync_every ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.outbox import Outbox
+from src.status import Status
+
+
+def main() -> None:
+    """Enqueue and acknowledge one email with several fsync group sizes."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    group_sizes = [int(arg) for arg in sys.argv[2:]] or [1, 10, 100, 1000, 10_000]
+    email = Email(
+        subject="Quarterly Report",
+        body="Hello team,\nHere is the quarterly report.",
+        sender=EmailAddress("alice@example.com"),
+        recipients=[EmailAddress(f"user{i}@example.com") for i in range(count)],
+        status=Status.READY,
+    )
+
+    print(f"{count} units")
+    with tempfile.TemporaryDirectory() as directory:
+        for sync_every in group_sizes:
+            path = os.path.join(directory, f"outbox-{sync_every}.bin")
+            with Outbox(path, sync_every=sync_every) as outbox:
+                start = time.perf_counter()
+                unit_ids = outbox.enqueue(email)
+                outbox.commit()
+                enqueue = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for unit_id in unit_ids:
+                    outbox.ack(unit_id, Status.SENT)
+                outbox.commit()
+                ack = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with Outbox(path) as reopened:
+                assert len(reopened) == 0
+            replay = time.perf_counter() - start
+            print(
+                f"sync_every={sync_every:<6} enqueue {count / enqueue:10,.0f} units/s, "
+                f"ack {count / ack:10,.0f} units/s, replay {replay:.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
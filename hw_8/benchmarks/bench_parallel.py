@@ -0,0 +1,60 @@
+"""
+Benchmark ParallelEmailService scaling across worker counts.
+
+Usage:
+    python -m benchmarks.bench_parallel [recipients] [workers ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.parallel import ParallelEmailService
+from src.service import LoggingEmailService
+from src.status import Status
+
+from .utils import timer
+
+
+def main() -> None:
+    """Send one large email serially and with 1, 2, 4, 8 and 16 workers."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4, 8, 16]
+    email = Email(
+        subject="Quarterly Report",
+        body="Hello",
+        sender=EmailAddress("alice@example.com"),
+        recipients=[EmailAddress(f"user{i}@example.com") for i in range(count)],
+        status=Status.READY,
+    )
+    print(f"CPU count: {os.cpu_count()}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        service = LoggingEmailService(
+            os.path.join(directory, "serial.log"), share_payload=True
+        )
+        with timer(f"serial, {count} recipients"):
+            service.send_email(email)
+
+        for workers in worker_counts:
+            with ParallelEmailService(
+                os.path.join(directory, f"parallel_{workers}.log"),
+                workers=workers,
+                chunk_size=max(count // (workers * 4), 1),
+            ) as service:
+                # Warm-up send starts the worker processes
+                service.send_email(email)
+                start = time.process_time()
+                with timer(f"{workers} workers, {count} recipients"):
+                    service.send_email(email)
+                parent = time.process_time() - start
+                print(
+                    f"{'  of it CPU time of this process':<40} {parent * 1000:10.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark repeated Email.prepare() against a full re-preparation.
+
+Usage:
+    python -m benchmarks.bench_prepare [emails] [body_kb] [repeats]
+"""
+
+import sys
+import time
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.status import Status
+
+PARAGRAPH = "Привет, команда!\n\tВо вложении отчёт,  please review.\n"
+
+
+def full_prepare(email: Email) -> None:
+    """Previous prepare(): clean, shorten and validate from scratch."""
+    email.clean_data()
+    email.add_short_body()
+    email.status = Status.READY if email.is_valid_fields() else Status.INVALID
+
+
+def run(label: str, emails: list[Email], prepare, repeats: int) -> list:
+    """Prepare every email once, then `repeats` more times, printing per-call cost."""
+    start = time.perf_counter()
+    for email in emails:
+        prepare(email)
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for email in emails:
+            prepare(email)
+    repeated = time.perf_counter() - start
+    print(
+        f"{label:<24} first {first / len(emails) * 1e6:8.2f} us/call, "
+        f"repeated {repeated / (len(emails) * repeats) * 1e6:8.2f} us/call"
+    )
+    return [(e.subject, e.body, e.short_body, e.status) for e in emails]
+
+
+def main() -> None:
+    """Prepare the same emails several times with both strategies."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    body_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    body = PARAGRAPH * (body_kb * 1024 // len(PARAGRAPH.encode("utf-8")))
+
+    def make_emails() -> list[Email]:
+        return [
+            Email(
+                subject=f"Report\n{i}",
+                body=body,
+                sender=EmailAddress("alice@example.com"),
+                recipients=[EmailAddress(f"user{i}@example.com")],
+            )
+            for i in range(count)
+        ]
+
+    print(f"{count} emails, {body_kb} KB bodies, prepare() x{repeats}")
+    before = run("full re-preparation", make_emails(), full_prepare, repeats)
+    after = run("incremental prepare()", make_emails(), Email.prepare, repeats)
+    assert before == after
+
+
+if __name__ == "__main__":
+    main()
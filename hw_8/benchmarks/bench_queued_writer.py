@@ -0,0 +1,80 @@
+"""
+Benchmark send_email latency with a slow disk: buffered vs queued log writer.
+
+The disk is simulated by delaying every writelines call of the log file.
+
+Usage:
+    python -m benchmarks.bench_queued_writer [sends] [delay_ms]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.log_writer import BufferedLogWriter, QueuedLogWriter
+from src.service import LoggingEmailService
+from src.status import Status
+
+
+class SlowFile:
+    """File wrapper that sleeps before every batched write."""
+
+    def __init__(self, file, delay: float):
+        self._file = file
+        self._delay = delay
+
+    def writelines(self, lines) -> None:
+        time.sleep(self._delay)
+        self._file.writelines(lines)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def measure(service: LoggingEmailService, email: Email, sends: int) -> list[float]:
+    """Return per-call send_email latencies in milliseconds."""
+    latencies = []
+    for _ in range(sends):
+        start = time.perf_counter()
+        service.send_email(email)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list[float]) -> None:
+    """Print p50 and p99 latency."""
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{label:<24} p50 {quantiles[49]:8.3f} ms   p99 {quantiles[98]:8.3f} ms")
+
+
+def main() -> None:
+    """Run both writers with the same simulated disk delay."""
+    sends = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 5) / 1000
+    email = Email(
+        subject="Quarterly Report",
+        body="Hello",
+        sender=EmailAddress("alice@example.com"),
+        recipients=[EmailAddress(f"user{i}@example.com") for i in range(10)],
+        status=Status.READY,
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        writers = {
+            "buffered (flush 100)": BufferedLogWriter(
+                os.path.join(directory, "buffered.log"), flush_every=100
+            ),
+            "queued (block)": QueuedLogWriter(os.path.join(directory, "queued.log")),
+        }
+        for label, writer in writers.items():
+            writer._file = SlowFile(writer._file, delay)
+            with LoggingEmailService(share_payload=True, log_writer=writer) as service:
+                report(label, measure(service, email, sends))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark RetryQueue with many pending retries on a fake clock.
+
+Usage:
+    python -m benchmarks.bench_retry [failed_copies] [failure_rate]
+"""
+
+import random
+import sys
+import time
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.retry import RetryPolicy, RetryQueue
+from src.service import EmailService
+from src.status import Status
+
+from .utils import peak_rss_mb, timer
+
+
+class FlakyService(EmailService):
+    """Service failing every copy with a fixed probability."""
+
+    def __init__(self, failure_rate: float):
+        super().__init__(share_payload=True)
+        self.failure_rate = failure_rate
+        self._random = random.Random(0)
+
+    def send_email(self, email: Email) -> list[Email]:
+        sent_emails = super().send_email(email)
+        for sent_email in sent_emails:
+            if self._random.random() < self.failure_rate:
+                sent_email.status = Status.FAILED
+        return sent_emails
+
+
+def main() -> None:
+    """Queue failed copies and drain the retries without sleeping."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    failure_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    email = Email(
+        subject="Newsletter",
+        body="Hello",
+        sender=EmailAddress("news@example.com"),
+        recipients=[EmailAddress(f"user{i}@example.com") for i in range(count)],
+        status=Status.READY,
+    )
+    now = [0.0]
+
+    def sleep(seconds: float) -> None:
+        now[0] += seconds
+
+    service = FlakyService(failure_rate)
+    queue = RetryQueue(service, RetryPolicy(), clock=lambda: now[0], seed=0)
+    sent_emails = service.send_email(email)
+
+    with timer(
+        f"queue {sum(e.status == Status.FAILED for e in sent_emails)} failed copies"
+    ):
+        queue.add(email, sent_emails)
+    print(f"{'peak RSS with retries pending':<40} {peak_rss_mb():10.1f} MB")
+
+    start = time.perf_counter()
+    queue.run(sleep)
+    elapsed = time.perf_counter() - start
+    stats = queue.stats()
+    print(f"{'drain retries':<40} {elapsed * 1000:10.1f} ms")
+    print(
+        f"{stats.retried} resends ({stats.retried / elapsed:,.0f}/s), "
+        f"{stats.recovered} recovered, {stats.dead} dead-lettered, "
+        f"{now[0]:.0f}s simulated"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark SendScheduler pacing with a fake clock.
+
+The schedule runs without sleeping: the sleep function only advances the
+clock, so the reported simulated time is deterministic.
+
+Usage:
+    python -m benchmarks.bench_scheduler [bulk_recipients] [rate] [domain_rate]
+"""
+
+import random
+import sys
+import time
+
+from src.email import Email
+from src.email_address import EmailAddress
+from src.scheduler import Priority, SendScheduler
+from src.service import EmailService
+from src.status import Status
+
+DOMAINS = ["gmail.com", "mail.ru", "yandex.ru", "outlook.com", "bk.ru"]
+
+
+def main() -> None:
+    """Pace a bulk campaign with interleaved transactional mail."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    domain_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 300
+    rng = random.Random(0)
+    now = [0.0]
+
+    def sleep(seconds: float) -> None:
+        now[0] += seconds
+
+    def make_email(subject: str, size: int) -> Email:
+        return Email(
+            subject=subject,
+            body="Hello",
+            sender=EmailAddress("news@example.com"),
+            recipients=[
+                EmailAddress(f"user{i}@{rng.choice(DOMAINS)}") for i in range(size)
+            ],
+            status=Status.READY,
+        )
+
+    scheduler = SendScheduler(
+        EmailService(share_payload=True),
+        rate=rate,
+        default_domain_rate=domain_rate,
+        clock=lambda: now[0],
+    )
+    scheduler.submit(make_email("Campaign", count))
+    for _ in range(100):
+        scheduler.submit(make_email("Password reset", 1), Priority.TRANSACTIONAL)
+
+    start = time.perf_counter()
+    sent_emails = scheduler.run(sleep)
+    elapsed = time.perf_counter() - start
+
+    stats = scheduler.stats()
+    print(f"dispatched       {stats.dispatched}")
+    print(
+        f"simulated time   {now[0]:.2f}s ({len(sent_emails) / now[0]:,.0f} units/s paced)"
+    )
+    print(f"mean / max wait  {stats.mean_wait:.2f}s / {stats.max_wait:.2f}s")
+    print(f"scheduler cost   {elapsed:.3f}s ({len(sent_emails) / elapsed:,.0f} units/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark SMTPTransport against connect-per-message delivery.
+
+Both run against the in-process SMTP server from the test suite.
+
+Usage:
+    python -m benchmarks.bench_smtp_transport [recipients] [concurrency]
+"""
+
+import asyncio
+import sys
+import time
+
+from src.async_service import AsyncEmailService
+from src.email import Email
+from src.email_address import EmailAddress
+from src.smtp_transport import SMTPConnection, SMTPTransport, build_message
+from src.status import Status
+from src.transport import DeliveryError
+from tests.smtp_server import LocalSMTPServer
+
+
+class ConnectPerMessageTransport:
+    """Naive transport opening one SMTP connection per copy."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+
+    async def deliver(self, email: Email) -> None:
+        connection = await SMTPConnection.open(self.host, self.port)
+        try:
+            recipient = email.recipients[0].address
+            (error,) = await connection.send(
+                email.sender.address, [recipient], build_message(email, 1)
+            )
+        finally:
+            await connection.quit()
+        if error:
+            raise DeliveryError(error)
+
+
+async def run(count: int, concurrency: int) -> None:
+    """Send one email through both transports and report messages/sec."""
+    email = Email(
+        subject="Quarterly Report",
+        body="Hello team,\nHere is the quarterly report.",
+        sender=EmailAddress("alice@example.com"),
+        recipients=[EmailAddress(f"user{i}@example.com") for i in range(count)],
+        status=Status.READY,
+    )
+
+    async with LocalSMTPServer() as server:
+        transports = {
+            "connect-per-message": ConnectPerMessageTransport(server.host, server.port),
+            "pooled + batched RCPT": SMTPTransport(server.host, server.port),
+        }
+        for label, transport in transports.items():
+            connections = server.connections
+            service = AsyncEmailService(transport, concurrency=concurrency)
+            start = time.perf_counter()
+            sent_emails = await service.send_email(email)
+            elapsed = time.perf_counter() - start
+            assert all(e.status == Status.SENT for e in sent_emails)
+            print(
+                f"{label:<24} {count / elapsed:10.0f} msg/s, "
+                f"{server.connections - connections} connections"
+            )
+            if isinstance(transport, SMTPTransport):
+                await transport.close()
+
+
+def main() -> None:
+    """Run benchmark."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(run(count, concurrency))
+
+
+if __name__ == "__main__":
+    main()
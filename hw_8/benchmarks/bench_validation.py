@@ -0,0 +1,79 @@
+"""
+Benchmark email validation over the test_emails corpus scaled to 1M entries.
+
+Compares the previous split/endswith/loop check with the compiled
+EmailValidator, both as get_correct_email and as EmailAddress construction,
+and per-item construction with the bulk validate_many/parse_many API.
+
+Usage:
+    python -m benchmarks.bench_validation [entries]
+"""
+
+import sys
+
+from main import get_correct_email, test_emails
+from src.email_address import EmailAddress
+
+from .utils import timer
+
+VALID_DOMAINS = (".com", ".ru", ".net")
+
+
+def legacy_get_correct_email(email_list: list[str]) -> list[str]:
+    """Previous get_correct_email implementation, kept as a baseline."""
+    correct_emails = []
+    for email in email_list:
+        cleaned_email = email.strip().lower()
+        if not cleaned_email or "@" not in cleaned_email:
+            continue
+        parts = cleaned_email.split("@")
+        if len(parts) != 2:
+            continue
+        login, domain = parts
+        if not login or not domain.endswith(VALID_DOMAINS):
+            continue
+        for zone in VALID_DOMAINS:
+            if domain.endswith(zone):
+                if domain[: -len(zone)]:
+                    correct_emails.append(cleaned_email)
+                break
+    return correct_emails
+
+
+def construct_all(email_list: list[str]) -> int:
+    """Construct EmailAddress for every entry and count valid ones."""
+    valid = 0
+    for email in email_list:
+        try:
+            EmailAddress(email)
+        except ValueError:
+            continue
+        valid += 1
+    return valid
+
+
+def main() -> None:
+    """Run validation benchmark."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    corpus = (test_emails * (count // len(test_emails) + 1))[:count]
+
+    with timer(f"legacy get_correct_email, {count}"):
+        expected = legacy_get_correct_email(corpus)
+    with timer(f"compiled get_correct_email, {count}"):
+        result = get_correct_email(corpus)
+    assert result == expected
+
+    with timer(f"EmailAddress construction, {count}"):
+        assert construct_all(corpus) == len(expected)
+
+    with timer(f"EmailAddress.validate_many, {count}"):
+        mask, _ = EmailAddress.validate_many(corpus)
+    assert sum(mask) == len(expected)
+
+    with timer(f"EmailAddress.parse_many, {count}"):
+        parsed = EmailAddress.parse_many(corpus)
+    assert sum(address is not None for address in parsed) == len(expected)
+
+
+if __name__ == "__main__":
+    main()
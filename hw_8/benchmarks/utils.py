@@ -0,0 +1,44 @@
+import resource
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def timer(label: str) -> Iterator[None]:
+    """
+    Print elapsed wall time of the wrapped block.
+
+    Args:
+        label: Name printed before the timing
+    """
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:10.1f} ms")
+
+
+def peak_rss_mb() -> float:
+    """
+    Get peak resident set size of the current process.
+
+    Returns:
+        Peak RSS in megabytes
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return usage / (1024 * 1024)
+    return usage / 1024
+
+
+def run_isolated(module: str, *args: str) -> None:
+    """
+    Run a benchmark module in a fresh interpreter so peak RSS is not shared.
+
+    Args:
+        module: Module name, e.g. "benchmarks.bench_fanout"
+        args: Extra command line arguments
+    """
+    subprocess.run([sys.executable, "-m", module, *args], check=True)
@@ -1,5 +1,7 @@
 from datetime import date
 
+from src.validation import EmailValidator
+
 
 
 # Часть А. Функции
@@ -103,46 +105,24 @@ test_emails = [
     "   ",
 ]
 
+# Валидатор собирается один раз из списка доменных зон
+email_validator = EmailValidator(('.com', '.ru', '.net'))
+
+
 def get_correct_email(email_list: list[str]) -> list[str]:
     """
     Возвращает список корректных email.
     """
     correct_emails = []
-    valid_domains = ('.com', '.ru', '.net')
 
     for email in email_list:
         # Очищаем от пробелов и приводим к нижнему регистру
         cleaned_email = email.strip().lower()
 
-        # Базовые проверки
-        if not cleaned_email or '@' not in cleaned_email:
-            continue
-
-        # Разделяем на логин и домен
-        parts = cleaned_email.split('@')
-
-        # Должен быть ровно один символ @
-        if len(parts) != 2:
-            continue
-
-        login, domain = parts
-
-        # Логин не должен быть пустым
-        if not login:
-            continue
-
-        # Домен должен заканчиваться на валидные зоны
-        if not domain.endswith(valid_domains):
-            continue
-
-        # Проверяем, что между @ и доменной зоной есть символы
-        # Убираем доменную зону и проверяем остаток
-        for zone in valid_domains:
-            if domain.endswith(zone):
-                domain_without_zone = domain[:-len(zone)]
-                if domain_without_zone:  # Должно быть что-то перед .com/.ru/.net
-                    correct_emails.append(cleaned_email)
-                break
+        # Один проход скомпилированного шаблона: ровно один @, непустой логин,
+        # домен оканчивается на валидную зону и перед зоной есть символы
+        if email_validator.is_valid(cleaned_email):
+            correct_emails.append(cleaned_email)
 
     return correct_emails
 
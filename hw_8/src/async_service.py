@@ -0,0 +1,136 @@
+import asyncio
+from typing import Optional
+
+from .email import Email
+from .grouping import group_by_domain
+from .service import EmailService
+from .status import Status
+from .transport import DeliveryError, Transport
+
+
+class AsyncEmailService:
+    """Asyncio email service delivering per-recipient copies through a transport."""
+
+    def __init__(
+        self,
+        transport: Transport,
+        concurrency: int = 100,
+        timeout: Optional[float] = 30.0,
+        max_group_size: Optional[int] = None,
+    ):
+        """
+        Initialize async email service.
+
+        Args:
+            transport: Delivery backend
+            concurrency: Maximum number of deliveries in flight
+            timeout: Per-delivery-call timeout in seconds (None to disable)
+            max_group_size: If set, copies are grouped by recipient domain
+                and every group of up to max_group_size copies is passed to
+                the transport's deliver_batch in one call
+
+        Raises:
+            ValueError: If grouping is enabled for a transport without deliver_batch
+        """
+        if max_group_size is not None and not hasattr(transport, "deliver_batch"):
+            raise ValueError(
+                f"{type(transport).__name__} does not support grouped delivery"
+            )
+        self.transport = transport
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_group_size = max_group_size
+
+    async def send_email(self, email: Email) -> list[Email]:
+        """
+        Deliver email to all recipients concurrently.
+
+        Copies share one frozen payload. Every copy gets Status.SENT if the
+        transport accepted it and Status.FAILED if delivery raised or timed
+        out. Emails that are not READY are not delivered and all copies are
+        FAILED. With max_group_size set, one transport call is made per
+        domain group instead of per recipient. Original email is not modified.
+
+        Args:
+            email: Email to send
+
+        Returns:
+            List of sent emails (one per recipient, in recipient order)
+
+        Raises:
+            Exception: Any unexpected transport error, after the deliveries
+                still in flight are cancelled
+        """
+        payload = email.payload()
+        send_date = EmailService.add_send_date()
+        sent_emails = [
+            Email.from_payload(payload, recipient, send_date, Status.FAILED)
+            for recipient in email.recipients
+        ]
+        if email.status != Status.READY or not sent_emails:
+            return sent_emails
+
+        if self.max_group_size is None:
+            units, worker = sent_emails, self._worker
+        else:
+            units = group_by_domain(sent_emails, self.max_group_size)
+            worker = self._group_worker
+
+        pending = iter(units)
+        workers = min(self.concurrency, len(units))
+        tasks = [asyncio.ensure_future(worker(pending)) for _ in range(workers)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Do not leave the other workers delivering after send_email failed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return sent_emails
+
+    async def _worker(self, pending) -> None:
+        """Deliver copies from a shared iterator one at a time."""
+        for email_copy in pending:
+            email_copy.status = await self._deliver(email_copy)
+
+    async def _group_worker(self, pending) -> None:
+        """Deliver domain groups from a shared iterator one at a time."""
+        for group in pending:
+            for email_copy, status in zip(group, await self._deliver_group(group)):
+                email_copy.status = status
+
+    async def _deliver_group(self, group: list[Email]) -> list[Status]:
+        """
+        Deliver a domain group in one transport call.
+
+        Args:
+            group: Single-recipient copies on one recipient domain
+
+        Returns:
+            Per-copy status; all FAILED if the call raised or timed out
+        """
+        try:
+            results = await asyncio.wait_for(
+                self.transport.deliver_batch(group), self.timeout
+            )
+        except (DeliveryError, OSError, asyncio.TimeoutError):
+            return [Status.FAILED] * len(group)
+        return [Status.SENT if delivered else Status.FAILED for delivered in results]
+
+    async def _deliver(self, email_copy: Email) -> Status:
+        """
+        Deliver one copy and map the outcome to a status.
+
+        Args:
+            email_copy: Single-recipient email
+
+        Returns:
+            Status.SENT on success, Status.FAILED on delivery error,
+            connection error or timeout
+        """
+        try:
+            await asyncio.wait_for(self.transport.deliver(email_copy), self.timeout)
+        except (DeliveryError, OSError, asyncio.TimeoutError):
+            return Status.FAILED
+        return Status.SENT
@@ -0,0 +1,148 @@
+from typing import Iterable, Optional
+
+from .email import Email
+from .email_address import EmailAddress
+from .status import Status
+from .utils import clean_text
+
+
+class EmailBatch:
+    """Columnar batch of emails with column-wise preparation."""
+
+    def __init__(
+        self,
+        subjects: list[str],
+        bodies: list[str],
+        senders: list[EmailAddress],
+        recipients: list[list[EmailAddress]],
+    ):
+        """
+        Initialize batch from parallel columns.
+
+        Args:
+            subjects: Subject of every row
+            bodies: Body of every row
+            senders: Sender of every row
+            recipients: Recipient list of every row
+
+        Raises:
+            ValueError: If columns have different lengths
+        """
+        if not len(subjects) == len(bodies) == len(senders) == len(recipients):
+            raise ValueError("All columns of EmailBatch must have the same length")
+        self.subjects = subjects
+        self.bodies = bodies
+        self.senders = senders
+        self.recipients = recipients
+        self.dates: list[Optional[str]] = [None] * len(subjects)
+        self.short_bodies: list[Optional[str]] = [None] * len(subjects)
+        self.statuses: list[Status] = [Status.DRAFT] * len(subjects)
+
+    @classmethod
+    def from_emails(cls, emails: Iterable[Email]) -> "EmailBatch":
+        """
+        Create batch from Email objects.
+
+        Args:
+            emails: Emails to store as rows
+
+        Returns:
+            New batch; dates, short bodies and statuses are copied from the emails
+        """
+        emails = list(emails)
+        batch = cls(
+            [email.subject for email in emails],
+            [email.body for email in emails],
+            [email.sender for email in emails],
+            [list(email.recipients) for email in emails],
+        )
+        batch.dates = [email.date for email in emails]
+        batch.short_bodies = [email.short_body for email in emails]
+        batch.statuses = [email.status for email in emails]
+        return batch
+
+    def __len__(self) -> int:
+        """Number of rows in the batch."""
+        return len(self.subjects)
+
+    def __getitem__(self, index: int) -> Email:
+        """
+        Build Email for one row.
+
+        Args:
+            index: Row index
+
+        Returns:
+            Email with the row's values
+        """
+        return Email(
+            subject=self.subjects[index],
+            body=self.bodies[index],
+            sender=self.senders[index],
+            recipients=list(self.recipients[index]),
+            date=self.dates[index],
+            short_body=self.short_bodies[index],
+            status=self.statuses[index],
+        )
+
+    def to_emails(self) -> list[Email]:
+        """
+        Build Email objects for all rows.
+
+        Returns:
+            List of emails in row order
+        """
+        return [self[index] for index in range(len(self))]
+
+    def clean_data(self) -> "EmailBatch":
+        """
+        Clean subject and body columns, same as clean_text for every row.
+
+        Returns:
+            Self for method chaining
+        """
+        self.subjects = list(map(clean_text, self.subjects))
+        self.bodies = list(map(clean_text, self.bodies))
+        return self
+
+    def add_short_body(self, n: int = 10) -> "EmailBatch":
+        """
+        Fill short body column (first n characters + '...' for longer bodies).
+
+        Args:
+            n: Number of characters to include
+
+        Returns:
+            Self for method chaining
+        """
+        self.short_bodies = [
+            body[:n] + "..." if len(body) > n else body for body in self.bodies
+        ]
+        return self
+
+    def valid_mask(self) -> list[bool]:
+        """
+        Check required fields of every row.
+
+        Returns:
+            True for rows whose subject, body, sender and recipients are non-empty
+        """
+        return [
+            bool(subject.strip() and body.strip() and sender and recipients)
+            for subject, body, sender, recipients in zip(
+                self.subjects, self.bodies, self.senders, self.recipients
+            )
+        ]
+
+    def prepare(self) -> "EmailBatch":
+        """
+        Prepare all rows: clean data, add short body, set READY or INVALID status.
+
+        Returns:
+            Self for method chaining
+        """
+        self.clean_data()
+        self.add_short_body()
+        ready, invalid = Status.READY, Status.INVALID
+        self.statuses = [ready if valid else invalid for valid in self.valid_mask()]
+        return self
@@ -0,0 +1,42 @@
+from operator import attrgetter
+from typing import Iterable, NamedTuple, Optional
+
+from .email_address import EmailAddress
+
+_address = attrgetter("address")
+
+
+class DedupResult(NamedTuple):
+    """Unique recipients and the number of entries dropped."""
+
+    recipients: list[EmailAddress]
+    duplicates: int
+    excluded: int
+
+
+def dedupe_recipients(
+    recipients: Iterable[EmailAddress], sender: Optional[EmailAddress] = None
+) -> DedupResult:
+    """
+    Drop repeated recipients and the sender in one O(n) pass.
+
+    Addresses are compared by their normalized form, so two spellings of one
+    address count as duplicates. The first occurrence keeps its position.
+
+    Args:
+        recipients: Recipient addresses
+        sender: Address to exclude from the recipients (no self-sends)
+
+    Returns:
+        Unique recipients in original order, the number of repeated entries
+        dropped and 1 if the sender was excluded (0 otherwise)
+    """
+    recipients = list(recipients)
+    unique = dict(zip(map(_address, recipients), recipients))
+    duplicates = len(recipients) - len(unique)
+    excluded = 0
+    if sender is not None and unique.pop(sender.address, None) is not None:
+        excluded = 1
+    if not duplicates and not excluded:
+        return DedupResult(recipients, 0, 0)
+    return DedupResult(list(unique.values()), duplicates, excluded)
@@ -1,14 +1,32 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Optional
 
+from .dedup import DedupResult, dedupe_recipients
 from .email_address import EmailAddress
 from .status import Status
 from .utils import clean_text
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class MessagePayload:
+    """Immutable message content shared between per-recipient copies."""
+
+    subject: str
+    body: str
+    short_body: Optional[str]
+    sender: EmailAddress
+
+
+@dataclass(slots=True)
 class Email:
-    """Email message with validation and preparation capabilities."""
+    """
+    Email message with validation and preparation capabilities.
+
+    Slotted to keep per-message overhead low when millions of per-recipient
+    copies are alive after fan-out. Results of prepare() and, for several
+    recipients, get_recipients_str() are cached in one private slot and
+    reused while the fields they were derived from are unchanged.
+    """
 
     subject: str
     body: str
@@ -17,22 +35,99 @@ class Email:
     date: Optional[str] = None
     short_body: Optional[str] = None
     status: Status = Status.DRAFT
+    _cache: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         """Ensure recipients is always a list."""
+        if type(self.recipients) is list:
+            return
         if isinstance(self.recipients, EmailAddress):
             self.recipients = [self.recipients]
         elif not isinstance(self.recipients, list):
             self.recipients = list(self.recipients)
 
+    @classmethod
+    def from_payload(
+        cls,
+        payload: MessagePayload,
+        recipient: EmailAddress,
+        date: Optional[str] = None,
+        status: Status = Status.DRAFT,
+    ) -> "Email":
+        """
+        Create a single-recipient email that references shared payload content.
+
+        Args:
+            payload: Shared message content
+            recipient: The only recipient of the new email
+            date: Send date
+            status: Email status
+
+        Returns:
+            New email holding its own recipient list, date and status
+        """
+        # Positional in field order: called once per copy in every fan-out
+        return cls(
+            payload.subject,
+            payload.body,
+            payload.sender,
+            [recipient],
+            date,
+            payload.short_body,
+            status,
+        )
+
+    def payload(self) -> MessagePayload:
+        """
+        Get frozen snapshot of the message content.
+
+        Returns:
+            MessagePayload with subject, body, short body and sender
+        """
+        return MessagePayload(
+            subject=self.subject,
+            body=self.body,
+            short_body=self.short_body,
+            sender=self.sender,
+        )
+
     def get_recipients_str(self) -> str:
         """
         Get comma-separated string of recipient addresses.
 
         Returns:
-            Comma-separated recipient addresses
+            Comma-separated recipient addresses; for several recipients
+            cached until the recipient list changes
+        """
+        if len(self.recipients) <= 1:
+            # Per-recipient copies: nothing to join, and a cache would cost
+            # more memory than the slotted copy itself
+            return self.recipients[0].address if self.recipients else ""
+        recipients = tuple(self.recipients)
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = {}
+        elif cache.get("recipients") == recipients:
+            return cache["recipients_str"]
+        recipients_str = ", ".join(recipient.address for recipient in recipients)
+        cache["recipients"] = recipients
+        cache["recipients_str"] = recipients_str
+        return recipients_str
+
+    def dedupe_recipients(self, exclude_sender: bool = True) -> DedupResult:
+        """
+        Drop repeated recipients and, optionally, the sender in place.
+
+        Args:
+            exclude_sender: If True, the sender is removed from recipients
+
+        Returns:
+            Unique recipients with the numbers of dropped entries
         """
-        return ", ".join(recipient.address for recipient in self.recipients)
+        sender = self.sender if exclude_sender else None
+        result = dedupe_recipients(self.recipients, sender)
+        self.recipients = result.recipients
+        return result
 
     def clean_data(self) -> "Email":
         """
@@ -79,19 +174,51 @@ class Email:
         """
         Prepare email for sending: clean data, validate, set status.
 
+        Repeated calls only redo the work for fields changed since the last
+        call: a subject or body that is still the cleaned string from the
+        previous call is not cleaned again, and the short body is rebuilt
+        only when the body or the short body itself changed. The resulting
+        fields and status are the same as for a full preparation.
+
         Returns:
             Self for method chaining
         """
-        self.clean_data()
-        self.add_short_body()
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = {}
+        subject, body, short_body, subject_ok, body_ok = cache.get(
+            "prepared", (None, None, None, False, False)
+        )
 
-        if self.is_valid_fields():
+        if self.subject is not subject:
+            self.subject = clean_text(self.subject)
+            subject_ok = bool(self.subject)
+        if self.body is not body:
+            self.body = clean_text(self.body)
+            body_ok = bool(self.body)
+            self.add_short_body()
+        elif self.short_body is not short_body:
+            self.add_short_body()
+
+        if subject_ok and body_ok and self.sender and self.recipients:
             self.status = Status.READY
         else:
             self.status = Status.INVALID
 
+        prepared = (self.subject, self.body, self.short_body, subject_ok, body_ok)
+        cache["prepared"] = prepared
         return self
 
+    def __getstate__(self) -> tuple:
+        """Get field values for copy and pickle, leaving out cached results."""
+        return tuple(getattr(self, name) for name in _STATE_FIELDS)
+
+    def __setstate__(self, state: tuple) -> None:
+        """Restore field values from __getstate__ with an empty cache."""
+        for name, value in zip(_STATE_FIELDS, state):
+            setattr(self, name, value)
+        self._cache = None
+
     def __str__(self) -> str:
         """
         String representation using masked sender and recipient list.
@@ -105,3 +232,6 @@ class Email:
             f"to=[{self.get_recipients_str()}], "
             f"status={self.status})"
         )
+
+
+_STATE_FIELDS = tuple(f.name for f in fields(Email) if f.name != "_cache")
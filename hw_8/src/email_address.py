@@ -1,7 +1,23 @@
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, ClassVar, Iterable, NamedTuple, Optional, Union
+
+from .validation import get_validator
+
+
 class EmailAddress:
-    """Email address with validation and masking capabilities."""
+    """
+    Immutable email address with validation and masking capabilities.
+
+    The hash is cached by the address string itself; login, domain and
+    masked form are computed on first access and cached.
+    """
+
+    __slots__ = ("_address", "_parts")
 
     VALID_DOMAINS = (".com", ".ru", ".net")
+    intern_pool: ClassVar["AddressPool"]
 
     def __init__(self, address: str):
         """
@@ -13,10 +29,84 @@ class EmailAddress:
         Raises:
             ValueError: If email address is invalid
         """
-        self._address = self.normalize_address(address)
+        self._init(self.normalize_address(address))
         if not self._check_correct_email():
             raise ValueError(f"Invalid email address: {address}")
 
+    def _init(self, address: str) -> None:
+        """Set normalized address and reset cached parts."""
+        _set_address(self, address)
+        _set_parts(self, None)
+
+    @classmethod
+    def of(cls, address: str) -> "EmailAddress":
+        """
+        Get shared interned instance for an address from the intern pool.
+
+        Args:
+            address: Email address string
+
+        Returns:
+            Shared EmailAddress; equal addresses return the same object
+            while it stays in the pool
+
+        Raises:
+            ValueError: If email address is invalid
+        """
+        return cls.intern_pool.get(address)
+
+    @classmethod
+    def from_normalized(cls, address: str) -> "EmailAddress":
+        """
+        Create EmailAddress from an already normalized and validated address.
+
+        Args:
+            address: Address returned as valid by validate_many
+
+        Returns:
+            EmailAddress without repeating normalization and validation
+        """
+        email_address = cls.__new__(cls)
+        email_address._init(address)
+        return email_address
+
+    @classmethod
+    def validate_many(
+        cls, addresses: Iterable[str], as_array: bool = False
+    ) -> tuple[Union[list[bool], array], list[str]]:
+        """
+        Normalize and validate a batch of addresses in one pass without raising.
+
+        Args:
+            addresses: Raw addresses
+            as_array: If True, return the mask as array("B") of 0/1 values,
+                which can be wrapped without copying, e.g. by numpy.frombuffer
+
+        Returns:
+            Tuple of (validity mask, normalized addresses) aligned with input rows
+        """
+        mask, normalized = get_validator(cls.VALID_DOMAINS).validate_many(addresses)
+        if as_array:
+            return array("B", mask), normalized
+        return mask, normalized
+
+    @classmethod
+    def parse_many(cls, addresses: Iterable[str]) -> list[Optional["EmailAddress"]]:
+        """
+        Create EmailAddress objects for valid rows of a batch.
+
+        Args:
+            addresses: Raw addresses
+
+        Returns:
+            List aligned with input rows: EmailAddress for valid rows, None otherwise
+        """
+        mask, normalized = cls.validate_many(addresses)
+        return [
+            cls.from_normalized(address) if valid else None
+            for valid, address in zip(mask, normalized)
+        ]
+
     @staticmethod
     def normalize_address(address: str) -> str:
         """
@@ -37,33 +127,32 @@ class EmailAddress:
         Returns:
             True if email is valid, False otherwise
         """
-        if not self._address or "@" not in self._address:
-            return False
-
-        parts = self._address.split("@")
-        if len(parts) != 2:
-            return False
-
-        login, domain = parts
-        if not login or not domain:
-            return False
-
-        if not domain.endswith(self.VALID_DOMAINS):
-            return False
-
-        for valid_domain in self.VALID_DOMAINS:
-            if domain.endswith(valid_domain):
-                domain_without_zone = domain[: -len(valid_domain)]
-                if domain_without_zone:
-                    return True
-
-        return False
+        return get_validator(self.VALID_DOMAINS).is_valid(self._address)
 
     @property
     def address(self) -> str:
         """Get normalized email address."""
         return self._address
 
+    def _get_parts(self) -> tuple[str, str, str]:
+        """Get cached (login, domain, masked), computing them on first access."""
+        parts = self._parts
+        if parts is None:
+            login, _, domain = self._address.partition("@")
+            parts = (login, domain, f"{login[:2]}***@{domain}")
+            _set_parts(self, parts)
+        return parts
+
+    @property
+    def login(self) -> str:
+        """Get login part of the address (before '@')."""
+        return self._get_parts()[0]
+
+    @property
+    def domain(self) -> str:
+        """Get domain part of the address (after '@')."""
+        return self._get_parts()[1]
+
     @property
     def masked(self) -> str:
         """
@@ -72,8 +161,27 @@ class EmailAddress:
         Returns:
             Masked email address
         """
-        login, domain = self._address.split("@")
-        return f"{login[:2]}***@{domain}"
+        return self._get_parts()[2]
+
+    def __setattr__(self, name: str, value) -> None:
+        """Forbid attribute assignment: EmailAddress is immutable."""
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        """Forbid attribute deletion: EmailAddress is immutable."""
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __copy__(self) -> "EmailAddress":
+        """Return self: immutable objects can be shared."""
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "EmailAddress":
+        """Return self: immutable objects can be shared."""
+        return self
+
+    def __reduce__(self):
+        """Pickle by normalized address."""
+        return type(self).from_normalized, (self._address,)
 
     def __str__(self) -> str:
         """String representation of email address."""
@@ -85,6 +193,8 @@ class EmailAddress:
 
     def __eq__(self, other) -> bool:
         """Check equality with another EmailAddress."""
+        if self is other:
+            return True
         if isinstance(other, EmailAddress):
             return self._address == other._address
         return False
@@ -92,3 +202,100 @@ class EmailAddress:
     def __hash__(self) -> int:
         """Hash function for using in sets and dicts."""
         return hash(self._address)
+
+
+# Slot setters bypass __setattr__, which forbids assignment after construction
+_set_address = EmailAddress._address.__set__
+_set_parts = EmailAddress._parts.__set__
+
+
+class PoolInfo(NamedTuple):
+    """Intern pool statistics."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class AddressPool:
+    """Bounded LRU pool of shared EmailAddress instances."""
+
+    def __init__(
+        self,
+        maxsize: int = 100_000,
+        factory: Callable[[str], EmailAddress] = EmailAddress,
+    ):
+        """
+        Initialize empty pool.
+
+        Args:
+            maxsize: Maximum number of keys; raw and normalized spellings
+                of one address are separate keys sharing one instance
+            factory: Callable that validates a raw address and creates an instance
+        """
+        self.maxsize = maxsize
+        self._factory = factory
+        self._entries: OrderedDict[str, EmailAddress] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, address: str) -> EmailAddress:
+        """
+        Get shared instance for a raw address, creating it on a miss.
+
+        Args:
+            address: Email address string
+
+        Returns:
+            Shared EmailAddress
+
+        Raises:
+            ValueError: If email address is invalid
+        """
+        with self._lock:
+            entries = self._entries
+            email_address = entries.get(address)
+            if email_address is not None:
+                entries.move_to_end(address)
+                self.hits += 1
+                return email_address
+
+            normalized = EmailAddress.normalize_address(address)
+            email_address = entries.get(normalized)
+            if email_address is not None:
+                entries.move_to_end(normalized)
+                self.hits += 1
+            else:
+                email_address = self._factory(address)
+                entries[normalized] = email_address
+                self.misses += 1
+
+            entries[address] = email_address
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+            return email_address
+
+    def info(self) -> PoolInfo:
+        """
+        Get pool statistics.
+
+        Returns:
+            Hit, miss and eviction counters with the current pool size
+        """
+        return PoolInfo(
+            self.hits, self.misses, self.evictions, self.maxsize, len(self._entries)
+        )
+
+    def clear(self) -> None:
+        """Drop all pooled instances and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+EmailAddress.intern_pool = AddressPool()
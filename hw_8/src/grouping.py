@@ -0,0 +1,44 @@
+from typing import Iterable, Optional
+
+from .email import Email
+
+
+def group_by_domain(
+    emails: Iterable[Email], max_group_size: Optional[int] = 100
+) -> list[list[Email]]:
+    """
+    Bucket single-recipient copies into delivery groups by recipient domain.
+
+    Domains appear in the order of their first recipient, copies keep their
+    relative order within a domain, and a domain with more than
+    max_group_size recipients is split into several groups.
+
+    Args:
+        emails: Single-recipient emails
+        max_group_size: Maximum copies per group (None for no limit)
+
+    Returns:
+        Delivery groups, each with recipients on one domain
+
+    Raises:
+        ValueError: If max_group_size is not positive
+    """
+    if max_group_size is not None and max_group_size < 1:
+        raise ValueError(f"max_group_size must be positive, got {max_group_size}")
+
+    domains: dict[str, list[Email]] = {}
+    for email in emails:
+        domain = email.recipients[0].domain
+        group = domains.get(domain)
+        if group is None:
+            domains[domain] = [email]
+        else:
+            group.append(email)
+
+    if max_group_size is None:
+        return list(domains.values())
+    return [
+        group[start : start + max_group_size]
+        for group in domains.values()
+        for start in range(0, len(group), max_group_size)
+    ]
@@ -0,0 +1,298 @@
+import cProfile
+import os
+import random
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from itertools import count
+from typing import Callable, Iterable, Iterator, Optional, Protocol
+
+from .email import Email
+from .email_address import EmailAddress
+from .metrics import Stage, timed_batches
+
+
+@dataclass(slots=True)
+class StageEvent:
+    """One call of a pipeline stage as seen by hooks."""
+
+    stage: Stage
+    correlation_id: str
+    start: float
+    items: int = 0
+    duration: Optional[float] = None
+
+
+class Hook(Protocol):
+    """Callbacks run around every measured stage call."""
+
+    def before(self, event: StageEvent) -> None:
+        """Run before the stage starts; duration is still None."""
+        ...
+
+    def after(self, event: StageEvent) -> None:
+        """Run after the stage ended, also when it raised."""
+        ...
+
+
+class Hooks:
+    """
+    Registry of hooks called around prepare, validate, fan-out and log writes.
+
+    Services take an optional Hooks instance and only check whether any hook
+    is registered, so an empty or missing registry adds no work per copy.
+    All stage calls made while sending one original email share one
+    correlation id: take one from new_correlation_id() and pass it to
+    prepare(), parse_addresses() and the service's send_email() or
+    iter_send(). Hooks registered later run later in before() and earlier
+    in after().
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.perf_counter,
+        id_prefix: Optional[str] = None,
+    ):
+        """
+        Initialize empty registry.
+
+        Args:
+            clock: High-resolution time source in seconds
+            id_prefix: Prefix of correlation ids; random if not set, so ids
+                from several processes do not collide
+        """
+        self.clock = clock
+        self.id_prefix = id_prefix or uuid.uuid4().hex[:8]
+        self._ids = count(1)
+        self._hooks: list[Hook] = []
+
+    def __bool__(self) -> bool:
+        """Check whether any hook is registered."""
+        return bool(self._hooks)
+
+    def __len__(self) -> int:
+        """Get number of registered hooks."""
+        return len(self._hooks)
+
+    def register(self, hook: Hook) -> Hook:
+        """
+        Add a hook.
+
+        Args:
+            hook: Object with before(event) and after(event)
+
+        Returns:
+            The same hook
+        """
+        self._hooks.append(hook)
+        return hook
+
+    def unregister(self, hook: Hook) -> None:
+        """
+        Remove a hook.
+
+        Args:
+            hook: Previously registered hook
+
+        Raises:
+            ValueError: If the hook is not registered
+        """
+        self._hooks.remove(hook)
+
+    def new_correlation_id(self) -> str:
+        """
+        Get a new correlation id for one original email.
+
+        Returns:
+            Id unique within this registry
+        """
+        return f"{self.id_prefix}-{next(self._ids)}"
+
+    def begin(self, stage: Stage, correlation_id: str) -> StageEvent:
+        """
+        Start a stage call and run before() of all hooks.
+
+        Args:
+            stage: Pipeline stage
+            correlation_id: Id of the original email
+
+        Returns:
+            Event to pass to end()
+        """
+        event = StageEvent(stage, correlation_id, self.clock())
+        for hook in self._hooks:
+            hook.before(event)
+        return event
+
+    def end(
+        self, event: StageEvent, items: int, duration: Optional[float] = None
+    ) -> None:
+        """
+        Finish a stage call and run after() of all hooks.
+
+        Args:
+            event: Event returned by begin()
+            items: Addresses, emails, copies or log entries processed
+            duration: Time spent in the stage; wall time since begin()
+                if not set
+        """
+        event.items = items
+        event.duration = self.clock() - event.start if duration is None else duration
+        for hook in reversed(self._hooks):
+            hook.after(event)
+
+    def wrap(
+        self, stage: Stage, correlation_id: str, items: Iterator[Email]
+    ) -> Iterator[Email]:
+        """
+        Report production of an iterator as one stage call.
+
+        Hooks run when iteration starts and when the iterator is exhausted
+        or closed. Items are pulled with timed_batches, so the duration
+        counts only time spent producing them, not the time the consumer
+        spends between them.
+
+        Args:
+            stage: Pipeline stage
+            correlation_id: Id of the original email
+            items: Iterator to pass through
+
+        Yields:
+            The same items
+        """
+        event = self.begin(stage, correlation_id)
+        elapsed = 0.0
+        produced = 0
+        try:
+            for batch, duration in timed_batches(items, self.clock):
+                elapsed += duration
+                produced += len(batch)
+                yield from batch
+        finally:
+            self.end(event, produced, elapsed)
+
+    def prepare(self, email: Email, correlation_id: Optional[str] = None) -> Email:
+        """
+        Prepare an email as the prepare stage.
+
+        Args:
+            email: Email to prepare
+            correlation_id: Id of the email, new if not set
+
+        Returns:
+            The prepared email
+        """
+        if not self._hooks:
+            return email.prepare()
+        event = self.begin(Stage.PREPARE, correlation_id or self.new_correlation_id())
+        try:
+            return email.prepare()
+        finally:
+            self.end(event, 1)
+
+    def parse_addresses(
+        self, addresses: Iterable[str], correlation_id: Optional[str] = None
+    ) -> list[Optional[EmailAddress]]:
+        """
+        Validate a batch of raw addresses as the validate stage.
+
+        Args:
+            addresses: Raw addresses
+            correlation_id: Id of the email the addresses belong to, new if
+                not set
+
+        Returns:
+            Result of EmailAddress.parse_many
+        """
+        addresses = list(addresses)
+        if not self._hooks:
+            return EmailAddress.parse_many(addresses)
+        event = self.begin(Stage.VALIDATE, correlation_id or self.new_correlation_id())
+        try:
+            return EmailAddress.parse_many(addresses)
+        finally:
+            self.end(event, len(addresses))
+
+
+class ProfileHook:
+    """
+    Sampling cProfile/tracemalloc hook dumping one profile per campaign.
+
+    For a sampled correlation id the first stage call starts cProfile (and
+    tracemalloc with memory=True); when that call ends, the profile is
+    written to ``<directory>/<correlation_id>.<stage>.prof`` in pstats
+    format, readable by snakeviz, flameprof or gprof2dot, and the memory
+    snapshot to ``.tracemalloc`` next to it. Stage calls nested in a running
+    profile are covered by it. Streaming sends profile the consumer's work
+    between copies as well. Only one profile runs at a time.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        sample_rate: float = 1.0,
+        stages: Iterable[Stage] = tuple(Stage),
+        memory: bool = False,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize profiling hook.
+
+        Args:
+            directory: Directory for profile files, created if missing
+            sample_rate: Probability of profiling a correlation id
+            stages: Stages that may start a profile
+            memory: If True, also trace allocations with tracemalloc
+            seed: Random seed for reproducible sampling
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.stages = frozenset(stages)
+        self.memory = memory
+        self.dumped: list[str] = []
+        self._random = random.Random(seed)
+        self._last_id: Optional[str] = None
+        self._sampled = False
+        self._event: Optional[StageEvent] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._started_tracing = False
+        os.makedirs(directory, exist_ok=True)
+
+    def before(self, event: StageEvent) -> None:
+        """Start profiling if the event opens a sampled campaign."""
+        if self._event is not None or event.stage not in self.stages:
+            return
+        if event.correlation_id != self._last_id:
+            self._last_id = event.correlation_id
+            self._sampled = self._random.random() < self.sample_rate
+        if not self._sampled:
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active in this thread
+            return
+        self._event = event
+        self._profiler = profiler
+        self._started_tracing = self.memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def after(self, event: StageEvent) -> None:
+        """Stop profiling and dump files when the opening call ends."""
+        if event is not self._event:
+            return
+        self._profiler.disable()
+        base = os.path.join(self.directory, f"{event.correlation_id}.{event.stage}")
+        self._profiler.dump_stats(f"{base}.prof")
+        self.dumped.append(f"{base}.prof")
+        if self.memory:
+            tracemalloc.take_snapshot().dump(f"{base}.tracemalloc")
+            self.dumped.append(f"{base}.tracemalloc")
+            if self._started_tracing:
+                tracemalloc.stop()
+        self._event = None
+        self._profiler = None
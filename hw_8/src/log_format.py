@@ -0,0 +1,272 @@
+import json
+import mmap
+import struct
+from enum import StrEnum
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+
+from .email import Email
+from .status import Status
+
+_HEADER = struct.Struct("<6I")
+_STATUSES = {status.value: status for status in Status}
+_TEXT_PREFIXES = ("Date: ", ", From: ", ", To: ", ", Subject: ")
+_TEXT_STATUS = ", Status: "
+
+
+class LogFormat(StrEnum):
+    TEXT = "text"
+    JSONL = "jsonl"
+    BINARY = "binary"
+
+
+class LogRecord(NamedTuple):
+    """One entry of the send log."""
+
+    date: Optional[str]
+    sender: str
+    recipient: str
+    subject: str
+    status: Status
+
+    @classmethod
+    def from_email(cls, sent_email: Email) -> "LogRecord":
+        """
+        Create log record for a sent single-recipient email.
+
+        Args:
+            sent_email: Sent email
+
+        Returns:
+            Log record; recipient is "unknown" if the email has none
+        """
+        recipient = (
+            sent_email.recipients[0].address if sent_email.recipients else "unknown"
+        )
+        return cls(
+            date=sent_email.date,
+            sender=sent_email.sender.address,
+            recipient=recipient,
+            subject=sent_email.subject,
+            status=sent_email.status,
+        )
+
+
+def encode_record(record: LogRecord, log_format: LogFormat) -> Union[str, bytes]:
+    """
+    Encode log record in the given format.
+
+    Text and JSONL records are newline-terminated strings. Binary records
+    are bytes: a header of six little-endian uint32 (total data length and
+    the lengths of date, sender, recipient, subject, status) followed by
+    the UTF-8 encoded fields.
+
+    Args:
+        record: Log record
+        log_format: Output format
+
+    Returns:
+        Encoded record
+    """
+    if log_format == LogFormat.TEXT:
+        return (
+            f"Date: {record.date}, "
+            f"From: {record.sender}, "
+            f"To: {record.recipient}, "
+            f"Subject: {record.subject}, "
+            f"Status: {record.status}\n"
+        )
+
+    if log_format == LogFormat.JSONL:
+        return (
+            json.dumps(
+                {
+                    "date": record.date,
+                    "from": record.sender,
+                    "to": record.recipient,
+                    "subject": record.subject,
+                    "status": str(record.status),
+                },
+                ensure_ascii=False,
+            )
+            + "\n"
+        )
+
+    fields = [
+        field.encode("utf-8")
+        for field in (
+            record.date or "",
+            record.sender,
+            record.recipient,
+            record.subject,
+            record.status,
+        )
+    ]
+    lengths = [len(field) for field in fields]
+    return _HEADER.pack(sum(lengths), *lengths) + b"".join(fields)
+
+
+def decode_text_line(line: str) -> LogRecord:
+    """
+    Parse one line of the text log format.
+
+    The subject is taken as everything between ", Subject: " and the last
+    ", Status: ", so subjects containing ", " are parsed correctly.
+
+    Args:
+        line: Log line without the trailing newline
+
+    Returns:
+        Parsed log record
+
+    Raises:
+        ValueError: If the line is not in the text log format
+    """
+    head, sep, status = line.rpartition(_TEXT_STATUS)
+    if not sep or not head.startswith(_TEXT_PREFIXES[0]):
+        raise ValueError(f"Invalid log line: {line}")
+
+    values = []
+    rest = head[len(_TEXT_PREFIXES[0]) :]
+    for prefix in _TEXT_PREFIXES[1:]:
+        value, sep, rest = rest.partition(prefix)
+        if not sep:
+            raise ValueError(f"Invalid log line: {line}")
+        values.append(value)
+
+    date, sender, recipient = values
+    return LogRecord(
+        date=None if date == "None" else date,
+        sender=sender,
+        recipient=recipient,
+        subject=rest,
+        status=_STATUSES[status],
+    )
+
+
+def decode_json_line(line: str) -> LogRecord:
+    """
+    Parse one line of the JSONL log format.
+
+    Args:
+        line: Log line
+
+    Returns:
+        Parsed log record
+    """
+    data = json.loads(line)
+    return LogRecord(
+        date=data["date"],
+        sender=data["from"],
+        recipient=data["to"],
+        subject=data["subject"],
+        status=_STATUSES[data["status"]],
+    )
+
+
+def _iter_binary(buffer: mmap.mmap, offset: int) -> Iterator[tuple[int, int, LogRecord]]:
+    """Decode complete binary records from a mapped log."""
+    size = len(buffer)
+    while offset + _HEADER.size <= size:
+        length, *lengths = _HEADER.unpack_from(buffer, offset)
+        start = offset + _HEADER.size
+        end = start + length
+        if end > size:
+            return
+        data = buffer[start:end]
+
+        fields = []
+        start = 0
+        for field_length in lengths:
+            fields.append(data[start : start + field_length].decode("utf-8"))
+            start += field_length
+
+        date, sender, recipient, subject, status = fields
+        record = LogRecord(date or None, sender, recipient, subject, _STATUSES[status])
+        yield offset, end, record
+        offset = end
+
+
+def _iter_lines(
+    buffer: mmap.mmap, offset: int, log_format: LogFormat
+) -> Iterator[tuple[int, int, LogRecord]]:
+    """Decode complete newline-terminated records from a mapped log."""
+    decode = decode_json_line if log_format == LogFormat.JSONL else decode_text_line
+    buffer.seek(offset)
+    for line in iter(buffer.readline, b""):
+        end = offset + len(line)
+        if not line.endswith(b"\n"):
+            return
+        if len(line) > 1:
+            yield offset, end, decode(line[:-1].decode("utf-8"))
+        offset = end
+
+
+def iter_log_entries(
+    path: str, log_format: LogFormat = LogFormat.TEXT, offset: int = 0
+) -> Iterator[tuple[int, int, LogRecord]]:
+    """
+    Stream records with their byte positions out of a send log via mmap.
+
+    A trailing record that is not completely written yet is skipped.
+
+    Args:
+        path: Path to log file
+        log_format: Format the log was written in
+        offset: Byte offset of the first record to read
+
+    Yields:
+        Tuples of (start offset, end offset, log record) in file order
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) <= offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if log_format == LogFormat.BINARY:
+                yield from _iter_binary(buffer, offset)
+            else:
+                yield from _iter_lines(buffer, offset, log_format)
+
+
+def iter_log_records(
+    path: str, log_format: LogFormat = LogFormat.TEXT
+) -> Iterator[LogRecord]:
+    """
+    Stream records out of a send log via mmap without loading the whole file.
+
+    Args:
+        path: Path to log file
+        log_format: Format the log was written in
+
+    Yields:
+        Log records in file order
+    """
+    for _, _, record in iter_log_entries(path, log_format):
+        yield record
+
+
+def read_log_records(
+    path: str, offsets: Iterable[int], log_format: LogFormat = LogFormat.TEXT
+) -> Iterator[LogRecord]:
+    """
+    Read records starting at the given byte offsets of a send log.
+
+    Args:
+        path: Path to log file
+        offsets: Start offsets of records, e.g. taken from an index
+        log_format: Format the log was written in
+
+    Yields:
+        Log records in the order of offsets
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for offset in offsets:
+                if log_format == LogFormat.BINARY:
+                    entries = _iter_binary(buffer, offset)
+                else:
+                    entries = _iter_lines(buffer, offset, log_format)
+                for _, _, record in entries:
+                    yield record
+                    break
@@ -0,0 +1,378 @@
+import heapq
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Iterator, Optional
+
+from .log_format import LogFormat, LogRecord, iter_log_entries, read_log_records
+
+DIMENSIONS = ("date", "sender", "domain", "status")
+
+# Sidecar file: magic with the byte order of the arrays, then segments
+_MAGIC = b"LOGIDX1" + (b"<" if sys.byteorder == "little" else b">")
+# Segment frame: body length, CRC32 of the body
+_FRAME = struct.Struct("<II")
+# Segment head: log size indexed after the segment, number of records
+_SEGMENT_HEAD = struct.Struct("<QI")
+_COUNT = struct.Struct("<I")
+_POSTING_HEAD = struct.Struct("<II")
+# Segments in the sidecar above which it is rewritten as one segment on open
+_MAX_SEGMENTS = 64
+
+
+def _record_keys(record: LogRecord) -> tuple[str, str, str, str]:
+    """Get index keys of a record in DIMENSIONS order."""
+    return (
+        record.date or "",
+        record.sender,
+        record.recipient.rpartition("@")[2],
+        str(record.status),
+    )
+
+
+class LogIndex:
+    """
+    Sidecar index over a send log by date, sender, recipient domain and status.
+
+    The index follows the log: every query first indexes records appended
+    since the last call, and the new part of the index is appended to the
+    sidecar file as one binary segment, so reopening the index does not
+    rescan the log. A segment holds the record offsets, one key-id column
+    per dimension, the keys first seen in it and its postings lists, all as
+    raw arrays that are loaded without per-record work. Segments carry a
+    CRC32; a torn trailing segment is cut off on open and its records are
+    indexed again from the log.
+    """
+
+    def __init__(
+        self,
+        log_file: str,
+        log_format: LogFormat = LogFormat.TEXT,
+        index_file: Optional[str] = None,
+    ):
+        """
+        Open index for a log, loading the sidecar file if it exists.
+
+        Args:
+            log_file: Path to the send log
+            log_format: Format the log was written in
+            index_file: Path to the sidecar file, defaults to log_file + ".idx"
+        """
+        self.log_file = log_file
+        self.log_format = LogFormat(log_format)
+        self.index_file = index_file or f"{log_file}.idx"
+        self._reset()
+        self._load()
+
+    def _reset(self) -> None:
+        """Drop all in-memory index data."""
+        self.indexed_size = 0
+        self._offsets = array("Q")
+        self._keys: dict[str, dict[str, int]] = {dim: {} for dim in DIMENSIONS}
+        self._columns = {dim: array("I") for dim in DIMENSIONS}
+        self._postings: dict[str, dict[int, array]] = {dim: {} for dim in DIMENSIONS}
+
+    def __len__(self) -> int:
+        """Number of indexed records."""
+        return len(self._offsets)
+
+    def _load(self) -> None:
+        """Load sidecar segments; rebuild if the sidecar or the log does not match."""
+        if not os.path.exists(self.index_file):
+            return
+        with open(self.index_file, "rb") as f:
+            data = f.read()
+        if not data.startswith(_MAGIC):
+            self.rebuild()
+            return
+
+        offset = len(_MAGIC)
+        segments = 0
+        while offset + _FRAME.size <= len(data):
+            length, checksum = _FRAME.unpack_from(data, offset)
+            start = offset + _FRAME.size
+            body = data[start : start + length]
+            if len(body) < length or zlib.crc32(body) != checksum:
+                break
+            self._apply_segment(body)
+            offset = start + length
+            segments += 1
+
+        if self._log_size() < self.indexed_size:
+            self.rebuild()
+        elif segments > _MAX_SEGMENTS:
+            self._write_sidecar()
+        elif offset < len(data):
+            with open(self.index_file, "r+b") as f:
+                f.truncate(offset)
+
+    def _apply_segment(self, body: bytes) -> None:
+        """Add the records of one sidecar segment to the in-memory index."""
+        view = memoryview(body)
+        indexed_size, count = _SEGMENT_HEAD.unpack_from(view)
+        position = _SEGMENT_HEAD.size
+
+        for dim in DIMENSIONS:
+            key_ids = self._keys[dim]
+            postings = self._postings[dim]
+            (new_keys,) = _COUNT.unpack_from(view, position)
+            position += _COUNT.size
+            for _ in range(new_keys):
+                (length,) = _COUNT.unpack_from(view, position)
+                position += _COUNT.size
+                key = str(view[position : position + length], "utf-8")
+                position += length
+                key_id = key_ids[key] = len(key_ids)
+                postings[key_id] = array("I")
+
+        size = count * self._offsets.itemsize
+        self._offsets.frombytes(view[position : position + size])
+        position += size
+        for dim in DIMENSIONS:
+            column = self._columns[dim]
+            size = count * column.itemsize
+            column.frombytes(view[position : position + size])
+            position += size
+
+        for dim in DIMENSIONS:
+            postings = self._postings[dim]
+            (touched,) = _COUNT.unpack_from(view, position)
+            position += _COUNT.size
+            for _ in range(touched):
+                key_id, length = _POSTING_HEAD.unpack_from(view, position)
+                position += _POSTING_HEAD.size
+                ordinals = postings[key_id]
+                size = length * ordinals.itemsize
+                ordinals.frombytes(view[position : position + size])
+                position += size
+
+        self.indexed_size = indexed_size
+
+    def _encode_segment(
+        self, first: int, key_starts: list[int], posting_starts: list[dict[int, int]]
+    ) -> bytes:
+        """
+        Encode index entries added since a previous state as one segment.
+
+        Args:
+            first: Ordinal of the first new record
+            key_starts: Number of keys per dimension before the new records
+            posting_starts: Per dimension, postings length before the new
+                records for every key id the new records touched
+
+        Returns:
+            Segment body
+        """
+        count = len(self._offsets) - first
+        parts = [_SEGMENT_HEAD.pack(self.indexed_size, count)]
+        for dim, key_start in zip(DIMENSIONS, key_starts):
+            keys = list(self._keys[dim])[key_start:]
+            parts.append(_COUNT.pack(len(keys)))
+            for key in keys:
+                data = key.encode("utf-8")
+                parts.append(_COUNT.pack(len(data)))
+                parts.append(data)
+        parts.append(self._offsets[first:].tobytes())
+        for dim in DIMENSIONS:
+            parts.append(self._columns[dim][first:].tobytes())
+        for dim, starts in zip(DIMENSIONS, posting_starts):
+            postings = self._postings[dim]
+            parts.append(_COUNT.pack(len(starts)))
+            for key_id, start in starts.items():
+                ordinals = postings[key_id][start:]
+                parts.append(_POSTING_HEAD.pack(key_id, len(ordinals)))
+                parts.append(ordinals.tobytes())
+        return b"".join(parts)
+
+    @staticmethod
+    def _frame(body: bytes) -> bytes:
+        """Prefix a segment body with its length and checksum."""
+        return _FRAME.pack(len(body), zlib.crc32(body)) + body
+
+    def _write_sidecar(self) -> None:
+        """Replace the sidecar file with the whole index as one segment."""
+        starts = [{key_id: 0 for key_id in self._postings[dim]} for dim in DIMENSIONS]
+        body = self._encode_segment(0, [0] * len(DIMENSIONS), starts)
+        temp_path = f"{self.index_file}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_MAGIC + self._frame(body))
+        os.replace(temp_path, self.index_file)
+
+    def _log_size(self) -> int:
+        """Get current size of the log file."""
+        try:
+            return os.path.getsize(self.log_file)
+        except FileNotFoundError:
+            return 0
+
+    def refresh(self) -> int:
+        """
+        Index records appended to the log since the last refresh.
+
+        Returns:
+            Number of newly indexed records
+        """
+        size = self._log_size()
+        if size < self.indexed_size:
+            return self.rebuild()
+        if size == self.indexed_size:
+            return 0
+
+        first = len(self._offsets)
+        key_starts = [len(self._keys[dim]) for dim in DIMENSIONS]
+        posting_starts: list[dict[int, int]] = [{} for _ in DIMENSIONS]
+        dims = [
+            (self._keys[dim], self._columns[dim], self._postings[dim], starts)
+            for dim, starts in zip(DIMENSIONS, posting_starts)
+        ]
+        offsets = self._offsets
+        ordinal = first
+        for offset, end, record in iter_log_entries(
+            self.log_file, self.log_format, self.indexed_size
+        ):
+            offsets.append(offset)
+            for (key_ids, column, postings, starts), key in zip(
+                dims, _record_keys(record)
+            ):
+                key_id = key_ids.get(key)
+                if key_id is None:
+                    key_id = key_ids[key] = len(key_ids)
+                    postings[key_id] = array("I")
+                ordinals = postings[key_id]
+                if key_id not in starts:
+                    starts[key_id] = len(ordinals)
+                column.append(key_id)
+                ordinals.append(ordinal)
+            ordinal += 1
+            self.indexed_size = end
+
+        added = ordinal - first
+        if not added:
+            return 0
+        if not os.path.exists(self.index_file):
+            self._write_sidecar()
+            return added
+        segment = self._encode_segment(first, key_starts, posting_starts)
+        with open(self.index_file, "ab") as sidecar:
+            sidecar.write(self._frame(segment))
+        return added
+
+    def rebuild(self) -> int:
+        """
+        Rebuild the index and the sidecar file from the whole log.
+
+        Returns:
+            Number of indexed records
+        """
+        self._reset()
+        if os.path.exists(self.index_file):
+            os.remove(self.index_file)
+        return self.refresh()
+
+    def _ordinals(
+        self,
+        date: Optional[str],
+        date_from: Optional[str],
+        date_to: Optional[str],
+        sender: Optional[str],
+        domain: Optional[str],
+        status: Optional[str],
+    ) -> Iterator[int]:
+        """Yield ordinals of matching records in log order."""
+        self.refresh()
+
+        allowed: dict[str, set[int]] = {}
+        for dim, value in (
+            ("date", date),
+            ("sender", sender),
+            ("domain", domain),
+            ("status", status),
+        ):
+            if value is not None:
+                key_id = self._keys[dim].get(str(value))
+                allowed[dim] = set() if key_id is None else {key_id}
+
+        if date_from is not None or date_to is not None:
+            in_range = {
+                key_id
+                for key, key_id in self._keys["date"].items()
+                if (date_from is None or key >= date_from)
+                and (date_to is None or key <= date_to)
+            }
+            allowed["date"] = allowed.get("date", in_range) & in_range
+
+        if not allowed:
+            yield from range(len(self._offsets))
+            return
+
+        def size(dim: str) -> int:
+            return sum(len(self._postings[dim][key_id]) for key_id in allowed[dim])
+
+        driver = min(allowed, key=size)
+        postings = [self._postings[driver][key_id] for key_id in allowed[driver]]
+        checks = [
+            (self._columns[dim], key_ids)
+            for dim, key_ids in allowed.items()
+            if dim != driver
+        ]
+        for ordinal in heapq.merge(*postings):
+            if all(column[ordinal] in key_ids for column, key_ids in checks):
+                yield ordinal
+
+    def count(
+        self,
+        *,
+        date: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sender: Optional[str] = None,
+        domain: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> int:
+        """
+        Count matching records without reading the log.
+
+        Args:
+            date: Exact send date (YYYY-MM-DD)
+            date_from: First send date of an inclusive range
+            date_to: Last send date of an inclusive range
+            sender: Sender address
+            domain: Recipient domain
+            status: Send status
+
+        Returns:
+            Number of matching records
+        """
+        return sum(
+            1 for _ in self._ordinals(date, date_from, date_to, sender, domain, status)
+        )
+
+    def query(
+        self,
+        *,
+        date: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sender: Optional[str] = None,
+        domain: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> Iterator[LogRecord]:
+        """
+        Read matching records straight from their offsets in the log.
+
+        Args:
+            date: Exact send date (YYYY-MM-DD)
+            date_from: First send date of an inclusive range
+            date_to: Last send date of an inclusive range
+            sender: Sender address
+            domain: Recipient domain
+            status: Send status
+
+        Yields:
+            Matching log records in log order
+        """
+        ordinals = list(self._ordinals(date, date_from, date_to, sender, domain, status))
+        offsets = (self._offsets[ordinal] for ordinal in ordinals)
+        yield from read_log_records(self.log_file, offsets, self.log_format)
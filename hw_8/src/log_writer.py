@@ -0,0 +1,384 @@
+import io
+import os
+import queue
+import threading
+import time
+import weakref
+from typing import Callable, Iterable, Optional, Protocol, Union
+
+Entry = Union[str, bytes]
+
+
+class LogWriter(Protocol):
+    """Interface of long-lived log writers used by LoggingEmailService."""
+
+    path: str
+    binary: bool
+
+    def write(self, entry: Entry) -> None: ...
+
+    def write_many(self, entries: Iterable[Entry]) -> None: ...
+
+    def flush(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+def _open_log(path: str, binary: bool, buffer_size: int):
+    """Open log file for appending in text or binary mode."""
+    if binary:
+        return open(path, "ab", buffering=buffer_size)
+    return open(path, "a", encoding="utf-8", buffering=buffer_size)
+
+
+class BufferedLogWriter:
+    """
+    Long-lived log writer that batches entries and flushes by policy.
+
+    The entry count limit is checked on write. The age limit is also
+    enforced by a timer thread, so the last entries of a burst reach the
+    file within about flush_interval_ms even if nothing is written after
+    them.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+        flush_every: Optional[int] = 1000,
+        flush_interval_ms: Optional[float] = 1000,
+        clock: Callable[[], float] = time.monotonic,
+        binary: bool = False,
+    ):
+        """
+        Initialize writer and open the log file in append mode.
+
+        Args:
+            path: Path to log file
+            buffer_size: Size of the underlying file buffer in bytes
+            flush_every: Flush after this many pending entries (None to disable)
+            flush_interval_ms: Flush pending entries once this many
+                milliseconds passed since the last flush, checked on write
+                and by a timer thread (None to disable both)
+            clock: Monotonic time source in seconds for the age check
+            binary: If True, entries are bytes and the file is opened in binary mode
+        """
+        self.path = path
+        self.binary = binary
+        self.flush_every = flush_every
+        self.flush_interval_ms = flush_interval_ms
+        self._clock = clock
+        self._pending: list[Entry] = []
+        self._last_flush = clock()
+        self._file = _open_log(path, binary, buffer_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+        if flush_interval_ms is not None:
+            self._timer = threading.Thread(
+                target=_run_flush_timer,
+                args=(weakref.ref(self), self._stop, flush_interval_ms / 1000),
+                name="log-flush",
+                daemon=True,
+            )
+            self._timer.start()
+
+    @property
+    def closed(self) -> bool:
+        """Check if the log file is closed."""
+        return self._file.closed
+
+    def write(self, entry: Entry) -> None:
+        """
+        Queue one log entry and flush if the policy says so.
+
+        Args:
+            entry: Encoded log entry (str, or bytes for binary writers)
+        """
+        with self._lock:
+            self._pending.append(entry)
+            self._maybe_flush()
+
+    def write_many(self, entries: Iterable[Entry]) -> None:
+        """
+        Queue several log entries and flush if the policy says so.
+
+        Args:
+            entries: Encoded log entries
+        """
+        with self._lock:
+            self._pending.extend(entries)
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        """Flush pending entries when count or age limit is reached."""
+        if self.flush_every is not None and len(self._pending) >= self.flush_every:
+            self._flush()
+        elif self._is_due():
+            self._flush()
+
+    def _is_due(self) -> bool:
+        """Check if the age limit of pending entries is reached."""
+        return (
+            self.flush_interval_ms is not None
+            and (self._clock() - self._last_flush) * 1000 >= self.flush_interval_ms
+        )
+
+    def _flush_if_due(self) -> None:
+        """Flush entries left pending longer than the interval."""
+        with self._lock:
+            if self._pending and not self._file.closed and self._is_due():
+                try:
+                    self._flush()
+                except OSError:
+                    # Entries stay pending; the next write or flush raises
+                    pass
+
+    def flush(self) -> None:
+        """Write all pending entries in one batch and flush the file buffer."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Flush pending entries; the caller holds the lock."""
+        if self._pending:
+            self._file.writelines(self._pending)
+            self._pending.clear()
+        self._file.flush()
+        self._last_flush = self._clock()
+
+    def close(self) -> None:
+        """Flush pending entries, stop the timer thread and close the log file."""
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush()
+            self._file.close()
+
+    def __enter__(self) -> "BufferedLogWriter":
+        """Enter context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Close writer on context exit."""
+        self.close()
+
+
+def _run_flush_timer(
+    writer_ref: "weakref.ref[BufferedLogWriter]", stop: threading.Event, interval: float
+) -> None:
+    """
+    Flush a BufferedLogWriter by age until it is closed or collected.
+
+    The thread holds only a weak reference, so an unclosed writer can
+    still be garbage collected.
+    """
+    while not stop.wait(interval):
+        writer = writer_ref()
+        if writer is None:
+            return
+        writer._flush_if_due()
+        del writer
+
+
+_STOP = object()
+# Seconds between checks that the writer thread is alive while waiting on it
+_POLL_INTERVAL = 0.1
+
+
+class QueuedLogWriter:
+    """Log writer that hands entries to a background thread via a bounded queue."""
+
+    def __init__(
+        self,
+        path: str,
+        maxsize: int = 10_000,
+        block: bool = True,
+        batch_size: int = 1000,
+        buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+        binary: bool = False,
+    ):
+        """
+        Initialize writer, open the log file and start the writer thread.
+
+        Args:
+            path: Path to log file
+            maxsize: Maximum number of queued items; an item is one entry
+                from write() or one batch from write_many()
+            block: If True, writers wait while the queue is full;
+                otherwise entries are dropped and counted in `dropped`
+            batch_size: Maximum number of entries written in one writelines
+            buffer_size: Size of the underlying file buffer in bytes
+            binary: If True, entries are bytes and the file is opened in binary mode
+        """
+        self.path = path
+        self.binary = binary
+        self.block = block
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._closed = False
+        self._error: Optional[Exception] = None
+        # Guards the closed check together with the put, so no item can be
+        # queued behind the stop marker
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._file = _open_log(path, binary, buffer_size)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        """Check if the writer is closed."""
+        return self._closed
+
+    def write(self, entry: Entry) -> None:
+        """
+        Queue one log entry for the writer thread.
+
+        Args:
+            entry: Encoded log entry (str, or bytes for binary writers)
+        """
+        self._put(entry, 1)
+
+    def write_many(self, entries: Iterable[Entry]) -> None:
+        """
+        Queue several log entries as one item for the writer thread.
+
+        Args:
+            entries: Encoded log entries
+        """
+        batch = list(entries)
+        if batch:
+            self._put(batch, len(batch))
+
+    def _put(self, item, count: int) -> None:
+        """Put item on the queue, applying the backpressure policy."""
+        with self._lock:
+            if self._closed:
+                raise ValueError("I/O operation on closed log writer")
+            self._check_alive()
+            if self.block:
+                self._put_blocking(item)
+                return
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += count
+
+    def _put_blocking(self, item) -> None:
+        """Put item on the queue, waiting for space while the thread is alive."""
+        while True:
+            try:
+                self._queue.put(item, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                self._check_alive()
+
+    def flush(self) -> None:
+        """
+        Wait until every entry queued so far is written and synced to disk.
+
+        Raises:
+            OSError: If the writer thread failed to write to the log file
+            RuntimeError: If the writer thread has stopped
+        """
+        done = threading.Event()
+        with self._lock:
+            if self._closed:
+                return
+            self._check_alive()
+            self._put_blocking(done)
+        while not done.wait(_POLL_INTERVAL):
+            self._check_alive()
+        self._raise_error()
+
+    def close(self) -> None:
+        """
+        Write all queued entries, sync them to disk, stop the writer thread
+        and close the file.
+
+        Raises:
+            OSError: If the writer thread failed to write to the log file
+            RuntimeError: If the writer thread had stopped before
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            # Every put checks _closed under the lock, so the marker is last
+            self._put_blocking(_STOP)
+            self._thread.join()
+        finally:
+            self._file.close()
+        self._raise_error()
+
+    def _check_alive(self) -> None:
+        """
+        Fail instead of waiting on a writer thread that has stopped.
+
+        Raises:
+            RuntimeError: If the writer thread is not running
+        """
+        if not self._thread.is_alive():
+            error, self._error = self._error, None
+            raise RuntimeError("Log writer thread has stopped") from error
+
+    def _raise_error(self) -> None:
+        """Re-raise a write error from the writer thread in the caller."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self) -> None:
+        """
+        Drain the queue in batches until the stop marker is received.
+
+        A failed batch does not stop the thread: the first error is kept for
+        the next flush()/close() and waiters are released in any case.
+        """
+        stop = False
+        while not stop:
+            batch: list[Entry] = []
+            waiters: list[threading.Event] = []
+            try:
+                item = self._queue.get()
+                while True:
+                    if item is _STOP:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif isinstance(item, (str, bytes)):
+                        batch.append(item)
+                    else:
+                        batch.extend(item)
+
+                    if stop or len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    self._file.writelines(batch)
+                if waiters or stop:
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+            except Exception as error:
+                if self._error is None:
+                    self._error = error
+            finally:
+                for waiter in waiters:
+                    waiter.set()
+
+    def __enter__(self) -> "QueuedLogWriter":
+        """Enter context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Close writer on context exit."""
+        self.close()
@@ -0,0 +1,390 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from enum import StrEnum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from operator import attrgetter, itemgetter
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from .email import Email
+from .email_address import EmailAddress
+from .status import Status
+
+# Upper bounds of latency buckets in seconds, from 1 us to 10 s
+DEFAULT_BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 0.01, 0.1, 1.0, 10.0)
+# Label used for recipient domains beyond max_domains
+OTHER_DOMAIN = "other"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Items pulled from a measured iterator between two clock reads
+_BATCH = 256
+
+_get_status = attrgetter("status")
+_get_recipients = attrgetter("recipients")
+_get_domain = attrgetter("domain")
+_first = itemgetter(0)
+
+T = TypeVar("T")
+
+
+def timed_batches(
+    items: Iterator[T], clock: Callable[[], float]
+) -> Iterator[tuple[list[T], float]]:
+    """
+    Pull items in small batches, timing only their production.
+
+    The clock is read once per batch, so measuring a stream costs two clock
+    reads per few hundred items, and the time the consumer spends between
+    batches is not counted.
+
+    Args:
+        items: Iterator to measure
+        clock: Time source in seconds
+
+    Yields:
+        Every batch with the seconds spent producing it; the last batch is
+        empty and carries the time spent reaching the end of items
+    """
+    while True:
+        start = clock()
+        batch = list(islice(items, _BATCH))
+        yield batch, clock() - start
+        if not batch:
+            return
+
+
+class Stage(StrEnum):
+    """Pipeline stage measured by Metrics."""
+
+    VALIDATE = "validate"
+    PREPARE = "prepare"
+    FAN_OUT = "fan_out"
+    LOG_WRITE = "log_write"
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Iterable[float] = DEFAULT_BUCKETS):
+        """
+        Initialize empty histogram.
+
+        Args:
+            bounds: Increasing upper bounds of the buckets in seconds;
+                an implicit +Inf bucket follows the last one
+        """
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Add one observation.
+
+        Args:
+            value: Observed duration in seconds
+        """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[int]:
+        """
+        Get cumulative bucket counts as exported by Prometheus.
+
+        Returns:
+            Number of observations <= each bound, the last item for +Inf
+        """
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class _Timer:
+    """Context manager observing the duration of its block."""
+
+    __slots__ = ("_metrics", "_stage", "_items", "_start")
+
+    def __init__(self, metrics: "Metrics", stage: Stage, items: int):
+        """Bind timer to a stage of metrics."""
+        self._metrics = metrics
+        self._stage = stage
+        self._items = items
+
+    def __enter__(self) -> None:
+        """Start timing."""
+        self._start = self._metrics.clock()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Record the block duration."""
+        elapsed = self._metrics.clock() - self._start
+        self._metrics.observe(self._stage, elapsed, self._items)
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    """Format a bucket bound as Prometheus le label."""
+    return repr(float(bound))
+
+
+class Metrics:
+    """
+    Per-stage latency histograms and send counters of the email pipeline.
+
+    Services take an optional Metrics instance; without one they run the
+    same code as before and pay one None check per call. With metrics, each
+    call of a stage adds one histogram observation and the number of items
+    it processed; fan-out also counts sent copies by status and recipient
+    domain. Updates are merged under a lock once per call, so one instance
+    can be shared by services running in several threads.
+    """
+
+    def __init__(
+        self,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        max_domains: int = 1000,
+        clock: Callable[[], float] = time.perf_counter,
+        prefix: str = "email",
+    ):
+        """
+        Initialize empty metrics.
+
+        Args:
+            buckets: Upper bounds of latency buckets in seconds
+            max_domains: Distinct recipient domains counted separately;
+                further domains are counted under "other"
+            clock: High-resolution time source in seconds
+            prefix: Prefix of exported metric names
+        """
+        self.clock = clock
+        self.max_domains = max_domains
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.stages = {stage: Histogram(buckets) for stage in Stage}
+        self.items = {stage: 0 for stage in Stage}
+        self.statuses = {status: 0 for status in Status}
+        self.domains: dict[str, int] = {}
+
+    def observe(self, stage: Stage, seconds: float, items: int = 1) -> None:
+        """
+        Record one call of a stage.
+
+        Args:
+            stage: Pipeline stage
+            seconds: Duration of the call
+            items: Addresses, emails, copies or log entries processed
+        """
+        with self._lock:
+            self.stages[stage].observe(seconds)
+            self.items[stage] += items
+
+    def timer(self, stage: Stage, items: int = 1) -> _Timer:
+        """
+        Measure the wrapped block as one call of a stage.
+
+        Args:
+            stage: Pipeline stage
+            items: Items processed by the block
+
+        Returns:
+            Context manager recording the block duration on exit
+        """
+        return _Timer(self, stage, items)
+
+    def add_counts(self, statuses: dict[Status, int], domains: dict[str, int]) -> None:
+        """
+        Add sent copy counts.
+
+        Args:
+            statuses: Copies per status
+            domains: Copies per recipient domain
+        """
+        with self._lock:
+            self._merge_counts(statuses, domains)
+
+    def _record(
+        self,
+        stage: Stage,
+        seconds: float,
+        items: int,
+        statuses: dict[Status, int],
+        domains: dict[str, int],
+    ) -> None:
+        """Record one call of a stage and its copy counts under one lock."""
+        with self._lock:
+            self.stages[stage].observe(seconds)
+            self.items[stage] += items
+            self._merge_counts(statuses, domains)
+
+    def _merge_counts(self, statuses: dict[Status, int], domains: dict[str, int]) -> None:
+        """Add copy counts; the caller holds the lock."""
+        for status, count in statuses.items():
+            self.statuses[status] += count
+        known = self.domains
+        for domain, count in domains.items():
+            if domain not in known and len(known) >= self.max_domains:
+                domain = OTHER_DOMAIN
+            known[domain] = known.get(domain, 0) + count
+
+    def parse_addresses(self, addresses: Iterable[str]) -> list[Optional[EmailAddress]]:
+        """
+        Validate a batch of raw addresses as the validate stage.
+
+        Args:
+            addresses: Raw addresses
+
+        Returns:
+            Result of EmailAddress.parse_many
+        """
+        addresses = list(addresses)
+        with self.timer(Stage.VALIDATE, len(addresses)):
+            return EmailAddress.parse_many(addresses)
+
+    def prepare(self, email: Email) -> Email:
+        """
+        Prepare an email as the prepare stage.
+
+        Args:
+            email: Email to prepare
+
+        Returns:
+            The prepared email
+        """
+        with self.timer(Stage.PREPARE):
+            return email.prepare()
+
+    def fan_out(self, copies: Iterator[Email]) -> Iterator[Email]:
+        """
+        Measure production of per-recipient copies as one fan-out call.
+
+        Copies are pulled from the source with timed_batches, so the time
+        the consumer spends between copies is not counted. The call is
+        recorded when the iterator is exhausted or closed.
+
+        Args:
+            copies: Iterator of single-recipient copies
+
+        Yields:
+            The same copies
+        """
+        statuses: Counter[Status] = Counter()
+        domains: Counter[str] = Counter()
+        elapsed = 0.0
+        produced = 0
+        try:
+            for batch, duration in timed_batches(copies, self.clock):
+                elapsed += duration
+                produced += len(batch)
+                statuses.update(map(_get_status, batch))
+                domains.update(map(_get_domain, map(_first, map(_get_recipients, batch))))
+                yield from batch
+        finally:
+            self._record(Stage.FAN_OUT, elapsed, produced, statuses, domains)
+
+    def to_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text ending with a newline
+        """
+        name = self.prefix
+        lines = [
+            f"# HELP {name}_stage_duration_seconds Duration of pipeline stage calls.",
+            f"# TYPE {name}_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            for stage, histogram in self.stages.items():
+                labels = f'stage="{stage}"'
+                bounds = [*map(_format_bound, histogram.bounds), "+Inf"]
+                for bound, count in zip(bounds, histogram.cumulative()):
+                    lines.append(
+                        f'{name}_stage_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                        f"{count}"
+                    )
+                lines.append(
+                    f"{name}_stage_duration_seconds_sum{{{labels}}} {histogram.sum!r}"
+                )
+                lines.append(
+                    f"{name}_stage_duration_seconds_count{{{labels}}} {histogram.count}"
+                )
+
+            lines.append(f"# HELP {name}_stage_items_total Items processed per stage.")
+            lines.append(f"# TYPE {name}_stage_items_total counter")
+            for stage, count in self.items.items():
+                lines.append(f'{name}_stage_items_total{{stage="{stage}"}} {count}')
+
+            lines.append(f"# HELP {name}_copies_total Sent copies by status.")
+            lines.append(f"# TYPE {name}_copies_total counter")
+            for status, count in self.statuses.items():
+                lines.append(f'{name}_copies_total{{status="{status}"}} {count}')
+
+            lines.append(
+                f"# HELP {name}_recipient_domain_copies_total Sent copies by "
+                "recipient domain."
+            )
+            lines.append(f"# TYPE {name}_recipient_domain_copies_total counter")
+            for domain, count in self.domains.items():
+                lines.append(
+                    f'{name}_recipient_domain_copies_total{{domain="{_escape(domain)}"}} '
+                    f"{count}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Write metrics to a file for the node_exporter textfile collector.
+
+        The file is replaced atomically, so a scraper never reads it half written.
+
+        Args:
+            path: Path to the .prom file
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+    def serve(self, port: int = 0, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serve metrics over HTTP from a daemon thread.
+
+        Args:
+            port: Port to listen on (0 picks a free port)
+            host: Interface to bind, local only by default
+
+        Returns:
+            Running server; its server_address has the bound port, and
+            shutdown() stops it
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                """Respond with the current exposition text."""
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                """Do not log scrapes to stderr."""
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
@@ -0,0 +1,406 @@
+import os
+import struct
+import threading
+import zlib
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from .email import Email, MessagePayload
+from .email_address import EmailAddress
+from .service import EmailService
+from .status import Status
+
+# Record header: kind, body length, CRC32 of the body
+_HEADER = struct.Struct("<BII")
+_PAYLOAD = 1
+_ENQUEUE = 2
+_ACK = 3
+
+_ID = struct.Struct("<Q")
+_ENQUEUE_HEAD = struct.Struct("<QQB")
+_ACK_BODY = struct.Struct("<QB")
+_LENGTH = struct.Struct("<I")
+_NO_SHORT_BODY = 0xFFFFFFFF
+
+_STATUSES = list(Status)
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+
+
+class OutboxUnit(NamedTuple):
+    """Unacknowledged single-recipient unit of the outbox."""
+
+    unit_id: int
+    email: Email
+
+
+def _pack_strings(*values: Optional[str]) -> bytes:
+    """Encode strings as length-prefixed UTF-8; None gets a marker length."""
+    parts = []
+    for value in values:
+        if value is None:
+            parts.append(_LENGTH.pack(_NO_SHORT_BODY))
+        else:
+            data = value.encode("utf-8")
+            parts.append(_LENGTH.pack(len(data)))
+            parts.append(data)
+    return b"".join(parts)
+
+
+def _unpack_strings(data: bytes, offset: int, count: int) -> list[Optional[str]]:
+    """Decode count length-prefixed strings starting at offset."""
+    values: list[Optional[str]] = []
+    for _ in range(count):
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        if length == _NO_SHORT_BODY:
+            values.append(None)
+            continue
+        values.append(data[offset : offset + length].decode("utf-8"))
+        offset += length
+    return values
+
+
+def _payload_body(payload_id: int, payload: MessagePayload) -> bytes:
+    """Encode the body of a payload record."""
+    return _ID.pack(payload_id) + _pack_strings(
+        payload.subject, payload.body, payload.short_body, payload.sender.address
+    )
+
+
+def _unit_body(unit_id: int, payload_id: int, recipient: str, status: Status) -> bytes:
+    """Encode the body of a unit record."""
+    head = _ENQUEUE_HEAD.pack(unit_id, payload_id, _STATUS_CODES[status])
+    return head + _pack_strings(recipient)
+
+
+class Outbox:
+    """
+    Durable append-only queue of per-recipient send units.
+
+    Every enqueued email is stored once as a payload record followed by one
+    unit record per recipient; workers append an ack record with the final
+    status. Records are fsynced in groups of sync_every (group commit), so
+    the durability cost is shared by many messages. Reopening the file
+    replays it, drops a torn trailing record and resumes from the first
+    unacknowledged unit. Units whose ack was not yet synced when the process
+    died are delivered again (at-least-once).
+
+    A payload is kept in memory only while some of its units are pending.
+    Once the file holds compact_after records and at least half of them are
+    no longer needed, it is compacted on the next ack, so a long-running
+    outbox stays proportional to its pending units.
+    """
+
+    def __init__(
+        self, path: str, sync_every: int = 1000, compact_after: Optional[int] = 100_000
+    ):
+        """
+        Open outbox, replaying the existing file if any.
+
+        Args:
+            path: Path to the outbox file
+            sync_every: Records appended between fsyncs
+            compact_after: Minimum number of records in the file before it is
+                compacted automatically (None to compact only on compact())
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        self._payloads: dict[int, MessagePayload] = {}
+        self._references: dict[int, int] = {}
+        self._pending: dict[int, tuple[int, EmailAddress, Status]] = {}
+        self._next_id = 0
+        self._unsynced = 0
+        self._records = 0
+        self._replay()
+        self._file = open(path, "ab")
+
+    def _replay(self) -> None:
+        """Rebuild pending units from the file and cut off a torn tail."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            kind, length, checksum = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            body = data[start : start + length]
+            if len(body) < length or zlib.crc32(body) != checksum:
+                break
+            self._apply(kind, body)
+            self._records += 1
+            offset = start + length
+
+        if offset < len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+        for payload_id in [p for p, count in self._references.items() if not count]:
+            self._release(payload_id)
+
+    def _apply(self, kind: int, body: bytes) -> None:
+        """Apply one replayed record to the in-memory state."""
+        if kind == _PAYLOAD:
+            (payload_id,) = _ID.unpack_from(body)
+            subject, text, short_body, sender = _unpack_strings(body, _ID.size, 4)
+            self._payloads[payload_id] = MessagePayload(
+                subject, text, short_body, EmailAddress.from_normalized(sender)
+            )
+            self._references[payload_id] = 0
+            self._next_id = max(self._next_id, payload_id + 1)
+        elif kind == _ENQUEUE:
+            unit_id, payload_id, code = _ENQUEUE_HEAD.unpack_from(body)
+            (recipient,) = _unpack_strings(body, _ENQUEUE_HEAD.size, 1)
+            recipient_address = EmailAddress.from_normalized(recipient)
+            self._pending[unit_id] = (payload_id, recipient_address, _STATUSES[code])
+            self._references[payload_id] += 1
+            self._next_id = max(self._next_id, unit_id + 1)
+        elif kind == _ACK:
+            unit_id, _ = _ACK_BODY.unpack(body)
+            unit = self._pending.pop(unit_id, None)
+            if unit is not None:
+                self._unreference(unit[0])
+
+    def _unreference(self, payload_id: int) -> None:
+        """Count one unit of a payload as done, dropping the payload after its last."""
+        self._references[payload_id] -= 1
+        if not self._references[payload_id]:
+            self._release(payload_id)
+
+    def _release(self, payload_id: int) -> None:
+        """Forget a payload that has no pending units."""
+        del self._references[payload_id]
+        del self._payloads[payload_id]
+
+    def __len__(self) -> int:
+        """Number of unacknowledged units."""
+        return len(self._pending)
+
+    def _append(self, kind: int, body: bytes) -> None:
+        """Append one record, syncing when the group is full."""
+        self._file.write(_HEADER.pack(kind, len(body), zlib.crc32(body)) + body)
+        self._records += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self._sync()
+
+    def _sync(self) -> None:
+        """Flush buffered records and fsync the file."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def enqueue(self, email: Email) -> list[int]:
+        """
+        Store one unit per recipient of the email.
+
+        Args:
+            email: Email to send; units keep its current status
+
+        Returns:
+            Unit ids in recipient order
+        """
+        if not email.recipients:
+            return []
+        payload = email.payload()
+        with self._lock:
+            payload_id = self._next_id
+            self._next_id += 1
+            self._payloads[payload_id] = payload
+            self._references[payload_id] = len(email.recipients)
+            self._append(_PAYLOAD, _payload_body(payload_id, payload))
+
+            unit_ids = []
+            for recipient in email.recipients:
+                unit_id = self._next_id
+                self._next_id += 1
+                self._pending[unit_id] = (payload_id, recipient, email.status)
+                self._append(
+                    _ENQUEUE,
+                    _unit_body(unit_id, payload_id, recipient.address, email.status),
+                )
+                unit_ids.append(unit_id)
+        return unit_ids
+
+    def ack(self, unit_id: int, status: Status) -> None:
+        """
+        Mark a unit as processed with its final status.
+
+        Args:
+            unit_id: Unit id returned by enqueue or pending
+            status: Final status, usually Status.SENT or Status.FAILED
+
+        Raises:
+            KeyError: If the unit is unknown or already acknowledged
+        """
+        with self._lock:
+            payload_id, _, _ = self._pending.pop(unit_id)
+            self._unreference(payload_id)
+            self._append(_ACK, _ACK_BODY.pack(unit_id, _STATUS_CODES[status]))
+            live = len(self._pending) + len(self._payloads)
+            if (
+                self.compact_after is not None
+                and self._records >= self.compact_after
+                and self._records >= 2 * live
+            ):
+                self._compact()
+
+    def pending(self, unit_ids: Optional[Iterable[int]] = None) -> Iterator[OutboxUnit]:
+        """
+        Iterate unacknowledged units.
+
+        Args:
+            unit_ids: Only these units, in the given order, skipping those
+                already acknowledged; all units in enqueue order if not set
+
+        Yields:
+            Units with a single-recipient email built from the stored payload
+        """
+        unit_ids = list(self._pending if unit_ids is None else unit_ids)
+        for unit_id in unit_ids:
+            unit = self._pending.get(unit_id)
+            if unit is None:
+                continue
+            payload_id, recipient, status = unit
+            email = Email.from_payload(
+                self._payloads[payload_id], recipient, None, status
+            )
+            yield OutboxUnit(unit_id, email)
+
+    def commit(self) -> None:
+        """Make all appended records durable."""
+        with self._lock:
+            self._sync()
+
+    def compact(self) -> None:
+        """Rewrite the file with only the payloads and units still pending."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the file; the lock must be held."""
+        self._sync()
+        self._file.close()
+
+        temp_path = f"{self.path}.tmp"
+        self._file = open(temp_path, "wb")
+        self._records = 0
+        for payload_id, payload in self._payloads.items():
+            self._append(_PAYLOAD, _payload_body(payload_id, payload))
+        for unit_id, (payload_id, recipient, status) in self._pending.items():
+            self._append(
+                _ENQUEUE, _unit_body(unit_id, payload_id, recipient.address, status)
+            )
+        self._sync()
+        self._file.close()
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, "ab")
+
+    def close(self) -> None:
+        """Commit and close the outbox file."""
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __enter__(self) -> "Outbox":
+        """Enter context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Close outbox on context exit."""
+        self.close()
+
+
+class OutboxEmailService(EmailService):
+    """Email service that records every per-recipient unit in a durable outbox."""
+
+    def __init__(self, outbox: Outbox, service: Optional[EmailService] = None):
+        """
+        Initialize outbox email service.
+
+        Args:
+            outbox: Durable outbox
+            service: Service sending single units, defaults to a shared-payload
+                EmailService
+        """
+        super().__init__(share_payload=True)
+        self.outbox = outbox
+        self.service = service or EmailService(share_payload=True)
+
+    def send_email(
+        self, email: Email, correlation_id: Optional[str] = None
+    ) -> list[Email]:
+        """
+        Enqueue email, then send its units.
+
+        Units left over from an interrupted run are not sent; resume() sends
+        them.
+
+        Args:
+            email: Email to send
+            correlation_id: Id of the email in hooks, passed to the service
+                for every unit
+
+        Returns:
+            List of sent emails (one per recipient)
+        """
+        return list(self.iter_send(email, correlation_id))
+
+    def iter_send(
+        self, email: Email, correlation_id: Optional[str] = None
+    ) -> Iterator[Email]:
+        """
+        Enqueue email durably, then send its units one at a time.
+
+        Args:
+            email: Email to send
+            correlation_id: Id of the email in hooks, passed to the service
+                for every unit
+
+        Yields:
+            Sent emails (one per recipient)
+        """
+        unit_ids = self.outbox.enqueue(email)
+        self.outbox.commit()
+        yield from self._iter_units(self.outbox.pending(unit_ids), correlation_id)
+
+    def resume(self) -> list[Email]:
+        """
+        Send all unacknowledged units left in the outbox.
+
+        Returns:
+            List of sent emails (one per processed unit, in enqueue order)
+        """
+        return list(self.iter_resume())
+
+    def iter_resume(self) -> Iterator[Email]:
+        """
+        Send unacknowledged units and acknowledge each with its status.
+
+        Yields:
+            Sent emails (one per processed unit, in enqueue order)
+        """
+        yield from self._iter_units(self.outbox.pending())
+
+    def _iter_units(
+        self, units: Iterable[OutboxUnit], correlation_id: Optional[str] = None
+    ) -> Iterator[Email]:
+        """
+        Send units and acknowledge each with its status.
+
+        Acks are made durable by group commit and when iteration finishes.
+
+        Args:
+            units: Units to send
+            correlation_id: Id passed to the service for every unit
+
+        Yields:
+            Sent emails (one per unit)
+        """
+        for unit in units:
+            for sent_email in self.service.send_email(unit.email, correlation_id):
+                self.outbox.ack(unit.unit_id, sent_email.status)
+                yield sent_email
+        self.outbox.commit()
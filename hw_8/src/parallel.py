@@ -0,0 +1,269 @@
+import multiprocessing
+import os
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from operator import attrgetter
+from typing import Iterator, Optional
+
+from .email import Email
+from .email_address import EmailAddress
+from .hooks import Hooks
+from .log_format import LogFormat, LogRecord, encode_record
+from .log_writer import Entry, LogWriter
+from .metrics import Metrics
+from .service import LoggingEmailService
+from .status import Status
+
+# Workers are not forked from the caller, which may run threads such as
+# the one of a QueuedLogWriter; forking a process with threads can deadlock
+_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Partitions submitted to the pool per worker before the first one is consumed
+_PARTITIONS_PER_WORKER = 2
+
+_address = attrgetter("address")
+
+
+def encode_partition(
+    subject: str,
+    sender: str,
+    addresses: str,
+    lengths: array,
+    send_date: str,
+    status: Status,
+    log_format: LogFormat,
+) -> Entry:
+    """
+    Fan out one partition of recipients into encoded log entries.
+
+    Runs in a worker process. The partition's addresses arrive concatenated
+    into one string with an array of their lengths, which pickles several
+    times faster than a list of strings; the result is one encoded block.
+
+    Args:
+        subject: Email subject
+        sender: Sender address
+        addresses: Recipient addresses of the partition, concatenated
+        lengths: Length of every address in addresses
+        send_date: Send date
+        status: Status of the sent copies
+        log_format: Log entry format
+
+    Returns:
+        Log entries of the partition joined into one block
+    """
+    entries = []
+    end = 0
+    for length in lengths:
+        start, end = end, end + length
+        record = LogRecord(send_date, sender, addresses[start:end], subject, status)
+        entries.append(encode_record(record, log_format))
+    if log_format == LogFormat.BINARY:
+        return b"".join(entries)
+    return "".join(entries)
+
+
+class ParallelEmailService(LoggingEmailService):
+    """
+    Logging email service that fans out large recipient lists in worker processes.
+
+    Recipients are split into partitions of chunk_size; every partition is
+    encoded into log entries by a ProcessPoolExecutor worker. Partitions are
+    submitted a few at a time, so the caller builds the per-recipient copies
+    of one partition, from one shared payload, while the workers encode the
+    next ones. Workers are started with the forkserver (or spawn) method,
+    never by forking the caller.
+    """
+
+    def __init__(
+        self,
+        log_file: str = "send.log",
+        workers: Optional[int] = None,
+        chunk_size: int = 10_000,
+        log_writer: Optional[LogWriter] = None,
+        log_format: LogFormat = LogFormat.TEXT,
+        dedupe: bool = False,
+        metrics: Optional[Metrics] = None,
+        hooks: Optional[Hooks] = None,
+    ):
+        """
+        Initialize parallel logging email service.
+
+        Args:
+            log_file: Path to log file
+            workers: Number of worker processes, defaults to the CPU count
+            chunk_size: Recipients per partition; emails with no more
+                recipients than this are sent without the pool
+            log_writer: Long-lived log writer
+            log_format: Log entry format: text, JSONL or binary
+            dedupe: If True, repeated recipients and the sender are skipped
+            metrics: If set, fan-out and log write times and sent copy
+                counts are recorded in it
+            hooks: If it has hooks registered, they are called around the
+                fan-out and the log writes of every email
+        """
+        super().__init__(
+            log_file,
+            share_payload=True,
+            log_writer=log_writer,
+            log_format=log_format,
+            dedupe=dedupe,
+            metrics=metrics,
+            hooks=hooks,
+        )
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get worker pool, starting it on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(_START_METHOD),
+            )
+        return self._executor
+
+    def send_email(
+        self, email: Email, correlation_id: Optional[str] = None
+    ) -> list[Email]:
+        """
+        Send email with logging, fanning out partitions in worker processes.
+
+        Args:
+            email: Email to send
+            correlation_id: Id of the email in hooks, e.g. the one passed to
+                Hooks.prepare for it; new if not set
+
+        Returns:
+            List of sent emails (one per recipient, in recipient order)
+        """
+        return list(self.iter_send(email, correlation_id))
+
+    def iter_send(
+        self, email: Email, correlation_id: Optional[str] = None
+    ) -> Iterator[Email]:
+        """
+        Send email partition by partition, logging each partition as it completes.
+
+        Deduplication, metrics and hooks apply as in LoggingEmailService; the
+        fan-out time includes waiting for the workers and writing the blocks.
+        Copies of a partition are built only when the consumer reaches it.
+
+        Args:
+            email: Email to send
+            correlation_id: Id of the email in hooks, e.g. the one passed to
+                Hooks.prepare for it; new if not set
+
+        Returns:
+            Iterator of sent emails (one per recipient, in recipient order)
+        """
+        if len(email.recipients) <= self.chunk_size:
+            return super().iter_send(email, correlation_id)
+
+        correlation_id = self._new_correlation_id(correlation_id)
+        return self._measure_fan_out(
+            self._iter_partitions(email, correlation_id), correlation_id
+        )
+
+    def _iter_partitions(
+        self, email: Email, correlation_id: Optional[str]
+    ) -> Iterator[Email]:
+        """
+        Fan out recipients in worker processes and log each partition's block.
+
+        Args:
+            email: Email to send
+            correlation_id: Id passed to hooks, None without hooks
+
+        Yields:
+            Sent emails (one per recipient, in recipient order)
+        """
+        payload = email.payload()
+        send_date = self.add_send_date()
+        status = self._sent_status(email)
+        from_payload = Email.from_payload
+        blocks = self._iter_blocks(email, send_date, status)
+
+        if self.metrics is None and correlation_id is None:
+            for partition, block in blocks:
+                self._write_block(block)
+                for recipient in partition:
+                    yield from_payload(payload, recipient, send_date, status)
+            return
+
+        units = (
+            (
+                block,
+                len(partition),
+                (from_payload(payload, r, send_date, status) for r in partition),
+            )
+            for partition, block in blocks
+        )
+        yield from self._iter_timed_writes(units, self._write_block, correlation_id)
+
+    def _iter_blocks(
+        self, email: Email, send_date: str, status: Status
+    ) -> Iterator[tuple[list[EmailAddress], Entry]]:
+        """
+        Encode partitions in the pool, keeping a bounded number in flight.
+
+        Args:
+            email: Email to send
+            send_date: Send date of the copies
+            status: Status of the copies
+
+        Yields:
+            Recipients of every partition with its encoded block, in order
+        """
+        recipients = self._recipients(email)
+        executor = self._get_executor()
+        window = _PARTITIONS_PER_WORKER * (self.workers or os.cpu_count() or 1)
+        sender = email.sender.address
+        in_flight: deque[tuple[list[EmailAddress], Future]] = deque()
+        try:
+            for start in range(0, len(recipients), self.chunk_size):
+                partition = recipients[start : start + self.chunk_size]
+                addresses = list(map(_address, partition))
+                future = executor.submit(
+                    encode_partition,
+                    email.subject,
+                    sender,
+                    "".join(addresses),
+                    array("I", map(len, addresses)),
+                    send_date,
+                    status,
+                    self.log_format,
+                )
+                in_flight.append((partition, future))
+                if len(in_flight) >= window:
+                    partition, future = in_flight.popleft()
+                    yield partition, future.result()
+            while in_flight:
+                partition, future = in_flight.popleft()
+                yield partition, future.result()
+        finally:
+            # Closed early: do not encode partitions nobody will write
+            for _, future in in_flight:
+                future.cancel()
+
+    def _write_block(self, block: Entry) -> None:
+        """Append an encoded block of log entries to the log."""
+        if self.log_writer is not None:
+            self.log_writer.write(block)
+        elif self.log_format == LogFormat.BINARY:
+            with open(self.log_file, "ab") as f:
+                f.write(block)
+        else:
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(block)
+
+    def close(self) -> None:
+        """Stop worker processes, then flush and close the log writer, if any."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        super().close()
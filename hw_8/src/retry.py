@@ -0,0 +1,380 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import Awaitable, Callable, Iterable, Iterator, NamedTuple, Optional, Protocol
+
+from .async_service import AsyncEmailService
+from .email import Email
+from .log_format import LogFormat, LogRecord, encode_record
+from .log_writer import LogWriter
+from .service import EmailService
+from .status import Status
+
+
+class RetryPolicy(NamedTuple):
+    """Exponential backoff settings of a RetryQueue."""
+
+    base_delay: float = 1.0
+    multiplier: float = 2.0
+    max_delay: float = 300.0
+    max_attempts: int = 5
+    jitter: float = 0.1
+
+    def delay(self, attempt: int, rng: random.Random) -> float:
+        """
+        Get delay before the next attempt.
+
+        Args:
+            attempt: Number of attempts made so far (1 after the first send)
+            rng: Random source for jitter
+
+        Returns:
+            Backoff delay in seconds, randomized by +/- jitter share
+        """
+        backoff = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return backoff * (1 + rng.uniform(-self.jitter, self.jitter))
+
+
+class DeadLetterSink(Protocol):
+    """Destination of copies that failed on every attempt."""
+
+    def put(self, email: Email, attempts: int) -> None:
+        """Store a copy that will not be retried again."""
+        ...
+
+
+class MemoryDeadLetterSink:
+    """Dead-letter sink keeping copies in a list."""
+
+    def __init__(self):
+        """Initialize empty sink."""
+        self.emails: list[tuple[Email, int]] = []
+
+    def put(self, email: Email, attempts: int) -> None:
+        """
+        Store a dead copy.
+
+        Args:
+            email: Failed single-recipient email
+            attempts: Number of attempts made
+        """
+        self.emails.append((email, attempts))
+
+
+class LogDeadLetterSink:
+    """Dead-letter sink appending FAILED entries to a log writer."""
+
+    def __init__(self, log_writer: LogWriter, log_format: LogFormat = LogFormat.TEXT):
+        """
+        Initialize sink.
+
+        Args:
+            log_writer: Writer of the dead-letter log
+            log_format: Log entry format
+        """
+        self.log_writer = log_writer
+        self.log_format = LogFormat(log_format)
+
+    def put(self, email: Email, attempts: int) -> None:
+        """
+        Append a dead copy to the dead-letter log.
+
+        Args:
+            email: Failed single-recipient email
+            attempts: Number of attempts made
+        """
+        self.log_writer.write(encode_record(LogRecord.from_email(email), self.log_format))
+
+
+class RetryStats(NamedTuple):
+    """Counters of a RetryQueue."""
+
+    pending: int
+    retried: int
+    recovered: int
+    dead: int
+
+
+class _RetrySchedule:
+    """
+    Retry schedule of the FAILED per-recipient copies, without the resend.
+
+    Pending retries are kept in one heap ordered by due time, so any number
+    of them costs one heap entry each and no sleeping thread or task. Each
+    retry is a READY single-recipient copy of the already prepared payload.
+    Copies of an email that was not READY (FAILED without a delivery attempt)
+    and copies that still fail after max_attempts go to the dead-letter sink.
+    """
+
+    def __init__(
+        self,
+        policy: RetryPolicy,
+        dead_letter: Optional[DeadLetterSink],
+        clock: Callable[[], float],
+        seed: Optional[int],
+    ):
+        """
+        Initialize empty schedule.
+
+        Args:
+            policy: Backoff and attempt limits
+            dead_letter: Sink for copies out of attempts, defaults to memory
+            clock: Monotonic time source in seconds
+            seed: Random seed for reproducible jitter
+        """
+        self.policy = policy
+        self.dead_letter = (
+            dead_letter if dead_letter is not None else MemoryDeadLetterSink()
+        )
+        self._clock = clock
+        self._random = random.Random(seed)
+        self._heap: list[tuple[float, int, int, Email]] = []
+        self._sequence = itertools.count()
+        self.retried = 0
+        self.recovered = 0
+        self.dead = 0
+
+    def __len__(self) -> int:
+        """Number of pending retries."""
+        return len(self._heap)
+
+    def _dead(self, email: Email, attempts: int) -> None:
+        """Hand a copy that will not be retried to the dead-letter sink."""
+        self.dead += 1
+        self.dead_letter.put(email, attempts)
+
+    def _schedule(self, retry: Email, failed: Email, attempts: int) -> None:
+        """
+        Schedule the next attempt or dead-letter the copy.
+
+        Args:
+            retry: READY copy to resend
+            failed: Last FAILED copy, dead-lettered when out of attempts
+            attempts: Attempts made so far
+        """
+        if attempts >= self.policy.max_attempts:
+            self._dead(failed, attempts)
+            return
+        due = self._clock() + self.policy.delay(attempts, self._random)
+        heapq.heappush(self._heap, (due, next(self._sequence), attempts, retry))
+
+    def add(self, email: Email, sent_emails: Iterable[Email], attempts: int = 1) -> int:
+        """
+        Queue the FAILED copies of a send for retry.
+
+        Only copies of a READY email are retried, as READY copies of the same
+        payload. The copies of an email in any other status were never
+        delivered and would be sent without the preparation the sender skipped,
+        so they go to the dead-letter sink right away.
+
+        Args:
+            email: Email passed to send_email
+            sent_emails: Result of send_email; non-FAILED copies are ignored
+            attempts: Attempts already made for these copies
+
+        Returns:
+            Number of FAILED copies taken
+        """
+        retryable = email.status == Status.READY
+        failed = 0
+        for sent_email in sent_emails:
+            if sent_email.status != Status.FAILED:
+                continue
+            failed += 1
+            if retryable:
+                retry = Email.from_payload(
+                    sent_email.payload(), sent_email.recipients[0], status=Status.READY
+                )
+                self._schedule(retry, sent_email, attempts)
+            else:
+                self._dead(sent_email, attempts)
+        return failed
+
+    def _iter_due(self) -> Iterator[tuple[int, Email]]:
+        """Pop retries due at the time of the call as (attempts, copy)."""
+        now = self._clock()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, attempts, retry = heapq.heappop(heap)
+            self.retried += 1
+            yield attempts, retry
+
+    def _collect(
+        self,
+        retry: Email,
+        attempts: int,
+        results: Iterable[Email],
+        sent_emails: list[Email],
+    ) -> None:
+        """Reschedule the failed results of a resend and keep the sent ones."""
+        for result in results:
+            if result.status == Status.FAILED:
+                self._schedule(retry, result, attempts + 1)
+            else:
+                self.recovered += 1
+                sent_emails.append(result)
+
+    def next_delay(self) -> Optional[float]:
+        """
+        Get time until the next retry is due.
+
+        Returns:
+            Seconds to wait (0 if a retry is due), None if nothing is pending
+        """
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self._clock())
+
+    def stats(self) -> RetryStats:
+        """
+        Get retry counters.
+
+        Returns:
+            Pending retries, resend attempts, recovered and dead copies
+        """
+        return RetryStats(len(self._heap), self.retried, self.recovered, self.dead)
+
+
+class RetryQueue(_RetrySchedule):
+    """
+    Retry scheduler re-sending only the FAILED per-recipient copies.
+
+    See _RetrySchedule for the schedule; due copies are resent one by one
+    through a synchronous service.
+    """
+
+    def __init__(
+        self,
+        service: EmailService,
+        policy: RetryPolicy = RetryPolicy(),
+        dead_letter: Optional[DeadLetterSink] = None,
+        clock: Callable[[], float] = time.monotonic,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize retry queue.
+
+        Args:
+            service: Service used to resend copies
+            policy: Backoff and attempt limits
+            dead_letter: Sink for copies out of attempts, defaults to memory
+            clock: Monotonic time source in seconds
+            seed: Random seed for reproducible jitter
+        """
+        super().__init__(policy, dead_letter, clock, seed)
+        self.service = service
+
+    def poll(self) -> list[Email]:
+        """
+        Resend every copy whose retry is due.
+
+        Returns:
+            Copies sent successfully by this poll
+        """
+        sent_emails: list[Email] = []
+        for attempts, retry in list(self._iter_due()):
+            self._collect(retry, attempts, self.service.send_email(retry), sent_emails)
+        return sent_emails
+
+    def run(self, sleep: Callable[[float], None] = time.sleep) -> list[Email]:
+        """
+        Process retries until every copy is sent or dead-lettered.
+
+        Args:
+            sleep: Sleep function; pass one that advances a fake clock to
+                run the schedule without waiting
+
+        Returns:
+            Copies sent successfully
+        """
+        sent_emails: list[Email] = []
+        while (delay := self.next_delay()) is not None:
+            if delay > 0:
+                sleep(delay)
+            sent_emails.extend(self.poll())
+        return sent_emails
+
+
+class AsyncRetryQueue(_RetrySchedule):
+    """
+    Retry scheduler re-sending FAILED copies through an AsyncEmailService.
+
+    Scheduling, backoff and dead-lettering are the same as in RetryQueue;
+    the copies due at a poll are resent concurrently by up to concurrency
+    workers.
+    """
+
+    def __init__(
+        self,
+        service: AsyncEmailService,
+        policy: RetryPolicy = RetryPolicy(),
+        dead_letter: Optional[DeadLetterSink] = None,
+        clock: Callable[[], float] = time.monotonic,
+        seed: Optional[int] = None,
+        concurrency: int = 100,
+    ):
+        """
+        Initialize async retry queue.
+
+        Args:
+            service: Async service used to resend copies
+            policy: Backoff and attempt limits
+            dead_letter: Sink for copies out of attempts, defaults to memory
+            clock: Monotonic time source in seconds
+            seed: Random seed for reproducible jitter
+            concurrency: Maximum number of resends in flight
+        """
+        super().__init__(policy, dead_letter, clock, seed)
+        self.service = service
+        self.concurrency = concurrency
+
+    async def poll(self) -> list[Email]:
+        """
+        Resend every copy whose retry is due.
+
+        Returns:
+            Copies sent successfully by this poll, in completion order
+        """
+        sent_emails: list[Email] = []
+        due = list(self._iter_due())
+        pending = iter(due)
+
+        async def worker() -> None:
+            for attempts, retry in pending:
+                results = await self.service.send_email(retry)
+                self._collect(retry, attempts, results, sent_emails)
+
+        tasks = [
+            asyncio.ensure_future(worker())
+            for _ in range(min(self.concurrency, len(due)))
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return sent_emails
+
+    async def run(
+        self, sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ) -> list[Email]:
+        """
+        Process retries until every copy is sent or dead-lettered.
+
+        Args:
+            sleep: Coroutine function to wait with; pass one that advances a
+                fake clock to run the schedule without waiting
+
+        Returns:
+            Copies sent successfully
+        """
+        sent_emails: list[Email] = []
+        while (delay := self.next_delay()) is not None:
+            if delay > 0:
+                await sleep(delay)
+            sent_emails.extend(await self.poll())
+        return sent_emails
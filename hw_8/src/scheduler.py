@@ -0,0 +1,289 @@
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Callable, NamedTuple, Optional
+
+from .email import Email
+from .service import EmailService
+
+# Tolerance for float rounding when a refill should yield a whole token
+_EPSILON = 1e-9
+
+
+class Priority(IntEnum):
+    """Send priority; lower values are sent first."""
+
+    TRANSACTIONAL = 0
+    BULK = 1
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size), defaults to rate
+                but at least 1, so rates below one token per second still
+                accumulate a whole token
+            clock: Monotonic time source in seconds
+
+        Raises:
+            ValueError: If rate is not positive or capacity is below 1
+        """
+        capacity = max(rate, 1) if capacity is None else capacity
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"Invalid token bucket rate={rate} capacity={capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        """Add tokens accumulated since the last update."""
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Currently available tokens."""
+        self._refill()
+        return self._tokens
+
+    def delay(self, tokens: float = 1) -> float:
+        """
+        Get time until the given number of tokens is available.
+
+        Args:
+            tokens: Number of tokens
+
+        Returns:
+            Seconds to wait, 0 if the tokens are available now
+        """
+        self._refill()
+        missing = tokens - self._tokens
+        return missing / self.rate if missing > _EPSILON else 0.0
+
+    def try_take(self, tokens: float = 1) -> bool:
+        """
+        Take tokens if they are available.
+
+        Args:
+            tokens: Number of tokens
+
+        Returns:
+            True if the tokens were taken
+        """
+        self._refill()
+        if tokens - self._tokens > _EPSILON:
+            return False
+        self._tokens = max(0.0, self._tokens - tokens)
+        return True
+
+
+class SchedulerStats(NamedTuple):
+    """Queue depth and wait-time metrics of a SendScheduler."""
+
+    depth: int
+    depth_by_priority: dict[Priority, int]
+    dispatched: int
+    mean_wait: float
+    max_wait: float
+
+
+class SendScheduler:
+    """
+    Priority queue in front of an EmailService paced by token buckets.
+
+    Emails are split into single-recipient units. Every dispatched unit takes
+    a token from the global bucket and from the bucket of its recipient
+    domain. Transactional units overtake bulk ones; a throttled domain does
+    not hold back units for other domains.
+    """
+
+    def __init__(
+        self,
+        service: EmailService,
+        rate: float,
+        burst: Optional[float] = None,
+        domain_rates: Optional[dict[str, float]] = None,
+        default_domain_rate: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            service: Service that sends dispatched units
+            rate: Global sends per second
+            burst: Global bucket capacity, defaults to rate but at least 1
+            domain_rates: Sends per second for specific recipient domains
+            default_domain_rate: Sends per second for other domains
+                (None for no per-domain limit)
+            clock: Monotonic time source in seconds
+        """
+        self.service = service
+        self._clock = clock
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.domain_rates = dict(domain_rates or {})
+        self.default_domain_rate = default_domain_rate
+        self._domain_buckets: dict[str, Optional[TokenBucket]] = {}
+        self._queues: dict[str, list[tuple[int, int, float, Email]]] = {}
+        self._heads: list[tuple[int, int, str]] = []
+        self._sequence = itertools.count()
+        self._size = 0
+        self._depth = {priority: 0 for priority in Priority}
+        self.dispatched = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def __len__(self) -> int:
+        """Number of queued units."""
+        return self._size
+
+    def _domain_bucket(self, domain: str) -> Optional[TokenBucket]:
+        """Get token bucket of a recipient domain, creating it on first use."""
+        if domain not in self._domain_buckets:
+            rate = self.domain_rates.get(domain, self.default_domain_rate)
+            self._domain_buckets[domain] = (
+                None if rate is None else TokenBucket(rate, clock=self._clock)
+            )
+        return self._domain_buckets[domain]
+
+    def submit(self, email: Email, priority: Priority = Priority.BULK) -> int:
+        """
+        Queue an email for all its recipients.
+
+        Args:
+            email: Email to send
+            priority: Send priority
+
+        Returns:
+            Number of queued units
+        """
+        payload = email.payload()
+        now = self._clock()
+        for recipient in email.recipients:
+            unit = Email.from_payload(payload, recipient, None, email.status)
+            entry = (priority, next(self._sequence), now, unit)
+            queue = self._queues.setdefault(recipient.domain, [])
+            if not queue or entry[:2] < queue[0][:2]:
+                heapq.heappush(self._heads, (priority, entry[1], recipient.domain))
+            heapq.heappush(queue, entry)
+        self._size += len(email.recipients)
+        self._depth[priority] += len(email.recipients)
+        return len(email.recipients)
+
+    def poll(self) -> list[Email]:
+        """
+        Send every queued unit the buckets currently allow.
+
+        Units are taken in priority order, then in submission order. Every
+        recipient domain has its own queue, so units of a throttled domain
+        wait without blocking other domains.
+
+        Returns:
+            Sent emails in dispatch order
+        """
+        sent_emails: list[Email] = []
+        throttled: list[tuple[int, int, str]] = []
+        throttled_domains: set[str] = set()
+        while self._heads and self.bucket.delay() == 0:
+            head = heapq.heappop(self._heads)
+            priority, sequence, domain = head
+            queue = self._queues.get(domain)
+            if not queue or queue[0][1] != sequence or domain in throttled_domains:
+                continue
+            domain_bucket = self._domain_bucket(domain)
+            if domain_bucket is not None and not domain_bucket.try_take():
+                throttled.append(head)
+                throttled_domains.add(domain)
+                continue
+
+            _, _, enqueued, unit = heapq.heappop(queue)
+            if queue:
+                heapq.heappush(self._heads, (queue[0][0], queue[0][1], domain))
+            else:
+                del self._queues[domain]
+
+            self.bucket.try_take()
+            wait = self._clock() - enqueued
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._size -= 1
+            self._depth[priority] -= 1
+            self.dispatched += 1
+            sent_emails.extend(self.service.send_email(unit))
+
+        for head in throttled:
+            heapq.heappush(self._heads, head)
+        return sent_emails
+
+    def next_delay(self) -> Optional[float]:
+        """
+        Get time until the next queued unit can be sent.
+
+        Returns:
+            Seconds to wait (0 if a unit can be sent now), None if the queue
+            is empty
+        """
+        if not self._size:
+            return None
+        domain_delay = min(
+            bucket.delay() if (bucket := self._domain_bucket(domain)) else 0.0
+            for domain in self._queues
+        )
+        return max(self.bucket.delay(), domain_delay)
+
+    def run(self, sleep: Callable[[float], None] = time.sleep) -> list[Email]:
+        """
+        Send all queued units, sleeping while the buckets are empty.
+
+        Args:
+            sleep: Sleep function; pass one that advances a fake clock to
+                run the schedule without waiting
+
+        Returns:
+            Sent emails in dispatch order
+
+        Raises:
+            RuntimeError: If a poll after the computed delay sends nothing
+        """
+        sent_emails: list[Email] = []
+        while (delay := self.next_delay()) is not None:
+            if delay > 0:
+                sleep(delay)
+            dispatched = self.dispatched
+            sent_emails.extend(self.poll())
+            if self.dispatched == dispatched:
+                raise RuntimeError(f"Scheduler made no progress after {delay}s delay")
+        return sent_emails
+
+    def stats(self) -> SchedulerStats:
+        """
+        Get queue depth and wait-time metrics.
+
+        Returns:
+            Current depth (total and per priority), dispatched units and
+            mean/max time dispatched units spent in the queue
+        """
+        return SchedulerStats(
+            depth=self._size,
+            depth_by_priority=dict(self._depth),
+            dispatched=self.dispatched,
+            mean_wait=self._total_wait / self.dispatched if self.dispatched else 0.0,
+            max_wait=self._max_wait,
+        )
@@ -1,13 +1,49 @@
 from copy import deepcopy
 from datetime import date
+from typing import Any, Callable, Iterable, Iterator, Optional
 
+from .dedup import dedupe_recipients
 from .email import Email
+from .email_address import EmailAddress
+from .grouping import group_by_domain
+from .hooks import Hooks
+from .log_format import LogFormat, LogRecord, encode_record
+from .log_writer import Entry, LogWriter
+from .metrics import Metrics, Stage
 from .status import Status
 
 
 class EmailService:
     """Service for sending emails."""
 
+    def __init__(
+        self,
+        share_payload: bool = False,
+        dedupe: bool = False,
+        metrics: Optional[Metrics] = None,
+        hooks: Optional[Hooks] = None,
+    ):
+        """
+        Initialize email service.
+
+        Args:
+            share_payload: If True, per-recipient copies share one frozen
+                message payload instead of being deep copies of the email
+            dedupe: If True, repeated recipients and the sender are skipped
+                during fan-out; dropped entries are counted in
+                duplicates_removed and self_sends_removed
+            metrics: If set, fan-out time and sent copies by status and
+                recipient domain are recorded in it
+            hooks: If it has hooks registered, they are called around the
+                fan-out of every email
+        """
+        self.share_payload = share_payload
+        self.dedupe = dedupe
+        self.metrics = metrics
+        self.hooks = hooks
+        self.duplicates_removed = 0
+        self.self_sends_removed = 0
+
     @staticmethod
     def add_send_date() -> str:
         """
@@ -18,75 +54,402 @@ class EmailService:
         """
         return date.today().isoformat()
 
-    def send_email(self, email: Email) -> list[Email]:
+    def send_email(
+        self, email: Email, correlation_id: Optional[str] = None
+    ) -> list[Email]:
         """
         Send email to all recipients.
 
-        Creates a deep copy of the email for each recipient,
+        Creates a copy of the email for each recipient,
         sets the send date, and updates status based on preparation.
-        Original email is not modified.
+        Copies are deep copies, or share one frozen payload when
+        ``share_payload`` is enabled. Original email is not modified.
 
         Args:
             email: Email to send
+            correlation_id: Id of the email in hooks, e.g. the one passed to
+                Hooks.prepare for it; new if not set
 
         Returns:
             List of sent emails (one per recipient)
         """
-        sent_emails = []
+        return list(self.iter_send(email, correlation_id))
+
+    def iter_send(
+        self, email: Email, correlation_id: Optional[str] = None
+    ) -> Iterator[Email]:
+        """
+        Send email to all recipients, yielding each copy as it is produced.
+
+        Same as send_email, but only the current copy has to stay in memory.
+
+        Args:
+            email: Email to send
+            correlation_id: Id of the email in hooks, e.g. the one passed to
+                Hooks.prepare for it; new if not set
+
+        Returns:
+            Iterator of sent emails (one per recipient)
+        """
+        return self._fan_out(email, self._new_correlation_id(correlation_id))
+
+    def _new_correlation_id(self, correlation_id: Optional[str] = None) -> Optional[str]:
+        """
+        Get the correlation id of one original email if hooks are registered.
+
+        Args:
+            correlation_id: Id given by the caller
+
+        Returns:
+            The given id or a new one, None without hooks
+        """
+        if not self.hooks:
+            return None
+        return correlation_id or self.hooks.new_correlation_id()
+
+    def _fan_out(self, email: Email, correlation_id: Optional[str]) -> Iterator[Email]:
+        """
+        Fan out email into per-recipient copies, measured if enabled.
+
+        Args:
+            email: Email to send
+            correlation_id: Id passed to hooks, None without hooks
+
+        Returns:
+            Iterator of sent emails (one per recipient)
+        """
+        copies = (
+            self._iter_shared(email) if self.share_payload else self._iter_copies(email)
+        )
+        return self._measure_fan_out(copies, correlation_id)
+
+    def _measure_fan_out(
+        self, copies: Iterator[Email], correlation_id: Optional[str]
+    ) -> Iterator[Email]:
+        """
+        Report production of copies to metrics and hooks, if enabled.
+
+        Args:
+            copies: Iterator of sent emails
+            correlation_id: Id passed to hooks, None without hooks
+
+        Returns:
+            Iterator of the same sent emails
+        """
+        if self.metrics is not None:
+            copies = self.metrics.fan_out(copies)
+        if correlation_id is not None:
+            copies = self.hooks.wrap(Stage.FAN_OUT, correlation_id, copies)
+        return copies
+
+    def _iter_copies(self, email: Email) -> Iterator[Email]:
+        """
+        Fan out email into deep copies.
 
-        for recipient in email.recipients:
+        Args:
+            email: Email to send
+
+        Yields:
+            Sent emails (one per recipient)
+        """
+        for recipient in self._recipients(email):
             email_copy = deepcopy(email)
             email_copy.recipients = [recipient]
             email_copy.date = self.add_send_date()
+            email_copy.status = self._sent_status(email)
 
-            if email.status == Status.READY:
-                email_copy.status = Status.SENT
-            else:
-                email_copy.status = Status.FAILED
+            yield email_copy
 
-            sent_emails.append(email_copy)
+    def send_grouped(
+        self, email: Email, max_group_size: Optional[int] = 100
+    ) -> list[list[Email]]:
+        """
+        Send email to all recipients as delivery groups by recipient domain.
 
-        return sent_emails
+        Produces the same copies with the same statuses as send_email, but
+        bucketed so that every group can be handed to a relay as a single
+        transaction.
+
+        Args:
+            email: Email to send
+            max_group_size: Maximum copies per group (None for no limit)
+
+        Returns:
+            Delivery groups of sent emails (one per recipient)
+        """
+        return group_by_domain(self.iter_send(email), max_group_size)
+
+    def _iter_shared(self, email: Email) -> Iterator[Email]:
+        """
+        Fan out email into copies that reference one shared payload.
+
+        Args:
+            email: Email to send
+
+        Yields:
+            Sent emails (one per recipient)
+        """
+        payload = email.payload()
+        send_date = self.add_send_date()
+        status = self._sent_status(email)
+
+        for recipient in self._recipients(email):
+            yield Email.from_payload(payload, recipient, send_date, status)
+
+    def _recipients(self, email: Email) -> list[EmailAddress]:
+        """
+        Get recipients to fan out to, deduplicated if enabled.
+
+        Args:
+            email: Email to send
+
+        Returns:
+            Recipient addresses
+        """
+        if not self.dedupe:
+            return email.recipients
+        result = dedupe_recipients(email.recipients, email.sender)
+        self.duplicates_removed += result.duplicates
+        self.self_sends_removed += result.excluded
+        return result.recipients
+
+    @staticmethod
+    def _sent_status(email: Email) -> Status:
+        """
+        Get status for sent copies based on original email status.
+
+        Args:
+            email: Original email
+
+        Returns:
+            Status.SENT if email is ready, Status.FAILED otherwise
+        """
+        if email.status == Status.READY:
+            return Status.SENT
+        return Status.FAILED
 
 
 class LoggingEmailService(EmailService):
     """Email service with logging capabilities."""
 
-    def __init__(self, log_file: str = "send.log"):
+    def __init__(
+        self,
+        log_file: str = "send.log",
+        share_payload: bool = False,
+        log_writer: Optional[LogWriter] = None,
+        log_format: LogFormat = LogFormat.TEXT,
+        dedupe: bool = False,
+        metrics: Optional[Metrics] = None,
+        hooks: Optional[Hooks] = None,
+    ):
         """
         Initialize logging email service.
 
+        Without a log writer the log file is opened and closed on every call.
+
         Args:
             log_file: Path to log file
+            share_payload: If True, copies share one frozen message payload
+            log_writer: Long-lived writer (BufferedLogWriter or QueuedLogWriter)
+                to keep the log open between calls; its path takes precedence
+                over log_file
+            log_format: Log entry format: text, JSONL or binary
+            dedupe: If True, repeated recipients and the sender are skipped
+            metrics: If set, fan-out and log write times and sent copy
+                counts are recorded in it
+            hooks: If it has hooks registered, they are called around the
+                fan-out and the log writes of every email
+
+        Raises:
+            ValueError: If log writer mode does not match binary/text log format
         """
-        self.log_file = log_file
+        super().__init__(
+            share_payload=share_payload, dedupe=dedupe, metrics=metrics, hooks=hooks
+        )
+        self.log_format = LogFormat(log_format)
+        binary = self.log_format == LogFormat.BINARY
+        if log_writer is not None and log_writer.binary != binary:
+            raise ValueError(
+                f"Log writer binary={log_writer.binary} does not match "
+                f"log format {self.log_format}"
+            )
+        self.log_writer = log_writer
+        self.log_file = log_writer.path if log_writer else log_file
 
-    def send_email(self, email: Email) -> list[Email]:
+    def send_email(
+        self, email: Email, correlation_id: Optional[str] = None
+    ) -> list[Email]:
         """
         Send email with logging.
 
+        With a log writer all entries of the call are queued in one batch.
+
         Args:
             email: Email to send
+            correlation_id: Id of the email in hooks, e.g. the one passed to
+                Hooks.prepare for it; new if not set
 
         Returns:
             List of sent emails (one per recipient)
         """
-        sent_emails = super().send_email(email)
+        if self.log_writer is None:
+            return super().send_email(email, correlation_id)
 
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            for sent_email in sent_emails:
-                recipient = (
-                    sent_email.recipients[0].address
-                    if sent_email.recipients
-                    else "unknown"
-                )
-                log_entry = (
-                    f"Date: {sent_email.date}, "
-                    f"From: {sent_email.sender.address}, "
-                    f"To: {recipient}, "
-                    f"Subject: {sent_email.subject}, "
-                    f"Status: {sent_email.status}\n"
-                )
-                f.write(log_entry)
+        correlation_id = self._new_correlation_id(correlation_id)
+        sent_emails = list(self._fan_out(email, correlation_id))
+        if correlation_id is None:
+            self._write_batch(sent_emails)
+            return sent_emails
 
+        event = self.hooks.begin(Stage.LOG_WRITE, correlation_id)
+        try:
+            self._write_batch(sent_emails)
+        finally:
+            self.hooks.end(event, len(sent_emails))
         return sent_emails
+
+    def _write_batch(self, sent_emails: list[Email]) -> None:
+        """
+        Queue log entries of sent emails in the log writer in one batch.
+
+        Args:
+            sent_emails: Sent emails
+        """
+        if self.metrics is None:
+            self.log_writer.write_many(map(self.format_log_entry, sent_emails))
+        else:
+            with self.metrics.timer(Stage.LOG_WRITE, len(sent_emails)):
+                self.log_writer.write_many(map(self.format_log_entry, sent_emails))
+
+    def iter_send(
+        self, email: Email, correlation_id: Optional[str] = None
+    ) -> Iterator[Email]:
+        """
+        Send email with logging, writing each log entry as its copy is produced.
+
+        Args:
+            email: Email to send
+            correlation_id: Id of the email in hooks, e.g. the one passed to
+                Hooks.prepare for it; new if not set
+
+        Yields:
+            Sent emails (one per recipient)
+        """
+        correlation_id = self._new_correlation_id(correlation_id)
+        sent_emails = self._fan_out(email, correlation_id)
+        if self.log_writer is not None:
+            yield from self._iter_logged(
+                sent_emails, self.log_writer.write, correlation_id
+            )
+            return
+
+        if self.log_format == LogFormat.BINARY:
+            log = open(self.log_file, "ab")
+        else:
+            log = open(self.log_file, "a", encoding="utf-8")
+
+        with log as f:
+            yield from self._iter_logged(sent_emails, f.write, correlation_id)
+
+    def _iter_logged(
+        self,
+        sent_emails: Iterator[Email],
+        write: Callable[[Entry], object],
+        correlation_id: Optional[str],
+    ) -> Iterator[Email]:
+        """
+        Write a log entry for every copy before passing it on.
+
+        With metrics or hooks, the time spent formatting and writing entries
+        is reported as one log write call when the iterator ends.
+
+        Args:
+            sent_emails: Sent emails
+            write: Function writing one encoded entry
+            correlation_id: Id passed to hooks, None without hooks
+
+        Yields:
+            The same sent emails
+        """
+        if self.metrics is None and correlation_id is None:
+            for sent_email in sent_emails:
+                write(self.format_log_entry(sent_email))
+                yield sent_email
+            return
+
+        format_entry = self.format_log_entry
+        yield from self._iter_timed_writes(
+            ((sent_email, 1, (sent_email,)) for sent_email in sent_emails),
+            lambda sent_email: write(format_entry(sent_email)),
+            correlation_id,
+        )
+
+    def _iter_timed_writes(
+        self,
+        units: Iterable[tuple[Any, int, Iterable[Email]]],
+        write: Callable[[Any], object],
+        correlation_id: Optional[str],
+    ) -> Iterator[Email]:
+        """
+        Write the log entries of every unit before passing on its copies.
+
+        The time spent in write is reported to metrics and hooks as one log
+        write call when the iterator ends.
+
+        Args:
+            units: A value passed to write, the number of copies it logs
+                and the copies
+            write: Function writing the log entries of one unit
+            correlation_id: Id passed to hooks, None without hooks
+
+        Yields:
+            Copies of every unit
+        """
+        event = None
+        if correlation_id is not None:
+            event = self.hooks.begin(Stage.LOG_WRITE, correlation_id)
+        clock = self.metrics.clock if self.metrics is not None else self.hooks.clock
+        elapsed = 0.0
+        written = 0
+        try:
+            for value, count, copies in units:
+                start = clock()
+                write(value)
+                elapsed += clock() - start
+                written += count
+                yield from copies
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe(Stage.LOG_WRITE, elapsed, written)
+            if event is not None:
+                self.hooks.end(event, written, elapsed)
+
+    def format_log_entry(self, sent_email: Email) -> Entry:
+        """
+        Format log entry for a sent email in the configured log format.
+
+        Args:
+            sent_email: Single-recipient sent email
+
+        Returns:
+            Encoded log entry (bytes for the binary format)
+        """
+        return encode_record(LogRecord.from_email(sent_email), self.log_format)
+
+    def flush(self) -> None:
+        """Flush pending log entries of the log writer, if any."""
+        if self.log_writer is not None:
+            self.log_writer.flush()
+
+    def close(self) -> None:
+        """Flush and close the log writer, if any."""
+        if self.log_writer is not None:
+            self.log_writer.close()
+
+    def __enter__(self) -> "LoggingEmailService":
+        """Enter context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Close log writer on context exit."""
+        self.close()
@@ -0,0 +1,493 @@
+import asyncio
+import re
+import time
+from email.message import EmailMessage
+from email.policy import SMTP
+from typing import Callable, Optional
+
+from .email import Email
+from .transport import DeliveryError
+
+_DOT_LINE = re.compile(rb"^\.", re.MULTILINE)
+
+
+class SMTPReplyError(DeliveryError):
+    """Raised when the server answers a command with an unexpected code."""
+
+    def __init__(self, code: int, text: str):
+        """
+        Initialize error from an SMTP reply.
+
+        Args:
+            code: Reply code
+            text: Reply text
+        """
+        super().__init__(f"{code} {text}")
+        self.code = code
+        self.text = text
+
+
+def build_message(email: Email, recipient_count: int) -> bytes:
+    """
+    Build RFC 5322 message bytes for an email, dot-stuffed for DATA.
+
+    Args:
+        email: Email whose subject, body and sender are used
+        recipient_count: Number of envelope recipients sharing the message;
+            with more than one the To header is "undisclosed-recipients:;"
+
+    Returns:
+        Message bytes with CRLF line endings
+    """
+    message = EmailMessage(policy=SMTP)
+    message["From"] = email.sender.address
+    if recipient_count == 1:
+        message["To"] = email.get_recipients_str()
+    else:
+        message["To"] = "undisclosed-recipients:;"
+    message["Subject"] = email.subject
+    if email.date:
+        message["X-Send-Date"] = email.date
+    message.set_content(email.body)
+    return _DOT_LINE.sub(b"..", message.as_bytes())
+
+
+class SMTPConnection:
+    """One persistent SMTP client connection."""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Wrap an open stream; use SMTPConnection.open to connect.
+
+        Args:
+            reader: Stream reader of the connection
+            writer: Stream writer of the connection
+            clock: Monotonic time source in seconds
+        """
+        self._reader = reader
+        self._writer = writer
+        self._clock = clock
+        self.extensions: set[str] = set()
+        self.messages = 0
+        self.last_used = clock()
+        self.closed = False
+
+    @classmethod
+    async def open(
+        cls,
+        host: str,
+        port: int,
+        local_hostname: str = "localhost",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> "SMTPConnection":
+        """
+        Connect, read the greeting and introduce the client with EHLO.
+
+        Args:
+            host: Relay host
+            port: Relay port
+            local_hostname: Name sent with EHLO
+            clock: Monotonic time source in seconds
+
+        Returns:
+            Ready connection
+
+        Raises:
+            OSError: If the connection could not be opened
+            SMTPReplyError: If the server refused the session
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        connection = cls(reader, writer, clock)
+        try:
+            await connection._expect(220)
+            connection.extensions = await connection._ehlo(local_hostname)
+        except BaseException:
+            connection.abort()
+            raise
+        return connection
+
+    @property
+    def pipelining(self) -> bool:
+        """Check if the server supports command pipelining."""
+        return "PIPELINING" in self.extensions
+
+    async def _read_reply(self) -> tuple[int, str]:
+        """Read one possibly multi-line reply."""
+        lines = []
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                raise ConnectionError("SMTP server closed the connection")
+            text = line.decode("utf-8", "replace").rstrip("\r\n")
+            lines.append(text[4:])
+            if len(text) < 4 or text[3] != "-":
+                return int(text[:3]), "\n".join(lines)
+
+    async def _expect(self, *codes: int) -> str:
+        """Read a reply and raise unless its code is one of `codes`."""
+        code, text = await self._read_reply()
+        if code not in codes:
+            raise SMTPReplyError(code, text)
+        return text
+
+    async def _command(self, line: str, *codes: int) -> str:
+        """Send one command and check its reply."""
+        self._writer.write(line.encode("utf-8") + b"\r\n")
+        await self._writer.drain()
+        return await self._expect(*codes)
+
+    async def _ehlo(self, local_hostname: str) -> set[str]:
+        """Send EHLO and return advertised extension keywords."""
+        text = await self._command(f"EHLO {local_hostname}", 250)
+        return {line.split(" ", 1)[0].upper() for line in text.splitlines()[1:]}
+
+    async def noop(self) -> bool:
+        """
+        Health-check the connection with NOOP.
+
+        Returns:
+            True if the server answered 250
+        """
+        try:
+            await self._command("NOOP", 250)
+        except (OSError, DeliveryError):
+            return False
+        self.last_used = self._clock()
+        return True
+
+    async def send(
+        self, sender: str, recipients: list[str], data: bytes
+    ) -> list[Optional[str]]:
+        """
+        Send one message to several recipients in a single transaction.
+
+        MAIL FROM and all RCPT TO commands are written at once when the
+        server supports PIPELINING. A rejected transaction is reset with RSET
+        so the connection can be reused; if RSET fails it is closed.
+
+        Args:
+            sender: Envelope sender
+            recipients: Envelope recipients
+            data: Dot-stuffed message bytes with CRLF line endings
+
+        Returns:
+            Per-recipient error text, None for accepted recipients
+
+        Raises:
+            OSError: On connection errors
+            SMTPReplyError: If the server rejected the sender or the message
+        """
+        commands = [f"MAIL FROM:<{sender}>"] + [f"RCPT TO:<{r}>" for r in recipients]
+        if self.pipelining:
+            self._writer.write("".join(f"{c}\r\n" for c in commands).encode("utf-8"))
+            await self._writer.drain()
+            replies = [await self._read_reply() for _ in commands]
+        else:
+            replies = []
+            for command in commands:
+                self._writer.write(command.encode("utf-8") + b"\r\n")
+                await self._writer.drain()
+                replies.append(await self._read_reply())
+
+        (mail_code, mail_text), *rcpt_replies = replies
+        if mail_code != 250:
+            await self._reset()
+            raise SMTPReplyError(mail_code, mail_text)
+
+        errors = [
+            None if code in (250, 251) else f"{code} {text}"
+            for code, text in rcpt_replies
+        ]
+        if all(errors):
+            await self._reset()
+            return errors
+
+        try:
+            await self._command("DATA", 354)
+            if not data.endswith(b"\r\n"):
+                data += b"\r\n"
+            self._writer.write(data + b".\r\n")
+            await self._writer.drain()
+            await self._expect(250)
+        except SMTPReplyError:
+            await self._reset()
+            raise
+
+        self.messages += 1
+        self.last_used = self._clock()
+        return errors
+
+    async def _reset(self) -> None:
+        """Abort the current transaction with RSET, closing the connection if it fails."""
+        try:
+            await self._command("RSET", 250)
+        except (OSError, DeliveryError):
+            self.abort()
+
+    async def quit(self) -> None:
+        """Send QUIT and close the connection."""
+        if self.closed:
+            return
+        try:
+            await self._command("QUIT", 221)
+        except (OSError, DeliveryError):
+            pass
+        await self.close()
+
+    def abort(self) -> None:
+        """Close the socket without waiting."""
+        self.closed = True
+        self._writer.close()
+
+    async def close(self) -> None:
+        """Close the socket."""
+        self.abort()
+        try:
+            await self._writer.wait_closed()
+        except OSError:
+            pass
+
+
+class SMTPConnectionPool:
+    """Bounded pool of persistent SMTP connections to one relay."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int = 4,
+        idle_timeout: float = 60.0,
+        health_check_interval: float = 5.0,
+        max_messages: int = 1000,
+        local_hostname: str = "localhost",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize empty pool.
+
+        Args:
+            host: Relay host
+            port: Relay port
+            size: Maximum number of open connections
+            idle_timeout: Idle connections older than this many seconds are recycled
+            health_check_interval: Connections idle longer than this are
+                checked with NOOP before reuse
+            max_messages: Connections are recycled after this many messages
+            local_hostname: Name sent with EHLO
+            clock: Monotonic time source in seconds
+        """
+        self.host = host
+        self.port = port
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.max_messages = max_messages
+        self.local_hostname = local_hostname
+        self._clock = clock
+        self._idle: list[SMTPConnection] = []
+        self._slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def acquire(self) -> SMTPConnection:
+        """
+        Get a healthy connection, reusing an idle one when possible.
+
+        Returns:
+            Connection that must be given back with release()
+        """
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                idle = self._clock() - connection.last_used
+                if idle > self.idle_timeout or connection.messages >= self.max_messages:
+                    await connection.quit()
+                    continue
+                if idle > self.health_check_interval and not await connection.noop():
+                    await connection.close()
+                    continue
+                return connection
+
+            connection = await SMTPConnection.open(
+                self.host, self.port, self.local_hostname, self._clock
+            )
+            self.opened += 1
+            return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, connection: SMTPConnection, reusable: bool = True) -> None:
+        """
+        Give a connection back to the pool.
+
+        Args:
+            connection: Connection from acquire()
+            reusable: False if the connection failed and must be closed
+        """
+        try:
+            if reusable and not connection.closed:
+                self._idle.append(connection)
+            else:
+                await connection.close()
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        """Quit all idle connections."""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await connection.quit()
+
+
+class SMTPTransport:
+    """
+    Transport delivering through a pool of persistent SMTP connections.
+
+    Concurrent deliver() calls for copies with the same sender, subject and
+    body are collected for batch_delay seconds and sent as one transaction
+    with several RCPT TO commands.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 25,
+        pool_size: int = 4,
+        max_recipients: int = 100,
+        batch_delay: float = 0.0,
+        **pool_options,
+    ):
+        """
+        Initialize transport.
+
+        Args:
+            host: Relay host
+            port: Relay port
+            pool_size: Maximum number of open connections
+            max_recipients: Maximum RCPT TO commands per transaction
+            batch_delay: Seconds to wait for more copies of the same message
+            pool_options: Extra SMTPConnectionPool options
+        """
+        self.pool = SMTPConnectionPool(host, port, size=pool_size, **pool_options)
+        self.max_recipients = max_recipients
+        self.batch_delay = batch_delay
+        self.transactions = 0
+        self._pending: dict[tuple[str, str, str], list] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def deliver(self, email: Email) -> None:
+        """
+        Deliver a single-recipient email, batched with matching copies.
+
+        Args:
+            email: Email to deliver
+
+        Raises:
+            DeliveryError: If the recipient or the message was rejected
+        """
+        loop = asyncio.get_running_loop()
+        key = (email.sender.address, email.subject, email.body)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = []
+            self._spawn(self._flush_later(key))
+
+        future = loop.create_future()
+        batch.append((email, future))
+        if len(batch) >= self.max_recipients:
+            del self._pending[key]
+            self._spawn(self._send_batch(batch))
+
+        await future
+
+    def _spawn(self, coroutine) -> None:
+        """Run a background task and keep a reference until it finishes."""
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_later(self, key: tuple[str, str, str]) -> None:
+        """Send the pending batch for a message after the batch delay."""
+        await asyncio.sleep(self.batch_delay)
+        batch = self._pending.pop(key, None)
+        if batch:
+            await self._send_batch(batch)
+
+    async def _send_batch(self, batch: list) -> None:
+        """
+        Send a batch and resolve the futures of its copies.
+
+        An unexpected error, such as a header that cannot be encoded or a
+        malformed reply, is set on every waiting future instead of being
+        lost in the background task.
+        """
+        try:
+            errors = await self._transaction([email for email, _ in batch])
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), error in zip(batch, errors):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(DeliveryError(error))
+
+    async def deliver_batch(self, emails: list[Email]) -> list[bool]:
+        """
+        Deliver copies of one message in transactions of up to max_recipients.
+
+        Args:
+            emails: Single-recipient copies sharing sender, subject and body
+
+        Returns:
+            Per-copy delivery result
+        """
+        results = []
+        for start in range(0, len(emails), self.max_recipients):
+            errors = await self._transaction(emails[start : start + self.max_recipients])
+            results.extend(error is None for error in errors)
+        return results
+
+    async def _transaction(self, emails: list[Email]) -> list[Optional[str]]:
+        """Send one message to the recipients of all copies."""
+        recipients = [email.recipients[0].address for email in emails]
+        data = build_message(emails[0], len(recipients))
+        try:
+            connection = await self.pool.acquire()
+        except (OSError, DeliveryError) as error:
+            return [str(error)] * len(emails)
+
+        reusable = True
+        try:
+            errors = await connection.send(emails[0].sender.address, recipients, data)
+            self.transactions += 1
+        except SMTPReplyError as error:
+            errors = [str(error)] * len(emails)
+        except (OSError, DeliveryError) as error:
+            reusable = False
+            errors = [str(error)] * len(emails)
+        except BaseException:
+            # Also on cancellation, e.g. by a timeout around deliver_batch:
+            # replies of the interrupted transaction may still be in flight
+            reusable = False
+            connection.abort()
+            raise
+        finally:
+            await self.pool.release(connection, reusable)
+        return errors
+
+    async def close(self) -> None:
+        """Wait for pending batches and quit pooled connections."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.pool.close()
@@ -0,0 +1,105 @@
+import asyncio
+import random
+from typing import Optional, Protocol
+
+from .email import Email
+
+
+class DeliveryError(Exception):
+    """Raised by a transport when a message could not be delivered."""
+
+
+class Transport(Protocol):
+    """Delivery backend used by AsyncEmailService."""
+
+    async def deliver(self, email: Email) -> None:
+        """
+        Deliver a single-recipient email.
+
+        Raises:
+            DeliveryError: If the message was not accepted
+        """
+        ...
+
+
+class BatchTransport(Transport, Protocol):
+    """Transport that can also deliver several copies in one call."""
+
+    async def deliver_batch(self, emails: list[Email]) -> list[bool]:
+        """
+        Deliver single-recipient copies of one message in one call.
+
+        Returns:
+            Per-copy delivery result
+        """
+        ...
+
+
+class FakeTransport:
+    """In-process transport with configurable latency and failure rate."""
+
+    def __init__(
+        self,
+        latency: float = 0.01,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize fake transport.
+
+        Args:
+            latency: Delivery time in seconds
+            jitter: Maximum extra random delivery time in seconds
+            failure_rate: Probability of a delivery failing
+            seed: Random seed for reproducible jitter and failures
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.delivered: list[str] = []
+        self.calls = 0
+
+    async def deliver(self, email: Email) -> None:
+        """
+        Simulate delivery of a single-recipient email.
+
+        Args:
+            email: Email to deliver
+
+        Raises:
+            DeliveryError: For the configured share of deliveries
+        """
+        self.calls += 1
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.failure_rate:
+            raise DeliveryError(f"Delivery failed: {email.get_recipients_str()}")
+        self.delivered.append(email.get_recipients_str())
+
+    async def deliver_batch(self, emails: list[Email]) -> list[bool]:
+        """
+        Simulate one delivery call for several single-recipient copies.
+
+        The call takes the latency of a single delivery; every copy fails
+        independently with the configured probability.
+
+        Args:
+            emails: Emails to deliver
+
+        Returns:
+            Per-copy delivery result
+        """
+        self.calls += 1
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        results = []
+        for email in emails:
+            delivered = self._random.random() >= self.failure_rate
+            if delivered:
+                self.delivered.append(email.get_recipients_str())
+            results.append(delivered)
+        return results
@@ -1,11 +1,111 @@
+from typing import Iterable, Iterator, TextIO
+
+# Characters str.split() breaks on besides the plain space (str.isspace())
+_ASCII_WHITESPACE = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f"
+_WHITESPACE = _ASCII_WHITESPACE + (
+    "\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007"
+    "\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000"
+)
+
+# Shorter texts are cheaper to split and join than to scan for whitespace
+_FAST_PATH_MIN_LENGTH = 64
+# Texts longer than this are cleaned chunk by chunk to bound temporary lists
+_CHUNK_SIZE = 1 << 20
+_STREAM_CHUNK_SIZE = 1 << 16
+
+
+def is_clean_text(text: str) -> bool:
+    """
+    Check whether text is already normalized by clean_text.
+
+    Scans for double spaces, edge spaces and any whitespace other than a
+    plain space without building intermediate lists.
+
+    Args:
+        text: Text to check
+
+    Returns:
+        True if clean_text(text) == text
+    """
+    if "  " in text or text[:1] == " " or text[-1:] == " ":
+        return False
+    whitespace = _ASCII_WHITESPACE if text.isascii() else _WHITESPACE
+    return not any(char in text for char in whitespace)
+
+
+def iter_clean_text(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Normalize whitespace of text given in chunks.
+
+    Words split across chunk boundaries are joined back, so the pieces
+    concatenate to clean_text of the whole text while only one chunk and
+    one partial word are held at a time.
+
+    Args:
+        chunks: Consecutive pieces of the text
+
+    Yields:
+        Pieces of the cleaned text
+    """
+    partial = ""
+    started = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        words = chunk.split()
+        if words and not chunk[0].isspace():
+            words[0] = partial + words[0]
+        elif partial:
+            words.insert(0, partial)
+        partial = words.pop() if words and not chunk[-1].isspace() else ""
+        if words:
+            yield (" " if started else "") + " ".join(words)
+            started = True
+    if partial:
+        yield (" " if started else "") + partial
+
+
+def clean_stream(
+    source: TextIO, target: TextIO, chunk_size: int = _STREAM_CHUNK_SIZE
+) -> int:
+    """
+    Normalize whitespace of a text stream with bounded memory.
+
+    Args:
+        source: Readable text stream
+        target: Writable text stream
+        chunk_size: Characters read at a time
+
+    Returns:
+        Number of characters written
+    """
+    written = 0
+    for piece in iter_clean_text(iter(lambda: source.read(chunk_size), "")):
+        written += target.write(piece)
+    return written
+
+
 def clean_text(text: str) -> str:
     """
     Replace tabs and newlines with spaces, trim excess whitespace.
 
+    Already clean text is returned as is; long text is processed in chunks.
+
     Args:
         text: Text to clean
 
     Returns:
         Cleaned text with normalized whitespace
     """
-    return " ".join(text.split())
+    if len(text) < _FAST_PATH_MIN_LENGTH:
+        return " ".join(text.split())
+    if is_clean_text(text):
+        return text
+    if len(text) <= _CHUNK_SIZE:
+        return " ".join(text.split())
+    return "".join(
+        iter_clean_text(
+            text[start : start + _CHUNK_SIZE]
+            for start in range(0, len(text), _CHUNK_SIZE)
+        )
+    )
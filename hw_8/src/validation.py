@@ -0,0 +1,82 @@
+import re
+from functools import lru_cache
+from typing import Iterable, Optional
+
+
+class EmailValidator:
+    """Precompiled single-pass email validator for a set of domain zones."""
+
+    def __init__(self, zones: Iterable[str]):
+        """
+        Compile validation pattern for the given domain zones.
+
+        An address is valid if it has exactly one "@", a non-empty login
+        and a domain that ends with one of the zones with at least one
+        character before the zone.
+
+        Args:
+            zones: Domain zones including the leading dot, e.g. ".com"
+        """
+        self.zones = tuple(zones)
+        alternatives = "|".join(
+            re.escape(zone) for zone in sorted(self.zones, key=len, reverse=True)
+        )
+        pattern = re.compile(rf"[^@]+@[^@]+(?:{alternatives})")
+        self._fullmatch = pattern.fullmatch if self.zones else lambda address: None
+
+    def is_valid(self, address: str) -> bool:
+        """
+        Check an already normalized address.
+
+        Args:
+            address: Address in lowercase without surrounding whitespace
+
+        Returns:
+            True if address is valid, False otherwise
+        """
+        return self._fullmatch(address) is not None
+
+    def normalize(self, address: str) -> Optional[str]:
+        """
+        Normalize address and validate it.
+
+        Args:
+            address: Raw address
+
+        Returns:
+            Normalized address, or None if it is invalid
+        """
+        normalized = address.strip().lower()
+        if self._fullmatch(normalized) is None:
+            return None
+        return normalized
+
+    def validate_many(self, addresses: Iterable[str]) -> tuple[list[bool], list[str]]:
+        """
+        Normalize and validate a batch of addresses without raising.
+
+        Args:
+            addresses: Raw addresses
+
+        Returns:
+            Tuple of (validity mask, normalized addresses), both aligned
+            with the input rows
+        """
+        fullmatch = self._fullmatch
+        normalized = [address.strip().lower() for address in addresses]
+        mask = [fullmatch(address) is not None for address in normalized]
+        return mask, normalized
+
+
+@lru_cache(maxsize=None)
+def get_validator(zones: tuple[str, ...]) -> EmailValidator:
+    """
+    Get shared validator for the given domain zones.
+
+    Args:
+        zones: Domain zones including the leading dot
+
+    Returns:
+        Compiled validator, built once per zones tuple
+    """
+    return EmailValidator(zones)
@@ -0,0 +1,127 @@
+"""
+Minimal in-process SMTP server for tests and benchmarks.
+
+Supports EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP and QUIT and advertises
+PIPELINING. Received messages are kept in memory.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+@dataclass
+class ReceivedMessage:
+    """Message accepted by the local SMTP server."""
+
+    sender: str
+    recipients: list[str]
+    data: bytes
+
+
+@dataclass
+class LocalSMTPServer:
+    """Asyncio SMTP server listening on a free localhost port."""
+
+    pipelining: bool = True
+    reject: Callable[[str], bool] = lambda recipient: False
+    reject_message: Callable[[bytes], bool] = lambda data: False
+    latency: float = 0.0
+    host: str = "127.0.0.1"
+    port: int = 0
+    messages: list[ReceivedMessage] = field(default_factory=list)
+    connections: int = 0
+    commands: int = 0
+    resets: int = 0
+    _server: Optional[asyncio.AbstractServer] = None
+
+    async def __aenter__(self) -> "LocalSMTPServer":
+        """Start listening."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        """Stop listening."""
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def recipients(self) -> list[str]:
+        """All accepted recipients in order of arrival."""
+        return [r for message in self.messages for r in message.recipients]
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve one client session."""
+        self.connections += 1
+
+        def reply(line: str) -> None:
+            writer.write(line.encode("utf-8") + b"\r\n")
+
+        reply("220 localhost ESMTP test server")
+        sender: Optional[str] = None
+        recipients: list[str] = []
+        try:
+            while line := await reader.readline():
+                self.commands += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                command = line.decode("utf-8").rstrip("\r\n")
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    reply("250-localhost")
+                    reply("250-PIPELINING" if self.pipelining else "250-8BITMIME")
+                    reply("250 SMTPUTF8")
+                elif verb == "HELO":
+                    reply("250 localhost")
+                elif verb == "MAIL":
+                    sender, recipients = command[10:].strip("<>"), []
+                    reply("250 OK")
+                elif verb == "RCPT":
+                    recipient = command[8:].strip("<>")
+                    if sender is None:
+                        reply("503 Need MAIL first")
+                    elif self.reject(recipient):
+                        reply("550 No such user")
+                    else:
+                        recipients.append(recipient)
+                        reply("250 OK")
+                elif verb == "DATA":
+                    if not recipients:
+                        reply("554 No valid recipients")
+                        continue
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    lines = []
+                    while (data_line := await reader.readline()) != b".\r\n":
+                        if not data_line:
+                            return
+                        if data_line[:2] == b"..":
+                            data_line = data_line[1:]
+                        lines.append(data_line)
+                    message = ReceivedMessage(sender, recipients, b"".join(lines))
+                    sender, recipients = None, []
+                    if self.reject_message(message.data):
+                        reply("554 Message rejected")
+                    else:
+                        self.messages.append(message)
+                        reply("250 OK queued")
+                elif verb == "RSET":
+                    self.resets += 1
+                    sender, recipients = None, []
+                    reply("250 OK")
+                elif verb == "NOOP":
+                    reply("250 OK")
+                elif verb == "QUIT":
+                    reply("221 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    reply("502 Command not implemented")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -1,12 +1,59 @@
+import asyncio
+import copy
+import io
 import os
+import pickle
+import pstats
+import threading
+import time
+import urllib.request
 from datetime import date
 
 import pytest
 
+from src.async_service import AsyncEmailService
+from src.batch import EmailBatch
 from src.email import Email
-from src.email_address import EmailAddress
+from src.email_address import AddressPool, EmailAddress
+from src.hooks import Hooks, ProfileHook
+from src.log_format import LogFormat, LogRecord, iter_log_records
+from src.log_index import LogIndex
+from src.log_writer import BufferedLogWriter, QueuedLogWriter
+from src.metrics import Histogram, Metrics, Stage
+from src.outbox import Outbox, OutboxEmailService
+from src.parallel import ParallelEmailService
+from src.retry import AsyncRetryQueue, LogDeadLetterSink, RetryPolicy, RetryQueue
+from src.scheduler import Priority, SendScheduler, TokenBucket
 from src.service import EmailService, LoggingEmailService
+from src.smtp_transport import SMTPTransport
 from src.status import Status
+from src.transport import DeliveryError, FakeTransport
+from src.utils import clean_stream, clean_text, is_clean_text, iter_clean_text
+from src.validation import EmailValidator
+from tests.smtp_server import LocalSMTPServer
+
+
+def make_email(recipients=1, **fields):
+    """
+    Build ready email from alice@example.com with subject "Test" and body "Hello".
+
+    Args:
+        recipients: Number of userN@example.com recipients, or their addresses
+        **fields: Email fields overriding the defaults
+
+    Returns:
+        New email
+    """
+    if isinstance(recipients, int):
+        recipients = [f"user{i}@example.com" for i in range(recipients)]
+    fields = {
+        "subject": "Test",
+        "body": "Hello",
+        "sender": EmailAddress("alice@example.com"),
+        "status": Status.READY,
+        **fields,
+    }
+    return Email(recipients=[EmailAddress(r) for r in recipients], **fields)
 
 
 class TestEmailAddress:
@@ -48,6 +95,159 @@ class TestEmailAddress:
             email = EmailAddress(email_str)
             assert email.address == email_str
 
+    def test_login_and_domain(self):
+        """Test cached login and domain parts."""
+        email = EmailAddress("alice@example.com")
+        assert email.login == "alice"
+        assert email.domain == "example.com"
+        assert email.masked is email.masked
+
+    def test_immutable(self):
+        """Test EmailAddress cannot be modified and has no instance dict."""
+        email = EmailAddress("alice@example.com")
+        with pytest.raises(AttributeError):
+            email._address = "bob@example.com"
+        with pytest.raises(AttributeError):
+            email.extra = 1
+        assert not hasattr(email, "__dict__")
+
+    def test_copy_and_pickle(self):
+        """Test copies share the instance and pickling round-trips."""
+        email = EmailAddress("alice@example.com")
+        assert copy.deepcopy(email) is email
+        restored = pickle.loads(pickle.dumps(email))
+        assert restored == email
+        assert hash(restored) == hash(email)
+        assert restored.masked == "al***@example.com"
+
+    def test_validate_many(self):
+        """Test bulk validation returns mask and normalized rows."""
+        addresses = [" Bob@Example.COM ", "user@example.org", "@mail.ru", "a@b.ru"]
+
+        mask, normalized = EmailAddress.validate_many(addresses)
+
+        assert mask == [True, False, False, True]
+        assert normalized == ["bob@example.com", "user@example.org", "@mail.ru", "a@b.ru"]
+        array_mask, _ = EmailAddress.validate_many(iter(addresses), as_array=True)
+        assert list(array_mask) == [1, 0, 0, 1]
+
+    def test_parse_many(self):
+        """Test bulk parsing creates objects only for valid rows."""
+        parsed = EmailAddress.parse_many(["Bob@Example.com", "bad", "a@b.ru"])
+
+        assert parsed == [EmailAddress("bob@example.com"), None, EmailAddress("a@b.ru")]
+
+
+class TestAddressPool:
+    """Tests for EmailAddress interning."""
+
+    def test_of_returns_shared_instance(self):
+        """Test EmailAddress.of returns one instance per normalized address."""
+        first = EmailAddress.of("bob@example.com")
+
+        assert EmailAddress.of("bob@example.com") is first
+        assert EmailAddress.of("  BOB@Example.com ") is first
+        assert first == EmailAddress("bob@example.com")
+
+    def test_invalid_address_not_pooled(self):
+        """Test invalid address raises and is not cached."""
+        pool = AddressPool()
+        with pytest.raises(ValueError):
+            pool.get("user@example.org")
+        assert pool.info().currsize == 0
+
+    def test_counters_and_eviction(self):
+        """Test hit, miss and eviction counters of a bounded pool."""
+        pool = AddressPool(maxsize=2)
+        bob = pool.get("bob@example.com")
+        assert pool.get("Bob@Example.com") is bob
+        assert pool.get("bob@example.com") is bob
+        pool.get("eve@example.com")
+
+        info = pool.info()
+        assert (info.hits, info.misses) == (2, 2)
+        assert info.evictions == 1
+        assert info.currsize == 2
+
+        pool.clear()
+        assert pool.info() == (0, 0, 0, 2, 0)
+
+
+class TestEmailValidator:
+    """Tests for EmailValidator class."""
+
+    @pytest.mark.parametrize(
+        "address, expected",
+        [
+            ("user@gmail.com", True),
+            ("user@site.net", True),
+            ("a@b.ru", True),
+            ("usergmail.com", False),
+            ("user@domain", False),
+            ("user@domain.org", False),
+            ("@mail.ru", False),
+            ("name@.com", False),
+            ("name@domain.comm", False),
+            ("a@b@c.com", False),
+            ("", False),
+        ],
+    )
+    def test_is_valid(self, address, expected):
+        """Test validation of normalized addresses."""
+        validator = EmailValidator((".com", ".ru", ".net"))
+        assert validator.is_valid(address) is expected
+
+    def test_normalize(self):
+        """Test normalize returns cleaned address or None."""
+        validator = EmailValidator((".com", ".ru", ".net"))
+        assert validator.normalize(" User@Site.NET ") == "user@site.net"
+        assert validator.normalize("user@domain.org") is None
+
+    def test_custom_zones(self):
+        """Test validator built from other domain zones."""
+        validator = EmailValidator((".org", ".co.uk"))
+        assert validator.is_valid("user@example.co.uk")
+        assert not validator.is_valid("user@example.com")
+        assert not EmailValidator(()).is_valid("user@example.com")
+
+
+class TestCleanText:
+    """Tests for clean_text and its streaming variants."""
+
+    TEXTS = [
+        "",
+        "   ",
+        "Hello",
+        " Привет,\tмир!\n\nКак   дела? ",
+        "Hello\xa0world\u3000" * 20,
+        ("Quarterly  report\r\nfor Q1 " * 5000) + "end",
+    ]
+
+    def test_identical_to_split_join(self):
+        """Test output matches split/join on dirty, clean, short and long text."""
+        for text in self.TEXTS:
+            expected = " ".join(text.split())
+            assert clean_text(text) == expected
+            assert clean_text(expected) == expected
+            assert is_clean_text(expected)
+
+    def test_clean_text_is_returned_unchanged(self):
+        """Test already clean long text is returned without a copy."""
+        text = "Привет, мир! Hello world. " * 10 + "end"
+        assert clean_text(text) is text
+        assert not is_clean_text(text + "\n")
+
+    def test_chunks_and_stream(self):
+        """Test words split across chunk boundaries are joined back."""
+        for text in self.TEXTS:
+            expected = " ".join(text.split())
+            chunks = [text[i : i + 3] for i in range(0, len(text), 3)]
+            assert "".join(iter_clean_text(chunks)) == expected
+
+            target = io.StringIO()
+            clean_stream(io.StringIO(text), target, chunk_size=5)
+            assert target.getvalue() == expected
+
 
 class TestEmail:
     """Tests for Email dataclass."""
@@ -161,6 +361,18 @@ class TestEmail:
         assert email.subject == "Test Subject"
         assert email.short_body is not None
 
+    def test_email_is_slotted(self):
+        """Test Email has no per-instance dict and rejects unknown fields."""
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=EmailAddress("bob@example.com"),
+        )
+        assert not hasattr(email, "__dict__")
+        with pytest.raises(AttributeError):
+            email.priority = 1
+
     def test_prepare_invalid_email(self):
         """Test preparing invalid email."""
         sender = EmailAddress("alice@example.com")
@@ -174,6 +386,152 @@ class TestEmail:
         email.prepare()
         assert email.status == Status.INVALID
 
+    def test_repeated_prepare_skips_unchanged_fields(self, monkeypatch):
+        """Test prepare only re-cleans fields mutated since the last call."""
+        calls = []
+        monkeypatch.setattr(
+            "src.email.clean_text",
+            lambda text: calls.append(text) or " ".join(text.split()),
+        )
+        email = Email(
+            subject="Test\n\tSubject",
+            body="Hello\n\tWorld, this is long",
+            sender=EmailAddress("alice@example.com"),
+            recipients=EmailAddress("bob@example.com"),
+        )
+
+        email.prepare().prepare()
+        assert len(calls) == 2
+
+        email.body = "  Bye  "
+        email.prepare()
+        assert len(calls) == 3
+        assert email.body == email.short_body == "Bye"
+        assert email.status == Status.READY
+
+        email.short_body = "stale"
+        email.recipients.clear()
+        email.prepare()
+        assert len(calls) == 3
+        assert email.short_body == "Bye"
+        assert email.status == Status.INVALID
+
+    def test_recipients_str_cache_follows_mutation(self):
+        """Test cached recipient string is rebuilt after the list changes."""
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=EmailAddress("bob@example.com"),
+        )
+        assert email.get_recipients_str() == "bob@example.com"
+        email.recipients.append(EmailAddress("carol@example.com"))
+        assert email.get_recipients_str() == "bob@example.com, carol@example.com"
+        email.recipients[0] = EmailAddress("dave@example.com")
+        assert email.get_recipients_str() == "dave@example.com, carol@example.com"
+        assert copy.deepcopy(email) == email
+
+    def test_single_recipient_str_is_not_cached(self):
+        """Test per-recipient copies keep no cache after str()."""
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=EmailAddress("bob@example.com"),
+            status=Status.SENT,
+        )
+        assert "to=[bob@example.com]" in str(email)
+        assert email._cache is None
+
+
+class TestDedupe:
+    """Tests for recipient deduplication."""
+
+    def test_dedupe_recipients(self):
+        """Test duplicates and sender are dropped keeping first occurrences."""
+        sender = EmailAddress("alice@example.com")
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=sender,
+            recipients=[
+                EmailAddress("bob@example.com"),
+                EmailAddress(" Alice@Example.com "),
+                EmailAddress("carol@example.com"),
+                EmailAddress("BOB@example.com"),
+                EmailAddress("bob@example.com"),
+            ],
+        )
+
+        result = email.dedupe_recipients()
+
+        assert [r.address for r in email.recipients] == [
+            "bob@example.com",
+            "carol@example.com",
+        ]
+        assert (result.duplicates, result.excluded) == (2, 1)
+
+    def test_service_dedupe_fan_out(self):
+        """Test deduplicating service sends one copy per unique recipient."""
+        recipients = [
+            EmailAddress("bob@example.com"),
+            EmailAddress("bob@example.com"),
+            EmailAddress("alice@example.com"),
+        ]
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=recipients,
+            status=Status.READY,
+        )
+
+        for share_payload in (False, True):
+            service = EmailService(share_payload=share_payload, dedupe=True)
+            sent_emails = service.send_email(email)
+
+            assert [e.recipients for e in sent_emails] == [[recipients[0]]]
+            assert service.duplicates_removed == 1
+            assert service.self_sends_removed == 1
+        assert len(email.recipients) == 3
+        assert len(EmailService().send_email(email)) == 3
+
+
+class TestEmailBatch:
+    """Tests for EmailBatch class."""
+
+    def test_prepare_matches_email_prepare(self):
+        """Test batch prepare gives the same rows as Email.prepare."""
+        sender = EmailAddress("alice@example.com")
+        recipient = EmailAddress("bob@example.com")
+        emails = [
+            Email("Test\n\tSubject", "Hello\n\tWorld, long body", sender, recipient),
+            Email("", "Hello", sender, recipient),
+            Email("Test", " \t\n", sender, recipient),
+            Email("Test", "Short", sender, []),
+            Email("  Привет  ", "Текст\u00a0письма", sender, recipient),
+        ]
+
+        batch = EmailBatch.from_emails(emails).prepare()
+
+        assert batch.to_emails() == [email.prepare() for email in emails]
+        assert batch.statuses[:2] == [Status.READY, Status.INVALID]
+
+    def test_round_trip_keeps_send_dates(self):
+        """Test emails converted to a batch and back keep their send dates."""
+        emails = [make_email(1, date="2024-01-15"), make_email(2)]
+
+        batch = EmailBatch.from_emails(emails)
+
+        assert batch.dates == ["2024-01-15", None]
+        assert batch.to_emails() == emails
+        assert batch.prepare()[0].date == "2024-01-15"
+
+    def test_column_lengths_must_match(self):
+        """Test batch rejects columns of different lengths."""
+        with pytest.raises(ValueError):
+            EmailBatch(["a"], [], [], [])
+
 
 class TestEmailService:
     """Tests for EmailService class."""
@@ -246,6 +604,79 @@ class TestEmailService:
         assert len(sent_emails) == 1
         assert sent_emails[0].status == Status.FAILED
 
+    def test_send_email_shared_payload(self):
+        """Test shared payload fan-out matches deep copy fan-out."""
+        sender = EmailAddress("alice@example.com")
+        recipients = [
+            EmailAddress("bob@example.com"),
+            EmailAddress("charlie@example.ru"),
+        ]
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=sender,
+            recipients=recipients,
+            status=Status.READY,
+        )
+
+        shared = EmailService(share_payload=True).send_email(email)
+        copied = EmailService().send_email(email)
+
+        assert shared == copied
+        assert shared[0].body is shared[1].body
+        assert shared[0].sender is sender
+        assert shared[0].recipients is not shared[1].recipients
+        assert email.recipients == recipients
+        assert email.date is None
+        assert email.status == Status.READY
+
+    def test_iter_send_yields_copies_lazily(self):
+        """Test streaming send yields one copy per recipient in order."""
+        service = EmailService()
+        sender = EmailAddress("alice@example.com")
+        recipients = [
+            EmailAddress("bob@example.com"),
+            EmailAddress("charlie@example.ru"),
+        ]
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=sender,
+            recipients=recipients,
+            status=Status.READY,
+        )
+
+        sent_iter = service.iter_send(email)
+        first = next(sent_iter)
+
+        assert first.recipients == [recipients[0]]
+        assert first.status == Status.SENT
+        assert [e.recipients for e in sent_iter] == [[recipients[1]]]
+
+    def test_send_grouped(self):
+        """Test copies are grouped by recipient domain and split by max size."""
+        service = EmailService(share_payload=True)
+        domains = ["gmail.com", "mail.ru", "gmail.com", "bk.ru", "gmail.com"]
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=[EmailAddress(f"u{i}@{d}") for i, d in enumerate(domains)],
+            status=Status.READY,
+        )
+
+        groups = service.send_grouped(email, max_group_size=2)
+
+        assert [[e.recipients[0].address for e in group] for group in groups] == [
+            ["u0@gmail.com", "u2@gmail.com"],
+            ["u4@gmail.com"],
+            ["u1@mail.ru"],
+            ["u3@bk.ru"],
+        ]
+        assert all(e.status == Status.SENT for group in groups for e in group)
+        with pytest.raises(ValueError):
+            service.send_grouped(email, max_group_size=0)
+
 
 class TestLoggingEmailService:
     """Tests for LoggingEmailService class."""
@@ -276,8 +707,1274 @@ class TestLoggingEmailService:
         assert "Test" in log_content
         assert Status.SENT in log_content
 
+    def test_logging_iter_send(self, tmp_path):
+        """Test streaming send writes one log line per yielded copy."""
+        log_file = tmp_path / "test_send.log"
+        service = LoggingEmailService(str(log_file))
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=[
+                EmailAddress("bob@example.com"),
+                EmailAddress("charlie@example.ru"),
+            ],
+            status=Status.READY,
+        )
+
+        sent_emails = list(service.iter_send(email))
+
+        lines = log_file.read_text(encoding="utf-8").splitlines()
+        assert len(sent_emails) == 2
+        assert len(lines) == 2
+        assert "To: bob@example.com" in lines[0]
+        assert "To: charlie@example.ru" in lines[1]
+
+    def test_logging_with_buffered_writer(self, tmp_path):
+        """Test long-lived writer keeps entries until flushed on close."""
+        log_file = tmp_path / "test_send.log"
+        writer = BufferedLogWriter(
+            str(log_file), flush_every=None, flush_interval_ms=None
+        )
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=[
+                EmailAddress("bob@example.com"),
+                EmailAddress("charlie@example.ru"),
+            ],
+            status=Status.READY,
+        )
+
+        with LoggingEmailService(log_writer=writer) as service:
+            service.send_email(email)
+            list(service.iter_send(email))
+            assert log_file.read_text(encoding="utf-8") == ""
+
+        assert writer.closed
+        lines = log_file.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 4
+        assert service.log_file == str(log_file)
+
     def test_cleanup_log_file(self):
         """Clean up log file after tests."""
         log_file = "send.log"
         if os.path.exists(log_file):
             os.remove(log_file)
+
+
+class TestBufferedLogWriter:
+    """Tests for BufferedLogWriter class."""
+
+    def test_flush_every_n_entries(self, tmp_path):
+        """Test writer flushes once the pending entry limit is reached."""
+        log_file = tmp_path / "writer.log"
+        with BufferedLogWriter(
+            str(log_file), flush_every=2, flush_interval_ms=None
+        ) as writer:
+            writer.write("a\n")
+            assert log_file.read_text(encoding="utf-8") == ""
+            writer.write("b\n")
+            assert log_file.read_text(encoding="utf-8") == "a\nb\n"
+
+    def test_flush_interval(self, tmp_path):
+        """Test writer flushes on write when the flush interval has passed."""
+        log_file = tmp_path / "writer.log"
+        now = [0.0]
+        writer = BufferedLogWriter(
+            str(log_file),
+            flush_every=None,
+            flush_interval_ms=100_000,
+            clock=lambda: now[0],
+        )
+        writer.write("a\n")
+        assert log_file.read_text(encoding="utf-8") == ""
+
+        now[0] = 200.0
+        writer.write("b\n")
+        assert log_file.read_text(encoding="utf-8") == "a\nb\n"
+        writer.close()
+
+    def test_flush_interval_without_writes(self, tmp_path):
+        """Test the timer flushes the last entries when no write follows them."""
+        log_file = tmp_path / "writer.log"
+        with BufferedLogWriter(
+            str(log_file), flush_every=None, flush_interval_ms=10
+        ) as writer:
+            writer.write("a\n")
+            deadline = time.monotonic() + 5
+            while (
+                log_file.read_text(encoding="utf-8") == "" and time.monotonic() < deadline
+            ):
+                time.sleep(0.01)
+            assert log_file.read_text(encoding="utf-8") == "a\n"
+
+
+class TestQueuedLogWriter:
+    """Tests for QueuedLogWriter class."""
+
+    def test_flush_writes_all_queued_entries(self, tmp_path):
+        """Test flush waits until the writer thread wrote every entry."""
+        log_file = tmp_path / "queued.log"
+        writer = QueuedLogWriter(str(log_file), batch_size=2)
+        for i in range(5):
+            writer.write(f"{i}\n")
+        writer.write_many(["5\n", "6\n"])
+
+        writer.flush()
+
+        assert log_file.read_text(encoding="utf-8").splitlines() == [
+            str(i) for i in range(7)
+        ]
+        writer.close()
+        assert writer.closed
+
+    def test_drop_when_full(self, tmp_path):
+        """Test non-blocking writer drops and counts entries on a full queue."""
+        log_file = tmp_path / "queued.log"
+        writer = QueuedLogWriter(str(log_file), maxsize=1, block=False)
+        for i in range(1000):
+            writer.write(f"{i}\n")
+        writer.close()
+
+        lines = log_file.read_text(encoding="utf-8").splitlines()
+        assert len(lines) + writer.dropped == 1000
+
+    def test_logging_service_with_queued_writer(self, tmp_path):
+        """Test LoggingEmailService logs through the writer thread."""
+        log_file = tmp_path / "queued.log"
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=[
+                EmailAddress("bob@example.com"),
+                EmailAddress("charlie@example.ru"),
+            ],
+            status=Status.READY,
+        )
+
+        with LoggingEmailService(log_writer=QueuedLogWriter(str(log_file))) as service:
+            service.send_email(email)
+
+        lines = log_file.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 2
+        assert "To: charlie@example.ru" in lines[1]
+
+    def test_write_after_close(self, tmp_path):
+        """Test writing to a closed writer raises ValueError."""
+        writer = QueuedLogWriter(str(tmp_path / "queued.log"))
+        writer.close()
+        with pytest.raises(ValueError):
+            writer.write("late\n")
+
+    def test_write_error_is_raised_and_thread_keeps_running(self, tmp_path):
+        """Test a failed batch surfaces in flush() and later entries are still written."""
+        log_file = tmp_path / "queued.log"
+        writer = QueuedLogWriter(str(log_file))
+        writer.write(b"abc")
+
+        with pytest.raises(TypeError):
+            writer.flush()
+
+        writer.write("ok\n")
+        writer.close()
+        assert log_file.read_text(encoding="utf-8") == "ok\n"
+
+    @pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+    def test_stopped_thread_does_not_block(self, tmp_path):
+        """Test writes and flush fail fast once the writer thread is gone."""
+
+        class Fatal:
+            """Entry that stops the thread reading it."""
+
+            def __iter__(self):
+                raise SystemExit
+
+        writer = QueuedLogWriter(str(tmp_path / "queued.log"), maxsize=1)
+        writer.write(Fatal())
+
+        with pytest.raises(RuntimeError):
+            writer.flush()
+        with pytest.raises(RuntimeError):
+            writer.write("late\n")
+
+    def test_close_races_with_writes(self, tmp_path):
+        """Test every write accepted before a concurrent close reaches the file."""
+        log_file = tmp_path / "queued.log"
+        writer = QueuedLogWriter(str(log_file), maxsize=10)
+        accepted = [0] * 4
+
+        def produce(index):
+            while True:
+                try:
+                    writer.write(f"{index}\n")
+                except ValueError:
+                    return
+                accepted[index] += 1
+
+        threads = [threading.Thread(target=produce, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        while sum(accepted) < 1000:
+            pass
+        writer.close()
+        for thread in threads:
+            thread.join()
+
+        lines = log_file.read_text(encoding="utf-8").splitlines()
+        assert [lines.count(str(i)) for i in range(4)] == accepted
+
+    def test_flush_and_close_sync_to_disk(self, tmp_path, monkeypatch):
+        """Test flush and close fsync the log file."""
+        synced = []
+        monkeypatch.setattr(os, "fsync", synced.append)
+        writer = QueuedLogWriter(str(tmp_path / "queued.log"))
+        writer.write("a\n")
+        writer.flush()
+        assert len(synced) == 1
+        writer.close()
+        assert len(synced) == 2
+
+
+class TestLogFormat:
+    """Tests for structured send log formats and the mmap reader."""
+
+    @pytest.mark.parametrize("log_format", list(LogFormat))
+    def test_round_trip(self, tmp_path, log_format):
+        """Test records read back equal the logged sends in every format."""
+        log_file = tmp_path / f"send.{log_format}"
+        email = Email(
+            subject="Hello, world, again",
+            body="Привет",
+            sender=EmailAddress("alice@example.com"),
+            recipients=[
+                EmailAddress("bob@example.com"),
+                EmailAddress("charlie@example.ru"),
+            ],
+            status=Status.READY,
+        )
+        service = LoggingEmailService(str(log_file), log_format=log_format)
+
+        sent_emails = service.send_email(email)
+        service.send_email(email)
+
+        records = list(iter_log_records(str(log_file), log_format))
+        assert records == [LogRecord.from_email(e) for e in sent_emails] * 2
+        assert records[0].subject == "Hello, world, again"
+        assert records[1].status == Status.SENT
+
+    def test_binary_with_buffered_writer(self, tmp_path):
+        """Test binary format through a binary long-lived writer."""
+        log_file = tmp_path / "send.bin"
+        writer = BufferedLogWriter(str(log_file), binary=True)
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=EmailAddress("bob@example.com"),
+        )
+
+        with LoggingEmailService(
+            log_writer=writer, log_format=LogFormat.BINARY
+        ) as service:
+            service.send_email(email)
+
+        (record,) = iter_log_records(str(log_file), LogFormat.BINARY)
+        assert record.recipient == "bob@example.com"
+        assert record.status == Status.FAILED
+
+    def test_writer_mode_mismatch(self, tmp_path):
+        """Test text writer is rejected for the binary format."""
+        with BufferedLogWriter(str(tmp_path / "send.log")) as writer:
+            with pytest.raises(ValueError):
+                LoggingEmailService(log_writer=writer, log_format=LogFormat.BINARY)
+
+    def test_empty_log(self, tmp_path):
+        """Test reading an empty log yields nothing."""
+        log_file = tmp_path / "empty.log"
+        log_file.touch()
+        assert list(iter_log_records(str(log_file))) == []
+
+
+class TestLogIndex:
+    """Tests for LogIndex class."""
+
+    def send(self, service, sender, recipients, status=Status.READY):
+        """Send a test email from sender to recipients."""
+        email = Email(
+            subject="Test, indexed",
+            body="Hello",
+            sender=EmailAddress(sender),
+            recipients=[EmailAddress(r) for r in recipients],
+            status=status,
+        )
+        return service.send_email(email)
+
+    @pytest.mark.parametrize("log_format", list(LogFormat))
+    def test_query_follows_appends(self, tmp_path, log_format):
+        """Test index picks up appended records and filters by every key."""
+        log_file = str(tmp_path / "send.log")
+        service = LoggingEmailService(log_file, log_format=log_format)
+        index = LogIndex(log_file, log_format)
+        today = date.today().isoformat()
+
+        self.send(service, "alice@example.com", ["bob@gmail.com", "eve@mail.ru"])
+        assert index.count(sender="alice@example.com") == 2
+
+        self.send(service, "carol@example.com", ["dan@gmail.com"], Status.DRAFT)
+        failed = list(index.query(status=Status.FAILED, domain="gmail.com"))
+
+        assert [r.recipient for r in failed] == ["dan@gmail.com"]
+        assert index.count(date=today) == 3
+        assert index.count(date_from=today, date_to=today, domain="mail.ru") == 1
+        assert index.count(date_to="2000-01-01") == 0
+        assert index.count(sender="nobody@example.com") == 0
+
+    def test_reopen_and_rebuild(self, tmp_path):
+        """Test sidecar is reused on reopen and rebuilt when the log shrinks."""
+        log_file = tmp_path / "send.log"
+        service = LoggingEmailService(str(log_file))
+        self.send(service, "alice@example.com", ["bob@gmail.com", "eve@mail.ru"])
+        LogIndex(str(log_file)).refresh()
+
+        reopened = LogIndex(str(log_file))
+        assert len(reopened) == 2
+        assert reopened.refresh() == 0
+
+        log_file.write_text("", encoding="utf-8")
+        self.send(service, "alice@example.com", ["bob@gmail.com"])
+        assert reopened.count() == 1
+        assert reopened.count(domain="mail.ru") == 0
+
+    def test_torn_sidecar_tail_is_reindexed(self, tmp_path):
+        """Test a sidecar cut mid-segment opens and re-indexes the lost records."""
+        log_file = tmp_path / "send.log"
+        index_file = tmp_path / "send.log.idx"
+        service = LoggingEmailService(str(log_file))
+        index = LogIndex(str(log_file))
+        self.send(service, "alice@example.com", ["bob@gmail.com"])
+        index.refresh()
+        intact_size = index_file.stat().st_size
+        self.send(service, "carol@example.com", ["eve@mail.ru", "dan@gmail.com"])
+        index.refresh()
+
+        with open(index_file, "r+b") as f:
+            f.truncate(index_file.stat().st_size - 3)
+        reopened = LogIndex(str(log_file))
+
+        assert index_file.stat().st_size == intact_size
+        assert len(reopened) == 1
+        assert reopened.count(domain="gmail.com") == 2
+        assert reopened.count(sender="carol@example.com") == 2
+        assert len(LogIndex(str(log_file))) == 3
+
+    def test_sidecar_is_compact(self, tmp_path):
+        """Test the sidecar stays much smaller than the log it indexes."""
+        log_file = tmp_path / "send.log"
+        service = LoggingEmailService(str(log_file), share_payload=True)
+        recipients = [f"user{i}@gmail.com" for i in range(1000)]
+        self.send(service, "alice@example.com", recipients)
+        LogIndex(str(log_file)).refresh()
+
+        reopened = LogIndex(str(log_file))
+        sidecar_size = (tmp_path / "send.log.idx").stat().st_size
+
+        assert reopened.count(domain="gmail.com") == 1000
+        assert sidecar_size < log_file.stat().st_size / 2
+
+
+class TestParallelEmailService:
+    """Tests for ParallelEmailService class."""
+
+    @pytest.mark.parametrize("log_format", [LogFormat.TEXT, LogFormat.BINARY])
+    def test_matches_serial_send(self, tmp_path, log_format):
+        """Test partitioned send gives the same copies and log as serial send."""
+        recipients = [EmailAddress(f"user{i}@example.com") for i in range(5)]
+        email = Email(
+            subject="Test, parallel",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=recipients,
+            status=Status.READY,
+        )
+        serial_log = tmp_path / "serial.log"
+        parallel_log = tmp_path / "parallel.log"
+
+        serial = LoggingEmailService(str(serial_log), log_format=log_format)
+        expected = serial.send_email(email)
+        with ParallelEmailService(
+            str(parallel_log), workers=2, chunk_size=2, log_format=log_format
+        ) as service:
+            sent_emails = service.send_email(email)
+
+        assert sent_emails == expected
+        assert parallel_log.read_bytes() == serial_log.read_bytes()
+        assert email.recipients == recipients
+        assert email.date is None
+
+    def test_closed_iterator_stops_partitions(self, tmp_path):
+        """Test copies are built lazily and closing iter_send logs no further blocks."""
+        log_file = tmp_path / "parallel.log"
+
+        with ParallelEmailService(str(log_file), workers=2, chunk_size=2) as service:
+            sent_iter = service.iter_send(make_email(20))
+            first = next(sent_iter)
+            sent_iter.close()
+            sent_emails = service.send_email(make_email(3))
+
+        lines = log_file.read_text(encoding="utf-8").splitlines()
+        assert first.recipients[0].address == "user0@example.com"
+        assert len(lines) == 2 + 3
+        assert [e.status for e in sent_emails] == [Status.SENT] * 3
+
+    def test_dedupe_metrics_and_hooks(self, tmp_path):
+        """Test the partitioned path dedupes and reports to metrics and hooks."""
+        addresses = ["a@x.com", "b@x.com", "A@x.com", "alice@example.com", "c@x.com"]
+        email = Email(
+            subject="Test, parallel",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=[EmailAddress(address) for address in addresses],
+            status=Status.READY,
+        )
+        metrics = Metrics()
+        hooks = Hooks(id_prefix="c")
+        hook = hooks.register(RecordingHook())
+        log_file = tmp_path / "parallel.log"
+
+        with ParallelEmailService(
+            str(log_file),
+            workers=2,
+            chunk_size=2,
+            dedupe=True,
+            metrics=metrics,
+            hooks=hooks,
+        ) as service:
+            sent_emails = service.send_email(email)
+
+        assert [e.recipients[0].address for e in sent_emails] == [
+            "a@x.com",
+            "b@x.com",
+            "c@x.com",
+        ]
+        assert (service.duplicates_removed, service.self_sends_removed) == (1, 1)
+        assert len(log_file.read_text(encoding="utf-8").splitlines()) == 3
+        assert metrics.items[Stage.FAN_OUT] == 3
+        assert metrics.items[Stage.LOG_WRITE] == 3
+        assert [call[:3] for call in hook.calls] == [
+            ("before", Stage.FAN_OUT, "c-1"),
+            ("before", Stage.LOG_WRITE, "c-1"),
+            ("after", Stage.LOG_WRITE, "c-1"),
+            ("after", Stage.FAN_OUT, "c-1"),
+        ]
+
+
+class TestOutbox:
+    """Tests for the durable Outbox and OutboxEmailService."""
+
+    def test_resume_after_restart(self, tmp_path):
+        """Test reopened outbox resumes from the first unacknowledged unit."""
+        path = str(tmp_path / "outbox.bin")
+        with Outbox(path) as outbox:
+            unit_ids = outbox.enqueue(make_email(4, short_body="Hel..."))
+            outbox.ack(unit_ids[0], Status.SENT)
+            outbox.ack(unit_ids[2], Status.FAILED)
+
+        with Outbox(path) as outbox:
+            units = list(outbox.pending())
+            assert [unit.unit_id for unit in units] == [unit_ids[1], unit_ids[3]]
+            email = units[0].email
+            assert email.recipients == [EmailAddress("user1@example.com")]
+            assert (email.subject, email.short_body, email.status) == (
+                "Test",
+                "Hel...",
+                Status.READY,
+            )
+            assert outbox.enqueue(make_email(1))[0] > unit_ids[-1]
+
+    def test_torn_tail_is_dropped(self, tmp_path):
+        """Test a partially written trailing record is cut off on reopen."""
+        path = str(tmp_path / "outbox.bin")
+        with Outbox(path) as outbox:
+            unit_ids = outbox.enqueue(make_email(2))
+            outbox.ack(unit_ids[0], Status.SENT)
+        size = os.path.getsize(path)
+        with open(path, "r+b") as f:
+            f.truncate(size - 3)
+
+        with Outbox(path) as outbox:
+            assert len(outbox) == 2
+        assert os.path.getsize(path) < size - 3
+
+    def test_service_sends_only_its_email(self, tmp_path):
+        """Test send_email sends its own units and resume() sends the leftovers."""
+        path = str(tmp_path / "outbox.bin")
+        with Outbox(path) as outbox:
+            sent_iter = OutboxEmailService(outbox).iter_send(make_email(3))
+            next(sent_iter)
+
+        with Outbox(path) as outbox:
+            service = OutboxEmailService(outbox)
+            assert len(outbox) == 2
+            sent_emails = service.send_email(make_email(1))
+            assert [e.recipients[0].address for e in sent_emails] == ["user0@example.com"]
+            assert len(outbox) == 2
+            recovered = service.resume()
+            assert [e.recipients[0].address for e in recovered] == [
+                "user1@example.com",
+                "user2@example.com",
+            ]
+            assert all(e.status == Status.SENT for e in sent_emails + recovered)
+            assert len(outbox) == 0
+            outbox.compact()
+
+        with Outbox(path) as outbox:
+            assert len(outbox) == 0
+        assert os.path.getsize(path) == 0
+
+    def test_acknowledged_payloads_are_compacted(self, tmp_path):
+        """Test the file is compacted once most records are acknowledged units."""
+        path = str(tmp_path / "outbox.bin")
+        expected_path = str(tmp_path / "expected.bin")
+        with Outbox(expected_path) as outbox:
+            outbox.enqueue(make_email(2, subject="Kept"))
+
+        with Outbox(path, compact_after=5) as outbox:
+            unit_ids = outbox.enqueue(make_email(10))
+            kept = outbox.enqueue(make_email(2, subject="Kept"))
+            for unit_id in unit_ids:
+                outbox.ack(unit_id, Status.SENT)
+
+        with Outbox(path) as outbox:
+            units = list(outbox.pending())
+        assert [unit.unit_id for unit in units] == kept
+        assert {unit.email.subject for unit in units} == {"Kept"}
+        assert os.path.getsize(path) == os.path.getsize(expected_path)
+
+
+class TestAsyncEmailService:
+    """Tests for AsyncEmailService class."""
+
+    def test_concurrent_delivery(self):
+        """Test copies are delivered concurrently up to the limit."""
+        transport = FakeTransport(latency=0.05)
+        service = AsyncEmailService(transport, concurrency=10)
+        email = make_email(10)
+
+        sent_emails = asyncio.run(asyncio.wait_for(service.send_email(email), 0.4))
+
+        assert [e.status for e in sent_emails] == [Status.SENT] * 10
+        assert [e.recipients for e in sent_emails] == [[r] for r in email.recipients]
+        assert sorted(transport.delivered) == sorted(r.address for r in email.recipients)
+        assert email.status == Status.READY
+
+    def test_failures_and_timeouts(self):
+        """Test failed and timed out deliveries are marked FAILED."""
+
+        class FlakyTransport:
+            async def deliver(self, email):
+                address = email.recipients[0].address
+                if address.startswith("user1@"):
+                    raise DeliveryError("rejected")
+                if address.startswith("user2@"):
+                    await asyncio.sleep(1)
+
+        service = AsyncEmailService(FlakyTransport(), timeout=0.05)
+        sent_emails = asyncio.run(service.send_email(make_email(3)))
+
+        assert [e.status for e in sent_emails] == [
+            Status.SENT,
+            Status.FAILED,
+            Status.FAILED,
+        ]
+
+    def test_unexpected_error_stops_other_deliveries(self):
+        """Test an unexpected transport error cancels the deliveries in flight."""
+
+        class BrokenTransport(FakeTransport):
+            async def deliver(self, email):
+                if email.recipients[0].address.startswith("user0@"):
+                    raise RuntimeError("transport bug")
+                await super().deliver(email)
+
+        transport = BrokenTransport(latency=0.01)
+        service = AsyncEmailService(transport, concurrency=4)
+
+        async def scenario():
+            with pytest.raises(RuntimeError):
+                await service.send_email(make_email(40))
+            await asyncio.sleep(0.1)
+
+        asyncio.run(scenario())
+
+        assert transport.delivered == []
+
+    def test_not_ready_email_is_not_delivered(self):
+        """Test email that is not ready fails without transport calls."""
+        transport = FakeTransport(latency=0)
+        service = AsyncEmailService(transport)
+
+        sent_emails = asyncio.run(service.send_email(make_email(2, status=Status.DRAFT)))
+
+        assert [e.status for e in sent_emails] == [Status.FAILED] * 2
+        assert transport.calls == 0
+
+    def test_grouped_delivery(self):
+        """Test one transport call per domain group with per-recipient statuses."""
+        transport = FakeTransport(latency=0)
+        service = AsyncEmailService(transport, max_group_size=2)
+        domains = ["gmail.com", "mail.ru", "gmail.com", "gmail.com", "mail.ru"]
+        email = make_email(0)
+        email.recipients = [EmailAddress(f"u{i}@{d}") for i, d in enumerate(domains)]
+
+        sent_emails = asyncio.run(service.send_email(email))
+
+        assert [e.recipients for e in sent_emails] == [[r] for r in email.recipients]
+        assert [e.status for e in sent_emails] == [Status.SENT] * 5
+        assert transport.calls == 3
+
+    def test_grouped_delivery_requires_batch_transport(self):
+        """Test grouping is rejected for transports without deliver_batch."""
+
+        class SingleTransport:
+            async def deliver(self, email):
+                pass
+
+        with pytest.raises(ValueError):
+            AsyncEmailService(SingleTransport(), max_group_size=10)
+
+
+class TestSendScheduler:
+    """Tests for TokenBucket and SendScheduler with a fake clock."""
+
+    def test_token_bucket(self):
+        """Test bucket starts full, empties and refills at its rate."""
+        now = [0.0]
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+
+        assert bucket.try_take() and bucket.try_take()
+        assert not bucket.try_take()
+        assert bucket.delay() == pytest.approx(0.5)
+        now[0] = 10.0
+        assert bucket.tokens == 2
+
+    def test_token_bucket_capacity(self):
+        """Test capacity defaults to at least one token and cannot be below one."""
+        assert TokenBucket(rate=0.5).capacity == 1
+        with pytest.raises(ValueError):
+            TokenBucket(rate=1, capacity=0.5)
+
+    def test_rate_below_one_per_second(self):
+        """Test sub-1/s global and domain rates send one unit every two seconds."""
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        scheduler = SendScheduler(
+            EmailService(),
+            rate=0.5,
+            domain_rates={"gmail.com": 0.5},
+            clock=lambda: now[0],
+        )
+        scheduler.submit(make_email(["u0@gmail.com", "u1@gmail.com", "u2@gmail.com"]))
+
+        sent_emails = scheduler.run(sleep)
+
+        assert len(sent_emails) == 3
+        assert now[0] == pytest.approx(4.0)
+
+    def test_global_and_domain_pacing(self):
+        """Test sends are paced by global and per-domain rates without sleeping."""
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        scheduler = SendScheduler(
+            EmailService(),
+            rate=10,
+            burst=1,
+            domain_rates={"mail.ru": 1},
+            clock=lambda: now[0],
+        )
+        scheduler.submit(
+            make_email(
+                ["u0@mail.ru", "u1@mail.ru", "u2@mail.ru"]
+                + [f"u{i}@gmail.com" for i in range(3, 8)]
+            )
+        )
+
+        first = scheduler.poll()
+        assert len(first) == 1
+        assert len(scheduler) == 7
+
+        sent_emails = first + scheduler.run(sleep)
+
+        assert len(sent_emails) == 8
+        assert all(e.status == Status.SENT for e in sent_emails)
+        assert now[0] == pytest.approx(2.0)
+        stats = scheduler.stats()
+        assert stats.depth == 0
+        assert stats.dispatched == 8
+        assert stats.max_wait == pytest.approx(2.0)
+
+    def test_throttled_domain_does_not_block_others(self):
+        """Test units for other domains pass a throttled domain."""
+        now = [0.0]
+        scheduler = SendScheduler(
+            EmailService(), rate=100, default_domain_rate=1, clock=lambda: now[0]
+        )
+        scheduler.submit(make_email(["u0@mail.ru", "u1@mail.ru", "u2@bk.ru"]))
+
+        sent_emails = scheduler.poll()
+
+        assert [e.recipients[0].address for e in sent_emails] == [
+            "u0@mail.ru",
+            "u2@bk.ru",
+        ]
+        assert scheduler.next_delay() == pytest.approx(1.0)
+
+    def test_transactional_overtakes_bulk(self):
+        """Test transactional units are sent before queued bulk units."""
+        now = [0.0]
+        scheduler = SendScheduler(EmailService(), rate=1, clock=lambda: now[0])
+        scheduler.submit(make_email(["u0@gmail.com", "u1@mail.ru"], subject="Bulk"))
+        scheduler.submit(
+            make_email(["u0@gmail.com"], subject="Reset"), Priority.TRANSACTIONAL
+        )
+
+        assert scheduler.stats().depth_by_priority == {
+            Priority.TRANSACTIONAL: 1,
+            Priority.BULK: 2,
+        }
+        order = []
+        for _ in range(3):
+            order += [e.subject for e in scheduler.poll()]
+            now[0] += 1
+
+        assert order == ["Reset", "Bulk", "Bulk"]
+
+
+class TestRetryQueue:
+    """Tests for RetryQueue with a fake clock."""
+
+    class FlakyService(EmailService):
+        """Service failing each recipient a configured number of times."""
+
+        def __init__(self, failures):
+            super().__init__(share_payload=True)
+            self.failures = failures
+            self.sends = []
+
+        def send_email(self, email):
+            sent_emails = super().send_email(email)
+            for sent_email in sent_emails:
+                address = sent_email.recipients[0].address
+                self.sends.append(address)
+                if self.failures.get(address, 0) > 0:
+                    self.failures[address] -= 1
+                    sent_email.status = Status.FAILED
+            return sent_emails
+
+    def test_only_failed_copies_are_retried_with_backoff(self):
+        """Test FAILED copies are resent with exponential backoff until they succeed."""
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        service = self.FlakyService({"u1@example.com": 3})
+        queue = RetryQueue(
+            service,
+            RetryPolicy(base_delay=1, multiplier=2, jitter=0),
+            clock=lambda: now[0],
+        )
+        email = Email(
+            subject="Test",
+            body="Hello",
+            sender=EmailAddress("alice@example.com"),
+            recipients=[EmailAddress("u0@example.com"), EmailAddress("u1@example.com")],
+            status=Status.READY,
+        )
+
+        assert queue.add(email, service.send_email(email)) == 1
+        recovered = queue.run(sleep)
+
+        assert [e.recipients[0].address for e in recovered] == ["u1@example.com"]
+        assert recovered[0].status == Status.SENT
+        assert service.sends.count("u0@example.com") == 1
+        assert now[0] == pytest.approx(1 + 2 + 4)
+        assert queue.stats() == (0, 3, 1, 0)
+
+    def test_dead_letter_after_max_attempts(self, tmp_path):
+        """Test copies out of attempts are written to the dead-letter log."""
+        now = [0.0]
+        service = self.FlakyService({"u0@example.com": 10})
+        log_file = str(tmp_path / "dead.log")
+        with BufferedLogWriter(log_file) as writer:
+            queue = RetryQueue(
+                service,
+                RetryPolicy(max_attempts=3),
+                dead_letter=LogDeadLetterSink(writer),
+                clock=lambda: now[0],
+                seed=1,
+            )
+            email = Email(
+                subject="Test",
+                body="Hello",
+                sender=EmailAddress("alice@example.com"),
+                recipients=[EmailAddress("u0@example.com")],
+                status=Status.READY,
+            )
+            queue.add(email, service.send_email(email))
+            queue.run(lambda seconds: now.__setitem__(0, now[0] + seconds))
+
+        assert queue.stats() == (0, 2, 0, 1)
+        assert [r.recipient for r in iter_log_records(log_file)] == ["u0@example.com"]
+
+    def test_invalid_email_is_not_retried(self):
+        """Test FAILED copies of an INVALID email go to dead-letter without a resend."""
+        service = self.FlakyService({})
+        queue = RetryQueue(service, clock=lambda: 0.0)
+        email = Email(
+            subject="Test",
+            body="",
+            sender=EmailAddress("alice@example.com"),
+            recipients=[EmailAddress("u0@example.com")],
+        ).prepare()
+        sent_emails = service.send_email(email)
+
+        assert email.status == Status.INVALID
+        assert sent_emails[0].status == Status.FAILED
+        assert queue.add(email, sent_emails) == 1
+        assert queue.run(lambda seconds: None) == []
+        assert queue.stats() == (0, 0, 0, 1)
+        assert queue.dead_letter.emails == [(sent_emails[0], 1)]
+
+    def test_unprepared_email_is_not_retried(self):
+        """Test FAILED copies of a DRAFT are dead-lettered instead of sent unprepared."""
+        service = self.FlakyService({})
+        queue = RetryQueue(service, clock=lambda: 0.0)
+        email = make_email(2, subject="  Test  ", status=Status.DRAFT)
+        sent_emails = service.send_email(email)
+
+        assert queue.add(email, sent_emails) == 2
+        assert queue.run(lambda seconds: None) == []
+        assert service.sends == ["user0@example.com", "user1@example.com"]
+        assert queue.stats() == (0, 0, 0, 2)
+
+    def test_async_retries_through_async_service(self):
+        """Test AsyncRetryQueue resends failed copies through AsyncEmailService."""
+        now = [0.0]
+
+        async def sleep(seconds):
+            now[0] += seconds
+
+        async def scenario():
+            transport = FakeTransport(latency=0, failure_rate=0.5, seed=3)
+            service = AsyncEmailService(transport)
+            queue = AsyncRetryQueue(
+                service,
+                RetryPolicy(base_delay=1, jitter=0, max_attempts=20),
+                clock=lambda: now[0],
+            )
+            email = make_email(20)
+            sent_emails = await service.send_email(email)
+            failed = queue.add(email, sent_emails)
+            return transport, failed, await queue.run(sleep), queue.stats()
+
+        transport, failed, recovered, stats = asyncio.run(scenario())
+
+        assert failed > 0
+        assert len(recovered) == failed
+        assert all(e.status == Status.SENT for e in recovered)
+        assert len(transport.delivered) == 20
+        assert set(transport.delivered) == {f"user{i}@example.com" for i in range(20)}
+        assert stats == (0, transport.calls - 20, failed, 0)
+
+
+class TestMetrics:
+    """Tests for pipeline metrics and Prometheus export."""
+
+    RECIPIENTS = ["bob@example.com", "carol@example.com", "dave@example.ru"]
+
+    def test_histogram_buckets(self):
+        """Test observations land in the first bucket whose bound is not below them."""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.cumulative() == [2, 3, 4]
+        assert histogram.sum == pytest.approx(2.65)
+
+    def test_fan_out_counts_status_and_domain(self):
+        """Test fan-out records one call, its copies and their statuses and domains."""
+        metrics = Metrics()
+        service = EmailService(share_payload=True, metrics=metrics)
+
+        sent_emails = service.send_email(make_email(self.RECIPIENTS))
+
+        assert len(sent_emails) == 3
+        assert metrics.stages[Stage.FAN_OUT].count == 1
+        assert metrics.items[Stage.FAN_OUT] == 3
+        assert metrics.statuses[Status.SENT] == 3
+        assert metrics.domains == {"example.com": 2, "example.ru": 1}
+
+    def test_logging_service_records_log_writes(self, tmp_path):
+        """Test log writes are measured with and without a long-lived writer."""
+        metrics = Metrics()
+        service = LoggingEmailService(str(tmp_path / "send.log"), metrics=metrics)
+        list(service.iter_send(make_email(self.RECIPIENTS)))
+
+        with BufferedLogWriter(str(tmp_path / "buffered.log")) as writer:
+            buffered = LoggingEmailService(log_writer=writer, metrics=metrics)
+            buffered.send_email(make_email(self.RECIPIENTS))
+
+        assert metrics.stages[Stage.LOG_WRITE].count == 2
+        assert metrics.items[Stage.LOG_WRITE] == 6
+        assert metrics.stages[Stage.FAN_OUT].count == 2
+        assert len((tmp_path / "send.log").read_text().splitlines()) == 3
+
+    def test_prepare_and_validate_stages(self):
+        """Test helpers time prepare and batch validation with a fake clock."""
+        ticks = iter([0.0, 0.5, 1.0, 3.0])
+        metrics = Metrics(buckets=(1.0,), clock=lambda: next(ticks))
+
+        parsed = metrics.parse_addresses(["bob@example.com", "bad"])
+        email = metrics.prepare(make_email(self.RECIPIENTS))
+
+        assert parsed[1] is None
+        assert email.status == Status.READY
+        assert metrics.items[Stage.VALIDATE] == 2
+        assert metrics.stages[Stage.VALIDATE].counts == [1, 0]
+        assert metrics.stages[Stage.PREPARE].counts == [0, 1]
+
+    def test_domain_labels_are_bounded(self):
+        """Test domains beyond max_domains are counted under "other"."""
+        metrics = Metrics(max_domains=1)
+        metrics.add_counts({}, {"a.com": 1, "b.com": 2})
+        metrics.add_counts({}, {"a.com": 1, 'c"d.com': 1})
+
+        assert metrics.domains == {"a.com": 2, "other": 3}
+
+    def test_prometheus_export(self, tmp_path):
+        """Test text exposition written to a file and served over HTTP."""
+        metrics = Metrics(buckets=(0.5,), clock=lambda: 0.0)
+        EmailService(share_payload=True, metrics=metrics).send_email(
+            make_email(self.RECIPIENTS)
+        )
+
+        path = tmp_path / "email.prom"
+        metrics.write_prometheus(str(path))
+        text = path.read_text(encoding="utf-8")
+        assert "# TYPE email_stage_duration_seconds histogram" in text
+        assert 'email_stage_duration_seconds_bucket{stage="fan_out",le="0.5"} 1' in text
+        assert 'email_stage_duration_seconds_bucket{stage="fan_out",le="+Inf"} 1' in text
+        assert 'email_stage_items_total{stage="fan_out"} 3' in text
+        assert 'email_copies_total{status="sent"} 3' in text
+        assert 'email_recipient_domain_copies_total{domain="example.ru"} 1' in text
+
+        server = metrics.serve()
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+                assert response.headers["Content-Type"].startswith("text/plain")
+                assert response.read().decode("utf-8") == text
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class RecordingHook:
+    """Hook remembering every callback it received."""
+
+    def __init__(self):
+        self.calls = []
+
+    def before(self, event):
+        self.calls.append(("before", event.stage, event.correlation_id, event.duration))
+
+    def after(self, event):
+        self.calls.append(("after", event.stage, event.correlation_id, event.items))
+
+
+class TestHooks:
+    """Tests for stage hooks and the profiling hook."""
+
+    RECIPIENTS = ["bob@example.com", "carol@example.ru"]
+
+    def test_unregistered_hook_is_not_called(self):
+        """Test a service whose registry became empty calls no hook."""
+        hooks = Hooks()
+        hook = hooks.register(RecordingHook())
+        hooks.unregister(hook)
+        service = EmailService(share_payload=True, hooks=hooks)
+
+        sent_emails = service.send_email(make_email(self.RECIPIENTS))
+
+        assert not hooks
+        assert hook.calls == []
+        assert sent_emails == EmailService(share_payload=True).send_email(
+            make_email(self.RECIPIENTS)
+        )
+
+    def test_fan_out_events_share_correlation_id(self):
+        """Test before/after run once per email with one id per original email."""
+        hooks = Hooks(id_prefix="c")
+        hook = hooks.register(RecordingHook())
+        service = EmailService(hooks=hooks)
+
+        service.send_email(make_email(self.RECIPIENTS))
+        service.send_email(make_email(self.RECIPIENTS))
+
+        assert hook.calls == [
+            ("before", Stage.FAN_OUT, "c-1", None),
+            ("after", Stage.FAN_OUT, "c-1", 2),
+            ("before", Stage.FAN_OUT, "c-2", None),
+            ("after", Stage.FAN_OUT, "c-2", 2),
+        ]
+
+    def test_logging_service_reports_log_writes(self, tmp_path):
+        """Test fan-out and log write of one email carry the same id."""
+        hooks = Hooks(id_prefix="c")
+        hook = hooks.register(RecordingHook())
+
+        with BufferedLogWriter(str(tmp_path / "buffered.log")) as writer:
+            LoggingEmailService(log_writer=writer, hooks=hooks).send_email(
+                make_email(self.RECIPIENTS)
+            )
+        service = LoggingEmailService(str(tmp_path / "send.log"), hooks=hooks)
+        list(service.iter_send(make_email(self.RECIPIENTS)))
+
+        assert [call[:3] for call in hook.calls] == [
+            ("before", Stage.FAN_OUT, "c-1"),
+            ("after", Stage.FAN_OUT, "c-1"),
+            ("before", Stage.LOG_WRITE, "c-1"),
+            ("after", Stage.LOG_WRITE, "c-1"),
+            ("before", Stage.LOG_WRITE, "c-2"),
+            ("before", Stage.FAN_OUT, "c-2"),
+            ("after", Stage.FAN_OUT, "c-2"),
+            ("after", Stage.LOG_WRITE, "c-2"),
+        ]
+        assert len((tmp_path / "send.log").read_text().splitlines()) == 2
+
+    def test_correlation_id_spans_all_stages(self, tmp_path):
+        """Test an id given to prepare and send_email tags every stage of the email."""
+        hooks = Hooks(id_prefix="c")
+        hook = hooks.register(RecordingHook())
+        service = LoggingEmailService(str(tmp_path / "send.log"), hooks=hooks)
+
+        correlation_id = hooks.new_correlation_id()
+        email = make_email(self.RECIPIENTS, status=Status.DRAFT)
+        hooks.parse_addresses(self.RECIPIENTS, correlation_id)
+        service.send_email(hooks.prepare(email, correlation_id), correlation_id)
+
+        assert [call[1] for call in hook.calls if call[0] == "before"] == [
+            Stage.VALIDATE,
+            Stage.PREPARE,
+            Stage.LOG_WRITE,
+            Stage.FAN_OUT,
+        ]
+        assert {call[2] for call in hook.calls} == {"c-1"}
+
+    def test_prepare_and_validate_timing(self):
+        """Test prepare and validate events get durations from the clock."""
+        ticks = iter([0.0, 0.25, 1.0, 3.0])
+        hooks = Hooks(clock=lambda: next(ticks), id_prefix="c")
+        durations = []
+        hook = hooks.register(RecordingHook())
+        hook.after = lambda event: durations.append((event.stage, event.duration))
+
+        hooks.parse_addresses(["bob@example.com", "bad"], correlation_id="x")
+        email = hooks.prepare(make_email(self.RECIPIENTS))
+
+        assert email.status == Status.READY
+        assert durations == [(Stage.VALIDATE, 0.25), (Stage.PREPARE, 2.0)]
+        assert [call[2] for call in hook.calls] == ["x", "c-1"]
+
+    def test_after_runs_when_stage_raises(self):
+        """Test after() still runs when the wrapped stage fails."""
+        hooks = Hooks(id_prefix="c")
+        hook = hooks.register(RecordingHook())
+        email = make_email(self.RECIPIENTS)
+
+        def failing_fan_out():
+            yield email
+            raise RuntimeError("relay down")
+
+        with pytest.raises(RuntimeError):
+            list(hooks.wrap(Stage.FAN_OUT, "c-1", failing_fan_out()))
+
+        assert hook.calls[-1][:3] == ("after", Stage.FAN_OUT, "c-1")
+
+    def test_profile_hook_dumps_sampled_campaigns(self, tmp_path):
+        """Test sampled campaigns are profiled into pstats and tracemalloc files."""
+        hooks = Hooks(id_prefix="c")
+        profiler = hooks.register(
+            ProfileHook(str(tmp_path / "profiles"), stages=[Stage.FAN_OUT], memory=True)
+        )
+        service = EmailService(share_payload=True, hooks=hooks)
+        service.send_email(make_email(self.RECIPIENTS))
+
+        assert [os.path.basename(path) for path in profiler.dumped] == [
+            "c-1.fan_out.prof",
+            "c-1.fan_out.tracemalloc",
+        ]
+        stats = pstats.Stats(profiler.dumped[0])
+        assert any(name == "_iter_shared" for _, _, name in stats.stats)
+
+        profiler.sample_rate = 0.0
+        service.send_email(make_email(self.RECIPIENTS))
+        assert len(profiler.dumped) == 2
+
+
+class TestSMTPTransport:
+    """Tests for SMTPTransport against the local SMTP server."""
+
+    def test_batches_recipients_over_pooled_connection(self):
+        """Test copies share transactions and one connection is reused."""
+
+        async def scenario():
+            async with LocalSMTPServer() as server:
+                transport = SMTPTransport(port=server.port, pool_size=1, max_recipients=4)
+                service = AsyncEmailService(transport, concurrency=10)
+                first = await service.send_email(make_email(10))
+                second = await service.send_email(make_email(3))
+                await transport.close()
+                return server, transport, first + second
+
+        server, transport, sent_emails = asyncio.run(scenario())
+
+        assert all(e.status == Status.SENT for e in sent_emails)
+        assert server.connections == 1
+        assert [len(m.recipients) for m in server.messages] == [4, 4, 2, 3]
+        assert transport.transactions == 4
+
+    def test_rejected_recipient_fails_alone(self):
+        """Test a rejected RCPT fails only its own copy."""
+
+        async def scenario():
+            async with LocalSMTPServer(
+                pipelining=False, reject=lambda r: r.startswith("user1@")
+            ) as server:
+                transport = SMTPTransport(port=server.port)
+                sent = await AsyncEmailService(transport).send_email(
+                    make_email(3, body=".hidden\nline")
+                )
+                await transport.close()
+                return server, sent
+
+        server, sent_emails = asyncio.run(scenario())
+
+        assert [e.status for e in sent_emails] == [
+            Status.SENT,
+            Status.FAILED,
+            Status.SENT,
+        ]
+        assert server.recipients == ["user0@example.com", "user2@example.com"]
+        assert b"\r\n.hidden" in server.messages[0].data
+
+    def test_unexpected_error_reaches_waiting_copies(self):
+        """Test an error building the message fails every waiter instead of hanging."""
+
+        async def scenario():
+            async with LocalSMTPServer() as server:
+                transport = SMTPTransport(port=server.port)
+                email = make_email(2)
+                email.subject = "Bad\nSubject"
+                copies = EmailService(share_payload=True).send_email(email)
+                results = await asyncio.wait_for(
+                    asyncio.gather(
+                        *(transport.deliver(copy) for copy in copies),
+                        return_exceptions=True,
+                    ),
+                    timeout=5,
+                )
+                await transport.close()
+                return server, results
+
+        server, results = asyncio.run(scenario())
+
+        assert [type(result) for result in results] == [ValueError, ValueError]
+        assert server.messages == []
+
+    def test_cancelled_transaction_drops_connection(self):
+        """Test a transaction cut off by a timeout does not leave stale replies."""
+
+        async def scenario():
+            async with LocalSMTPServer() as server:
+                transport = SMTPTransport(port=server.port, pool_size=1)
+                results = await transport.deliver_batch([make_email(1)])
+                server.latency = 0.05
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        transport.deliver_batch([make_email(1)]), timeout=0.01
+                    )
+                server.latency = 0.0
+                results += await transport.deliver_batch([make_email(1)])
+                await transport.close()
+                return server, transport, results
+
+        server, transport, results = asyncio.run(scenario())
+
+        assert results == [True, True]
+        assert transport.pool.opened == 2
+        assert len(server.messages) == 2
+
+    def test_rejected_message_resets_transaction(self):
+        """Test a rejected DATA is reset and the connection is reused."""
+
+        async def scenario():
+            async with LocalSMTPServer(reject_message=lambda d: b"spam" in d) as server:
+                transport = SMTPTransport(port=server.port, pool_size=1)
+                rejected = await transport.deliver_batch([make_email(1, body="spam")])
+                delivered = await transport.deliver_batch([make_email(1)])
+                await transport.close()
+                return server, transport, rejected + delivered
+
+        server, transport, results = asyncio.run(scenario())
+
+        assert results == [False, True]
+        assert server.resets == 1
+        assert transport.pool.opened == 1
+        assert len(server.messages) == 1
+
+    def test_idle_connection_is_recycled(self):
+        """Test connections idle past the timeout are replaced."""
+        now = [0.0]
+
+        async def scenario():
+            async with LocalSMTPServer() as server:
+                transport = SMTPTransport(
+                    port=server.port, idle_timeout=10, clock=lambda: now[0]
+                )
+                email = make_email(1)
+                await transport.deliver_batch([email])
+                now[0] = 5.0
+                await transport.deliver_batch([email])
+                now[0] = 60.0
+                await transport.deliver_batch([email])
+                await transport.close()
+                return server
+
+        server = asyncio.run(scenario())
+
+        assert server.connections == 2
+        assert len(server.messages) == 3
+
+    def test_unreachable_relay_fails_copies(self):
+        """Test connection errors mark copies FAILED."""
+
+        async def scenario():
+            async with LocalSMTPServer() as server:
+                port = server.port
+            transport = SMTPTransport(port=port)
+            return await AsyncEmailService(transport).send_email(make_email(2))
+
+        sent_emails = asyncio.run(scenario())
+
+        assert [e.status for e in sent_emails] == [Status.FAILED] * 2